@@ -1,17 +1,69 @@
+import asyncio
+import json
+import math
 import os
+import queue
 import sys
-from typing import List, Dict, Any
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-import pandas as pd
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
 # Ensure project root is on sys.path for src imports
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from src.pipeline.predict_pipeline import PredictPipeline  # type: ignore
+from src.logger import logging  # type: ignore
+from src.pipeline.predict_pipeline import (  # type: ignore
+    REQUIRED_COLUMNS,
+    IssueBatch,
+    observe_predictions,
+    record_stages,
+    stage_timer,
+)
+from src.pipeline.prior import PRIOR_MODEL_NAME, PriorPipeline  # type: ignore
+from src.serving.batching import BatcherPool  # type: ignore
+from src.serving.cache import FeatureRowCache, PredictionCache  # type: ignore
+from src.serving.config import ServingConfig  # type: ignore
+from src.serving.threads import ThreadBudget  # type: ignore
+from src.serving.drift import DriftMonitor  # type: ignore
+from src.serving.deadline import (  # type: ignore
+    DEADLINE_HEADER,
+    DEGRADED_DEADLINE,
+    DEGRADED_HEADER,
+    DEGRADED_OVERLOAD,
+    AdmissionController,
+    Deadline,
+    DeadlineExceeded,
+)
+from src.serving.executor import BoundedExecutor, ExecutorSaturated  # type: ignore
+from src.serving.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ServingMetrics, stats_gauges  # type: ignore
+from src.serving.payloads import (  # type: ignore
+    ARROW,
+    JSON,
+    MSGPACK,
+    NotAcceptable,
+    PayloadError,
+    UnsupportedMediaType,
+    decode_issues,
+    dumps_json,
+    negotiate,
+    score_batch,
+)
+from src.serving.ranking import (  # type: ignore
+    InvalidCursor,
+    decode_cursor,
+    rank_by_high_probability as rank_issues,
+)
+from src.serving.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, SamplingProfiler  # type: ignore
+from src.serving.registry import ModelRegistry, UnknownModel  # type: ignore
+from src.serving.shadow import ShadowScorer  # type: ignore
+from src.serving.startup import Readiness  # type: ignore
 
 
 class IssueIn(BaseModel):
@@ -25,91 +77,611 @@ class PredictionOut(BaseModel):
     confidence: float
     class_probabilities: Dict[str, float]
     model_used: str
+    # Set (to the reason) only when a fallback scorer answered
+    degraded: Optional[str] = None
 
 
-def create_app() -> FastAPI:
+# Batch bodies are decoded by src.serving.payloads rather than FastAPI, so they are described here
+_BATCH_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            JSON: {"schema": {"anyOf": [
+                {"type": "array", "items": {"$ref": "#/components/schemas/IssueIn"}},
+                {"type": "object", "required": REQUIRED_COLUMNS, "properties": {
+                    column: {"type": "array", "items": {"type": "string", "minLength": 1}}
+                    for column in REQUIRED_COLUMNS
+                }},
+            ]}},
+            MSGPACK: {"schema": {"type": "string", "format": "binary"}},
+            ARROW: {"schema": {"type": "string", "format": "binary"}},
+        },
+    },
+}
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams results while the request body is still being read.
+
+    Starlette's StreamingResponse listens for client disconnects on ``receive``
+    during streaming, which would steal the body chunks the generator consumes;
+    disconnects surface through ``request.stream()`` instead.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+class ArrivalTimeMiddleware:
+    """
+    Stamps ``request.state.received_at`` so handlers can time request parsing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+class ProfileIdMiddleware:
+    """
+    Returns the id of a request's profile, if one was written, in ``X-Profile-Id``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def _send(message) -> None:
+            profile_id = scope.get("state", {}).get("profile_id")
+            if message["type"] == "http.response.start" and profile_id:
+                message["headers"] = [*message.get("headers", []),
+                                      (PROFILE_ID_HEADER.lower().encode("latin-1"), profile_id.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, _send)
+
+
+def _overloaded(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Inference queue is full, retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def _parse_timings(request: Request) -> Dict[str, float]:
+    received_at = getattr(request.state, "received_at", None)
+    return {} if received_at is None else {"parse": time.perf_counter() - received_at}
+
+
+def _degraded_headers(degraded: Optional[str]) -> Optional[Dict[str, str]]:
+    return {DEGRADED_HEADER: degraded} if degraded is not None else None
+
+
+def create_app(registry: Optional[ModelRegistry] = None) -> FastAPI:
+    """
+    Build the app; pass ``registry`` to serve models that are already loaded
+    (the pre-fork launcher does this in each worker).
+    """
     app = FastAPI(title="Civic Issue Priority API", version="1.0.0")
+    app.add_middleware(ArrivalTimeMiddleware)
+
+    config = ServingConfig()
+    model_name = config.model_name
+    metrics = ServingMetrics()
+    profiler = SamplingProfiler.from_config(config)
+    if profiler is not None:
+        app.add_middleware(ProfileIdMiddleware)
+    if registry is None:
+        cache: PredictionCache | None = None
+        if config.cache_max_entries > 0:
+            cache = PredictionCache(config.cache_max_entries, config.cache_ttl_s)
+        text_cache: FeatureRowCache | None = None
+        if config.tfidf_cache_mb > 0:
+            text_cache = FeatureRowCache(int(config.tfidf_cache_mb * 1024 * 1024))
+        thread_budget = ThreadBudget.from_config(config)
+        thread_budget.pin()
+        # Pools loaded so far; the registry applies the limits again after each
+        # model load (ThreadBudget.apply), as most native libraries come with the models
+        thread_budget.limit_native_pools()
+        registry = ModelRegistry(config.artifacts_dir, default_model=model_name, cache=cache,
+                                 text_cache=text_cache, thread_budget=thread_budget,
+                                 cascade_models=config.cascade_models,
+                                 cascade_threshold=config.cascade_threshold)
+    else:
+        cache = registry.cache
+        text_cache = registry.text_cache
+        thread_budget = registry.thread_budget
+    prior = None
+    if PRIOR_MODEL_NAME in config.degraded_fallbacks:
+        prior = PriorPipeline.from_artifacts(config.artifacts_dir)
+    available = registry.available()
+    fallbacks = [m for m in config.degraded_fallbacks
+                 if (m == PRIOR_MODEL_NAME and prior is not None) or m in available]
+    # Fallback models are loaded up front: they must be cheap exactly when the service is not
+    preload = config.preload_models + [m for m in fallbacks
+                                       if m != PRIOR_MODEL_NAME and m not in config.preload_models]
+    readiness = Readiness(registry, preload, parallel=config.parallel_model_loading)
+    drift: DriftMonitor | None = None
+    if config.drift_monitoring and config.drift_window_rows > 0:
+        drift = DriftMonitor.from_artifacts(config.artifacts_dir, config.drift_window_rows, config.drift_top_k)
+    shadow: ShadowScorer | None = None
+    if config.shadow_model:
+        if config.shadow_model in available:
+            shadow = ShadowScorer(registry.get, config.shadow_model, config.shadow_sample_rate,
+                                  config.shadow_queue_depth, config.shadow_max_rows)
+        else:
+            logging.warning(f"Shadow model {config.shadow_model!r} is not available; shadow scoring disabled")
+
+    # Inference never runs on Starlette's shared threadpool, so /health stays responsive
+    executor = BoundedExecutor(
+        max_workers=config.inference_workers,
+        max_queue=config.inference_queue_depth,
+        retry_after=config.inference_retry_after_s,
+    )
+    admission = AdmissionController(executor)
+    # Fallback models run on their own small pool so they never queue behind the work they replace
+    fallback_admission = AdmissionController(
+        BoundedExecutor(max_workers=1, max_queue=config.inference_queue_depth,
+                        retry_after=config.inference_retry_after_s, name="fallback"),
+        admission.service_times,
+    )
 
-    model_name = os.getenv("PRIORITY_MODEL", "random_forest")
-    pipeline: PredictPipeline | None = None
+    def _batch_predict_fn(name: str):
+        def _score(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            timings: Dict[str, float] = {}
+            with record_stages(timings), observe_predictions(drift):
+                batch = IssueBatch.from_records(records)
+                if profiler is None:
+                    results = registry.get(name).predict_many(batch)
+                else:
+                    with profiler.capture("/predict", name, len(records), timings, profiler.trigger()):
+                        results = registry.get(name).predict_many(batch)
+            metrics.observe_stages("/predict", name, timings)
+            metrics.observe_batch("/predict", name, len(records))
+            return results
+
+        def _predict(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            # A flushed batch is one call on the inference executor: its limits
+            # apply, and its service time feeds deadline admission
+            return admission.submit(name, len(records), None, lambda: _score(records)).result()
+        return _predict
+
+    batchers: BatcherPool | None = None
+    if config.batching_enabled:
+        batchers = BatcherPool(
+            _batch_predict_fn,
+            max_batch_size=config.batch_max_size,
+            max_wait_ms=config.batch_max_wait_ms,
+            max_queue_depth=config.batch_queue_depth,
+        )
 
     @app.on_event("startup")
     def _load_pipeline() -> None:
-        nonlocal pipeline
-        pipeline = PredictPipeline(model_name=model_name)
+        # Load and warm up in the background; /ready flips once that is done
+        readiness.start()
+        registry.start_watcher(config.model_reload_interval_s)
+
+    @app.on_event("shutdown")
+    def _stop_workers() -> None:
+        registry.stop()
+        if batchers is not None:
+            batchers.close()
+        executor.shutdown()
+        fallback_admission.executor.shutdown()
+        if shadow is not None:
+            shadow.close()
 
     @app.get("/health")
-    def health() -> Dict[str, Any]:
-        return {"status": "ok", "model": model_name}
+    async def health() -> Dict[str, Any]:
+        status: Dict[str, Any] = {"status": "ok", "model": model_name}
+        status["inference"] = executor.stats()
+        status["admission"] = admission.stats()
+        if cache is not None:
+            status["cache"] = cache.stats()
+        if text_cache is not None:
+            status["tfidf_cache"] = text_cache.stats()
+        if thread_budget is not None:
+            status["threads"] = thread_budget.describe()
+        if batchers is not None:
+            status["batching"] = batchers.stats()
+        if profiler is not None:
+            status["profiling"] = profiler.stats()
+        return status
+
+    @app.get("/ready")
+    async def ready() -> JSONResponse:
+        return JSONResponse(readiness.status(), status_code=200 if readiness.ready else 503)
 
-    @app.post("/predict", response_model=PredictionOut)
-    def predict(issue: IssueIn) -> PredictionOut:
+    @app.get("/metrics")
+    async def prometheus_metrics() -> Response:
+        extra = stats_gauges("civic_inference_executor", executor.stats())
+        extra += stats_gauges("civic_admission", admission.stats())
+        if cache is not None:
+            extra += stats_gauges("civic_prediction_cache", cache.stats())
+        if text_cache is not None:
+            extra += stats_gauges("civic_tfidf_cache", text_cache.stats())
+        if drift is not None:
+            # The first call per model scores the holdout split for its baseline
+            extra += await asyncio.to_thread(drift.metric_lines)
+        if shadow is not None:
+            shadow_stats = shadow.stats()
+            extra += stats_gauges("civic_shadow", shadow_stats)
+            extra += stats_gauges("civic_shadow_candidate_latency_ms", shadow_stats.get("candidate_latency_ms", {}))
+            for live, comparison in shadow_stats["by_live_model"].items():
+                extra += stats_gauges("civic_shadow", comparison, {"model": live})
+        return Response(metrics.render(extra), media_type=METRICS_CONTENT_TYPE)
+
+    @app.get("/admin/models")
+    async def list_models() -> Dict[str, Any]:
+        return registry.describe()
+
+    @app.post("/admin/models/{name}/reload", status_code=202)
+    async def reload_model(name: str) -> Dict[str, Any]:
         try:
-            assert pipeline is not None
-            df = pd.DataFrame([{ 
-                "short_description": issue.short_description,
-                "category": issue.category,
-                "location": issue.location,
-            }])
-            result = pipeline.predict(df)
-            return PredictionOut(**result)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-
-    @app.post("/predict/batch", response_model=List[PredictionOut])
-    def predict_batch(issues: List[IssueIn]) -> List[PredictionOut]:
+            started = registry.reload(name)
+        except UnknownModel:
+            raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+        return {"model": name, "reload_started": started}
+
+    @app.get("/admin/shadow")
+    async def shadow_stats() -> Dict[str, Any]:
+        if shadow is None:
+            return {"enabled": False}
+        return {"enabled": True, **shadow.stats()}
+
+    @app.get("/admin/drift")
+    async def drift_report() -> Dict[str, Any]:
+        if drift is None:
+            return {"enabled": False}
+        return {"enabled": True, **await asyncio.to_thread(drift.report)}
+
+    def _shadow(name: str, batch: IssueBatch, result: Optional[Dict[str, Any]] = None) -> None:
+        # Runs after the answer is computed and never blocks: a full queue drops the sample
+        if shadow is None:
+            return
+        if result is None:
+            shadow.offer(name, batch)
+            return
+        probabilities = result["class_probabilities"]
+        shadow.offer(name, batch, np.array([list(probabilities.values())]), list(probabilities))
+
+    def _records(issues: List[IssueIn]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "short_description": it.short_description,
+                "category": it.category,
+                "location": it.location,
+            }
+            for it in issues
+        ]
+
+    def _resolve(model: Optional[str]) -> str:
+        try:
+            return registry.resolve(model)
+        except UnknownModel:
+            raise HTTPException(status_code=404, detail=f"Unknown model: {model}")
+
+    async def _issue_batch(request: Request) -> IssueBatch:
+        body = await request.body()
         try:
-            assert pipeline is not None
-            data = [
-                {
-                    "short_description": it.short_description,
-                    "category": it.category,
-                    "location": it.location,
-                }
-                for it in issues
-            ]
-            df = pd.DataFrame(data)
-            # Use existing batch logic by calling per-row predict for consistent output
-            outputs: List[PredictionOut] = []
-            for i in range(len(df)):
-                res = pipeline.predict(df.iloc[[i]])
-                outputs.append(PredictionOut(**res))
-            return outputs
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-
-    @app.post("/rank", response_model=List[Dict[str, Any]])
-    def rank_by_high_probability(issues: List[IssueIn]) -> List[Dict[str, Any]]:
+            return decode_issues(body, request.headers.get("content-type"))
+        except UnsupportedMediaType as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        except PayloadError as e:
+            raise RequestValidationError([{"type": "value_error", "loc": ("body", *e.loc), "msg": str(e)}])
+
+    def _response_type(request: Request, response_format: Optional[str]) -> str:
         try:
-            assert pipeline is not None
-            data = [
-                {
-                    "short_description": it.short_description,
-                    "category": it.category,
-                    "location": it.location,
-                }
-                for it in issues
-            ]
-            df = pd.DataFrame(data)
-            results: List[Dict[str, Any]] = []
-            for i in range(len(df)):
-                res = pipeline.predict(df.iloc[[i]])
-                results.append({
-                    "input": data[i],
-                    **res,
-                })
-            ranked = sorted(
-                results,
-                key=lambda r: r["class_probabilities"].get("High", 0.0),
-                reverse=True,
-            )
-            return ranked
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+            return negotiate(request.headers.get("accept"), response_format)
+        except NotAcceptable as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
 
-    return app
+    def _deadline(request: Request) -> Optional[Deadline]:
+        try:
+            return Deadline.from_header(request.headers.get(DEADLINE_HEADER), config.default_deadline_ms,
+                                        getattr(request.state, "received_at", None))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def _fallback(endpoint: str, name: str, batch_size: int, deadline: Deadline, reason: str,
+                        run: Callable[[Any, Optional[str]], Any]) -> Tuple[Any, str]:
+        """
+        Answer with the first fallback scorer that can still meet ``deadline``;
+        the prior always can.
+        """
+        for fallback in fallbacks:
+            if fallback == name:
+                continue
+            if fallback == PRIOR_MODEL_NAME:
+                result = run(prior, reason)
+            else:
+                if not fallback_admission.fits(deadline, fallback, batch_size):
+                    continue
+                try:
+                    result = await fallback_admission.run(
+                        fallback, batch_size, deadline, lambda: run(registry.get(fallback), reason))
+                except (ExecutorSaturated, DeadlineExceeded):
+                    continue
+            admission.record_degraded(reason)
+            metrics.observe_degraded(endpoint, name, reason, fallback)
+            return result, reason
+        raise LookupError("No fallback scorer available")
+
+    async def _infer(request: Request, endpoint: str, name: str, batch_size: int,
+                     fn: Callable[[Any, Optional[str]], Any]) -> Tuple[Any, Optional[str]]:
+        """
+        Run ``fn(pipeline, degraded)`` on the inference executor, recording stage
+        timings and request metrics; returns ``(result, degraded)``.
+
+        With a deadline, a request whose predicted wait plus service time exceeds
+        its budget (or that finds the queue full) is answered by a fallback
+        scorer and ``degraded`` names the reason; queued work whose deadline
+        passed before a worker reached it gets a 504.
+        """
+        timings = _parse_timings(request)
+        deadline = _deadline(request)
+        trigger = profiler.trigger(request.headers.get(PROFILE_HEADER)) if profiler is not None else None
+
+        def _run(pipeline, degraded: Optional[str]) -> Any:
+            with record_stages(timings), observe_predictions(drift):
+                if profiler is None:
+                    return fn(pipeline, degraded)
+                with profiler.capture(endpoint, pipeline.model_name, batch_size, timings, trigger) as capture:
+                    result = fn(pipeline, degraded)
+                if capture is not None and capture.profile_id is not None:
+                    request.state.profile_id = capture.profile_id
+                return result
+
+        with metrics.track(endpoint, name):
+            try:
+                metrics.observe_batch(endpoint, name, batch_size)
+                if deadline is not None and fallbacks and not admission.fits(deadline, name, batch_size):
+                    try:
+                        return await _fallback(endpoint, name, batch_size, deadline, DEGRADED_DEADLINE, _run)
+                    except LookupError:
+                        pass
+                try:
+                    result = await admission.run(name, batch_size, deadline, lambda: _run(registry.get(name), None))
+                    return result, None
+                except ExecutorSaturated as e:
+                    if deadline is not None and fallbacks:
+                        try:
+                            return await _fallback(endpoint, name, batch_size, deadline, DEGRADED_OVERLOAD, _run)
+                        except LookupError:
+                            pass
+                    raise _overloaded(e.retry_after)
+            except HTTPException:
+                raise
+            except DeadlineExceeded as e:
+                metrics.observe_deadline_dropped(endpoint, name)
+                raise HTTPException(status_code=504, detail=str(e))
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            finally:
+                metrics.observe_stages(endpoint, name, timings)
+
+    async def _infer_batched(request: Request, name: str, record: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
+        """
+        Score one record through the model's micro-batcher; returns
+        ``(result, degraded)``. Admission and fallbacks work as in ``_infer``,
+        and the flushed batch runs on the inference executor. A request whose
+        deadline passes while it waits for its batch is withdrawn from it and
+        gets a 504.
+        """
+        deadline = _deadline(request)
+
+        def _run(pipeline, degraded: Optional[str]) -> Any:
+            with observe_predictions(drift):
+                return pipeline.predict(record)
+
+        with metrics.track("/predict", name):
+            try:
+                if deadline is not None and fallbacks and not admission.fits(deadline, name, 1):
+                    try:
+                        return await _fallback("/predict", name, 1, deadline, DEGRADED_DEADLINE, _run)
+                    except LookupError:
+                        pass
+                try:
+                    future = asyncio.wrap_future(batchers.get(name).submit(record))
+                    if deadline is None:
+                        return await future, None
+                    return await asyncio.wait_for(future, max(0.0, deadline.remaining())), None
+                except (queue.Full, ExecutorSaturated) as e:
+                    if deadline is not None and fallbacks:
+                        try:
+                            return await _fallback("/predict", name, 1, deadline, DEGRADED_OVERLOAD, _run)
+                        except LookupError:
+                            pass
+                    raise _overloaded(getattr(e, "retry_after", config.inference_retry_after_s))
+            except HTTPException:
+                raise
+            except asyncio.TimeoutError:
+                metrics.observe_deadline_dropped("/predict", name)
+                raise HTTPException(status_code=504,
+                                    detail=f"Deadline passed after {deadline.budget_s * 1000:.0f}ms in the batch queue")
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
 
+    @app.post("/predict", response_model=PredictionOut, response_model_exclude_none=True)
+    async def predict(request: Request, response: Response, issue: IssueIn,
+                      model: Optional[str] = None) -> PredictionOut:
+        name = _resolve(model)
+        record = _records([issue])[0]
+        # A request asking for a profile is scored on its own so the profile is its own
+        if batchers is None or (profiler is not None and profiler.requested(request.headers.get(PROFILE_HEADER))):
+            result, degraded = await _infer(request, "/predict", name, 1,
+                                            lambda p, d: p.predict(record))
+        else:
+            result, degraded = await _infer_batched(request, name, record)
+        if degraded is not None:
+            response.headers[DEGRADED_HEADER] = degraded
+        else:
+            _shadow(name, IssueBatch.from_records([record]), result)
+        return PredictionOut(**result, degraded=degraded)
+
+    @app.post("/predict/batch", response_model=List[PredictionOut], openapi_extra=_BATCH_BODY)
+    async def predict_batch(request: Request, model: Optional[str] = None,
+                            response_format: Optional[str] = Query(None, alias="format")) -> Response:
+        """
+        Score a batch sent as JSON rows, JSON columns, MessagePack or Arrow.
+        ``?format=columnar`` or a columnar ``Accept`` type returns one array per field.
+        """
+        name = _resolve(model)
+        media_type = _response_type(request, response_format)
+        batch = await _issue_batch(request)
+        body, degraded = await _infer(request, request.url.path, name, len(batch),
+                                      lambda p, d: score_batch(p, batch, media_type, d))
+        if degraded is None:
+            _shadow(name, batch)
+        return Response(body, media_type=media_type, headers=_degraded_headers(degraded))
+
+    @app.post("/predict/ensemble", response_model=List[PredictionOut], openapi_extra=_BATCH_BODY)
+    async def predict_ensemble(request: Request,
+                               response_format: Optional[str] = Query(None, alias="format")) -> Response:
+        """
+        Accuracy-weighted average of all saved models, scored as one batch.
+        """
+        return await predict_batch(request, model="ensemble", response_format=response_format)
+
+    @app.post("/rank", response_model=List[Dict[str, Any]], openapi_extra=_BATCH_BODY)
+    async def rank_by_high_probability(
+        request: Request,
+        k: Optional[int] = Query(None, ge=1),
+        min_high_probability: Optional[float] = Query(None, ge=0.0, le=1.0),
+        cursor: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> Response:
+        name = _resolve(model)
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        batch = await _issue_batch(request)
+
+        def _rank(pipeline, degraded: Optional[str]) -> Tuple[bytes, Optional[str]]:
+            ranked, next_cursor = rank_issues(pipeline, batch, k, min_high_probability, cursor)
+            if degraded is not None:
+                for row in ranked:
+                    row["degraded"] = degraded
+            with stage_timer("serialize"):
+                return dumps_json(ranked), next_cursor
+
+        (body, next_cursor), degraded = await _infer(request, "/rank", name, len(batch), _rank)
+        if degraded is None:
+            _shadow(name, batch)
+        headers = _degraded_headers(degraded) or {}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = next_cursor
+        return Response(body, media_type=JSON, headers=headers)
+
+    @app.post("/predict/stream")
+    async def predict_stream(request: Request, model: Optional[str] = None) -> StreamingResponse:
+        """
+        Score newline-delimited IssueIn objects in fixed-size chunks and write
+        one NDJSON result per input line, in order, as each chunk finishes.
+        Lines that fail validation, are longer than ``STREAM_MAX_LINE_BYTES``
+        or belong to a chunk that failed to score produce
+        ``{"line": n, "error": ...}``; the stream carries on with the next line.
+        """
+        name = _resolve(model)
+        chunk_size = config.stream_chunk_size
+        max_line = config.stream_max_line_bytes
+
+        def _score_chunk(chunk: List[tuple]) -> bytes:
+            timings: Dict[str, float] = {}
+            with record_stages(timings), observe_predictions(drift):
+                valid = [item for _, item in chunk if isinstance(item, dict)]
+                scored = iter(registry.get(name).predict_many(IssueBatch.from_records(valid)))
+                lines = []
+                for line_no, item in chunk:
+                    out = next(scored) if isinstance(item, dict) else {"line": line_no, "error": item}
+                    lines.append(json.dumps(out))
+            metrics.observe_stages("/predict/stream", name, timings)
+            metrics.observe_batch("/predict/stream", name, len(valid))
+            return ("\n".join(lines) + "\n").encode("utf-8")
+
+        async def _run_chunk(chunk: List[tuple]) -> bytes:
+            # A long-lived stream waits for capacity instead of failing half-way through
+            while True:
+                try:
+                    return await executor.run(_score_chunk, chunk)
+                except ExecutorSaturated as e:
+                    await asyncio.sleep(min(e.retry_after, 0.05))
+                except Exception as e:
+                    logging.warning(f"/predict/stream chunk of {len(chunk)} lines failed with {name}: {e}")
+                    error = str(e)
+                    return "".join(
+                        json.dumps({"line": line_no, "error": item if not isinstance(item, dict) else error}) + "\n"
+                        for line_no, item in chunk
+                    ).encode("utf-8")
+
+        def _parse(line_no: int, raw: bytes) -> tuple:
+            try:
+                issue = IssueIn.model_validate_json(raw)
+            except ValidationError as e:
+                return line_no, e.errors(include_url=False, include_context=False)[0]["msg"]
+            return line_no, _records([issue])[0]
+
+        async def _results():
+            with metrics.track("/predict/stream", name):
+                # The unfinished line, in pieces; None once it has run past max_line
+                pending: Optional[List[bytes]] = []
+                pending_bytes = 0
+                line_no = 0
+                chunk: List[tuple] = []
+
+                def _finish(tail: bytes) -> None:
+                    nonlocal pending, pending_bytes, line_no
+                    line_no += 1
+                    if pending is None or pending_bytes + len(tail) > max_line:
+                        chunk.append((line_no, f"Line exceeds {max_line} bytes"))
+                    else:
+                        raw = b"".join(pending) + tail
+                        if raw.strip():
+                            chunk.append(_parse(line_no, raw))
+                    pending, pending_bytes = [], 0
+
+                async for part in request.stream():
+                    start = 0
+                    while (end := part.find(b"\n", start)) != -1:
+                        _finish(part[start:end])
+                        start = end + 1
+                        if len(chunk) >= chunk_size:
+                            yield await _run_chunk(chunk)
+                            chunk = []
+                    if pending is not None and start < len(part):
+                        pending.append(part[start:])
+                        pending_bytes += len(part) - start
+                        if pending_bytes > max_line:
+                            # Drop what was buffered; the rest of the line is skipped as it arrives
+                            pending, pending_bytes = None, 0
+                if pending is None or pending_bytes:
+                    _finish(b"")
+                if chunk:
+                    yield await _run_chunk(chunk)
+
+        return NDJSONStreamingResponse(_results())
+
+    return app
 
-app = create_app()
 
 
+def __getattr__(name: str):
+    # ``app`` is built on first access (``uvicorn backend.api:app``), so importing
+    # create_app, as the pre-fork launcher does before forking, builds no app
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,7 @@
 import os
+import queue
 import sys
+import time
 from typing import List, Dict, Any
 
 # Fix: avoid shadowing stdlib 'logging' by local backend/logging package
@@ -15,102 +17,282 @@ PROJECT_ROOT = os.path.abspath(os.path.join(_SCRIPT_DIR, '..'))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from flask import Flask, request, jsonify
-import pandas as pd
+from flask import Flask, Response, g, request, jsonify
 
-from src.pipeline.predict_pipeline import PredictPipeline  # type: ignore
+from src.pipeline.predict_pipeline import IssueBatch, observe_predictions, record_stages, stage_timer  # type: ignore
+from src.serving.batching import BatcherPool  # type: ignore
+from src.serving.cache import FeatureRowCache, PredictionCache  # type: ignore
+from src.serving.config import ServingConfig  # type: ignore
+from src.serving.drift import DriftMonitor  # type: ignore
+from src.serving.threads import ThreadBudget  # type: ignore
+from src.serving.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ServingMetrics, stats_gauges  # type: ignore
+from src.serving.payloads import (  # type: ignore
+    JSON,
+    PayloadError,
+    decode_issues,
+    dumps_json,
+    negotiate,
+    score_batch,
+)
+from src.serving.ranking import InvalidCursor, rank_by_high_probability as rank_issues  # type: ignore
+from src.serving.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, SamplingProfiler  # type: ignore
+from src.serving.registry import ModelRegistry, UnknownModel  # type: ignore
+from src.serving.startup import Readiness  # type: ignore
 
 
-def create_app() -> Flask:
+def create_app(registry: ModelRegistry | None = None) -> Flask:
+    """
+    Build the app; pass ``registry`` to serve models that are already loaded
+    (the pre-fork launcher does this in each worker).
+    """
     app = Flask(__name__)
 
-    model_name = os.getenv("PRIORITY_MODEL", "random_forest")
-    # Initialize once at app creation (Flask 3 removed before_first_request)
-    pipeline: PredictPipeline | None = PredictPipeline(model_name=model_name)
+    config = ServingConfig()
+    model_name = config.model_name
+    metrics = ServingMetrics()
+    profiler = SamplingProfiler.from_config(config)
+    if registry is None:
+        cache: PredictionCache | None = None
+        if config.cache_max_entries > 0:
+            cache = PredictionCache(config.cache_max_entries, config.cache_ttl_s)
+        text_cache: FeatureRowCache | None = None
+        if config.tfidf_cache_mb > 0:
+            text_cache = FeatureRowCache(int(config.tfidf_cache_mb * 1024 * 1024))
+        thread_budget = ThreadBudget.from_config(config)
+        thread_budget.pin()
+        # Pools loaded so far; the registry applies the limits again after each
+        # model load (ThreadBudget.apply), as most native libraries come with the models
+        thread_budget.limit_native_pools()
+        registry = ModelRegistry(config.artifacts_dir, default_model=model_name, cache=cache,
+                                 text_cache=text_cache, thread_budget=thread_budget,
+                                 cascade_models=config.cascade_models,
+                                 cascade_threshold=config.cascade_threshold)
+    else:
+        cache = registry.cache
+        text_cache = registry.text_cache
+        thread_budget = registry.thread_budget
+    drift: DriftMonitor | None = None
+    if config.drift_monitoring and config.drift_window_rows > 0:
+        drift = DriftMonitor.from_artifacts(config.artifacts_dir, config.drift_window_rows, config.drift_top_k)
+    # Load and warm up in the background from app creation (Flask 3 removed
+    # before_first_request); /ready flips once that is done
+    readiness = Readiness(registry, config.preload_models, parallel=config.parallel_model_loading)
+    readiness.start()
+    registry.start_watcher(config.model_reload_interval_s)
+
+    def _batch_predict_fn(name: str):
+        def _predict(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            timings: Dict[str, float] = {}
+            with record_stages(timings), observe_predictions(drift):
+                batch = IssueBatch.from_records(records)
+                if profiler is None:
+                    results = registry.get(name).predict_many(batch)
+                else:
+                    with profiler.capture("/predict", name, len(records), timings, profiler.trigger()):
+                        results = registry.get(name).predict_many(batch)
+            metrics.observe_stages("/predict", name, timings)
+            metrics.observe_batch("/predict", name, len(records))
+            return results
+        return _predict
+
+    batchers: BatcherPool | None = None
+    if config.batching_enabled:
+        batchers = BatcherPool(
+            _batch_predict_fn,
+            max_batch_size=config.batch_max_size,
+            max_wait_ms=config.batch_max_wait_ms,
+            max_queue_depth=config.batch_queue_depth,
+        )
 
     @app.get("/health")
     def health():
-        return jsonify({"status": "ok", "model": model_name})
+        status: Dict[str, Any] = {"status": "ok", "model": model_name}
+        if cache is not None:
+            status["cache"] = cache.stats()
+        if text_cache is not None:
+            status["tfidf_cache"] = text_cache.stats()
+        if thread_budget is not None:
+            status["threads"] = thread_budget.describe()
+        if batchers is not None:
+            status["batching"] = batchers.stats()
+        if profiler is not None:
+            status["profiling"] = profiler.stats()
+        return jsonify(status)
+
+    @app.get("/ready")
+    def ready():
+        return jsonify(readiness.status()), 200 if readiness.ready else 503
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        extra = stats_gauges("civic_prediction_cache", cache.stats()) if cache is not None else []
+        if text_cache is not None:
+            extra += stats_gauges("civic_tfidf_cache", text_cache.stats())
+        if drift is not None:
+            extra += drift.metric_lines()
+        return Response(metrics.render(extra), content_type=METRICS_CONTENT_TYPE)
+
+    _SCORING_ENDPOINTS = {"/predict", "/predict/batch", "/predict/ensemble", "/rank"}
+
+    @app.before_request
+    def _start_request_metrics():
+        if request.path in _SCORING_ENDPOINTS:
+            g.metrics_started_at = metrics.request_started(request.path)
+            g.stage_timings = {}
+
+    @app.after_request
+    def _finish_request_metrics(response):
+        started_at = g.pop("metrics_started_at", None)
+        if started_at is not None:
+            # Unresolved names stay out of the label set so bad input can't grow it
+            name = g.pop("model_name", "unknown")
+            timings = g.pop("stage_timings", {})
+            metrics.request_finished(request.path, name, response.status_code, started_at)
+            metrics.observe_stages(request.path, name, timings)
+        profile_id = g.pop("profile_id", None)
+        if profile_id is not None:
+            response.headers[PROFILE_ID_HEADER] = profile_id
+        return response
+
+    def _parsed_json(default):
+        # Body parsing counts as the "parse" stage of the request breakdown
+        start = time.perf_counter()
+        req = request.get_json(force=True) or default
+        g.stage_timings["parse"] = time.perf_counter() - start
+        return req
+
+    def _parsed_issues() -> IssueBatch:
+        # Any format src.serving.payloads reads; decoding is the "parse" stage
+        start = time.perf_counter()
+        batch = decode_issues(request.get_data(), request.content_type)
+        g.stage_timings["parse"] = time.perf_counter() - start
+        # The Flask app has always refused empty batches; FastAPI answers them with []
+        if not len(batch):
+            raise PayloadError("Provide a non-empty list of issues")
+        return batch
+
+    def _resolve(model: str | None) -> str:
+        g.model_name = registry.resolve(model)
+        return g.model_name
+
+    def _score(name: str, batch_size: int, fn):
+        metrics.observe_batch(request.path, name, batch_size)
+        with record_stages(g.stage_timings), observe_predictions(drift):
+            if profiler is None:
+                return fn()
+            trigger = profiler.trigger(request.headers.get(PROFILE_HEADER))
+            with profiler.capture(request.path, name, batch_size, g.stage_timings, trigger) as capture:
+                result = fn()
+            if capture is not None and capture.profile_id is not None:
+                g.profile_id = capture.profile_id
+            return result
+
+    @app.get("/admin/models")
+    def list_models():
+        return jsonify(registry.describe())
+
+    @app.get("/admin/drift")
+    def drift_report():
+        if drift is None:
+            return jsonify({"enabled": False})
+        return jsonify({"enabled": True, **drift.report()})
+
+    @app.post("/admin/models/<name>/reload")
+    def reload_model(name: str):
+        try:
+            started = registry.reload(name)
+        except UnknownModel:
+            return jsonify({"error": f"Unknown model: {name}"}), 404
+        return jsonify({"model": name, "reload_started": started}), 202
+
+    @app.errorhandler(UnknownModel)
+    def unknown_model(e: UnknownModel):
+        return jsonify({"error": f"Unknown model: {e.args[0]}"}), 404
+
+    @app.errorhandler(PayloadError)
+    def bad_payload(e: PayloadError):
+        return jsonify({"error": str(e)}), e.status_code
 
     @app.post("/predict")
     def predict():
+        name = _resolve(request.args.get("model"))
         try:
-            assert pipeline is not None
-            req = request.get_json(force=True) or {}
+            req = _parsed_json({})
             short_description = req.get("short_description")
             category = req.get("category")
             location = req.get("location")
             if not all([short_description, category, location]):
                 return jsonify({"error": "short_description, category, location are required"}), 400
 
-            df = pd.DataFrame([{
+            record = {
                 "short_description": short_description,
                 "category": category,
                 "location": location,
-            }])
-            result = pipeline.predict(df)
+            }
+            # A request asking for a profile is scored on its own so the profile is its own
+            if batchers is not None and not (profiler is not None
+                                             and profiler.requested(request.headers.get(PROFILE_HEADER))):
+                result = batchers.get(name).predict(record)
+            else:
+                result = _score(name, 1, lambda: registry.get(name).predict(record))
             return jsonify(result)
+        except queue.Full:
+            return jsonify({"error": "Prediction queue is full, retry later"}), 503
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
     @app.post("/predict/batch")
-    def predict_batch():
+    def predict_batch(model: str | None = None):
+        # JSON rows or columns, MessagePack or Arrow in; rows, or columns on request, out
+        name = _resolve(model or request.args.get("model"))
+        media_type = negotiate(request.headers.get("Accept"), request.args.get("format"))
+        batch = _parsed_issues()
         try:
-            assert pipeline is not None
-            req = request.get_json(force=True) or []
-            if not isinstance(req, list) or len(req) == 0:
-                return jsonify({"error": "Provide a non-empty list of issues"}), 400
-            data = []
-            for it in req:
-                sd = it.get("short_description")
-                cat = it.get("category")
-                loc = it.get("location")
-                if not all([sd, cat, loc]):
-                    return jsonify({"error": "Each item needs short_description, category, location"}), 400
-                data.append({"short_description": sd, "category": cat, "location": loc})
-
-            # Call per-row for consistent output schema
-            results: List[Dict[str, Any]] = []
-            for item in data:
-                res = pipeline.predict(pd.DataFrame([item]))
-                results.append(res)
-            return jsonify(results)
+            body = _score(name, len(batch), lambda: score_batch(registry.get(name), batch, media_type))
+            return Response(body, content_type=media_type)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+    @app.post("/predict/ensemble")
+    def predict_ensemble():
+        # Accuracy-weighted average of all saved models, scored as one batch
+        return predict_batch(model="ensemble")
+
     @app.post("/rank")
     def rank_by_high_probability():
+        name = _resolve(request.args.get("model"))
+        batch = _parsed_issues()
         try:
-            assert pipeline is not None
-            req = request.get_json(force=True) or []
-            if not isinstance(req, list) or len(req) == 0:
-                return jsonify({"error": "Provide a non-empty list of issues"}), 400
-
-            data: List[Dict[str, Any]] = []
-            for it in req:
-                sd = it.get("short_description")
-                cat = it.get("category")
-                loc = it.get("location")
-                if not all([sd, cat, loc]):
-                    return jsonify({"error": "Each item needs short_description, category, location"}), 400
-                data.append({"short_description": sd, "category": cat, "location": loc})
-
-            results: List[Dict[str, Any]] = []
-            for item in data:
-                res = pipeline.predict(pd.DataFrame([item]))
-                results.append({"input": item, **res})
-
-            ranked = sorted(results, key=lambda r: r["class_probabilities"].get("High", 0.0), reverse=True)
-            return jsonify(ranked)
+            k = request.args.get("k", type=int)
+            min_high_probability = request.args.get("min_high_probability", type=float)
+            if k is not None and k < 1:
+                return jsonify({"error": "k must be >= 1"}), 400
+            if min_high_probability is not None and not 0.0 <= min_high_probability <= 1.0:
+                return jsonify({"error": "min_high_probability must be between 0 and 1"}), 400
+            ranked, next_cursor = _score(name, len(batch), lambda: rank_issues(
+                registry.get(name), batch, k, min_high_probability, request.args.get("cursor")
+            ))
+            with record_stages(g.stage_timings), stage_timer("serialize"):
+                response = Response(dumps_json(ranked), content_type=JSON)
+            if next_cursor is not None:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return response
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
     return app
 
 
-app = create_app()
-
-if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+def __getattr__(name: str):
+    # ``app`` is built on first access, so importing create_app (as the
+    # pre-fork launcher does before forking) loads no models of its own
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
+if __name__ == "__main__":
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,360 @@
+"""
+Compiled evaluators for the saved classifiers.
+
+``CompiledForest`` flattens every tree of a fitted random forest into one set
+of contiguous node arrays and evaluates all trees for a whole batch with a
+handful of NumPy operations per tree level, instead of sklearn's per-estimator
+dispatch. ``CompiledLinear`` is the matching path for logistic regression:
+one sparse dot product and the same softmax, without input validation.
+XGBoost models stay on the sklearn wrapper: calling the booster's
+``inplace_predict`` directly measured only 1.0-1.3x faster, which did not pay
+for a second code path.
+
+Both reproduce sklearn's arithmetic (float32 inputs compared against float64
+thresholds, per-tree normalized leaf values summed in estimator order), and
+``verify`` checks them against the original estimator before they are used.
+Forest probabilities can still differ from sklearn's in the last bit: sklearn
+normalizes leaf values per batch, and NumPy's row sums depend on the batch
+shape, so sklearn itself is only reproducible to ``PARITY_ATOL``.
+
+Export flattened forests next to the pickles (memory-mapped, see
+src.utils.artifact_store) and run the parity check with:
+
+    python -m src.pipeline.compiled artifacts/models
+
+Compare every compiled evaluator with its sklearn estimator at a few batch sizes:
+
+    python -m src.pipeline.compiled artifacts/models --benchmark 1,32,1024
+"""
+import argparse
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from src.logger import logging
+from src.utils.artifact_store import COMPILED_SUFFIX, MMAP_SUFFIX, load_mmap_object, mmap_artifact_for, \
+    save_mmap_object
+
+PARITY_ATOL = 1e-12
+
+# Batches whose dense float32 copy stays under this many cells are densified;
+# larger ones look feature values up in the CSR arrays directly
+DENSE_LOOKUP_CELLS = 1 << 22
+
+
+class ParityError(AssertionError):
+    """
+    Raised when a compiled evaluator does not reproduce its sklearn estimator.
+    """
+
+
+class CompiledForest:
+    """
+    All trees of a forest as flat node arrays. Leaves point to themselves, and
+    ``apply`` advances every (tree, sample) pair still on an internal node one
+    level per step.
+    """
+    # sklearn's compiled tree walk wins on larger batches (measured crossover ~150 rows)
+    max_batch: Optional[int] = 128
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 leaf_proba: np.ndarray, roots: np.ndarray, max_depth: int, n_features: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = np.ravel(np.column_stack([left, right]))
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+
+    @classmethod
+    def from_estimator(cls, forest) -> "CompiledForest":
+        n_classes = int(forest.n_classes_)
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("Only single-output forests can be compiled")
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            own = np.arange(offset, offset + n, dtype=np.int32)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset).astype(np.int32))
+            # DecisionTreeClassifier.predict_proba: leaf values normalized per node
+            value = tree.value[:, 0, :n_classes].copy()
+            normalizer = value.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            value /= normalizer[:, None]
+            probas.append(value)
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, int(tree.max_depth))
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            leaf_proba=np.concatenate(probas),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            n_features=int(forest.n_features_in_),
+        )
+
+    def apply(self, X, dense: Optional[bool] = None) -> np.ndarray:
+        """
+        Leaf index (into the flat arrays) reached by every sample in every tree,
+        shape ``(n_trees, n_samples)``. ``dense`` forces the lookup strategy.
+        """
+        n_samples = X.shape[0]
+        nodes = np.repeat(self.roots[:, None], n_samples, axis=1).ravel()
+        if n_samples == 0:
+            return nodes.reshape(len(self.roots), 0)
+        if dense is None:
+            dense = not sparse.issparse(X) or n_samples * self.n_features <= DENSE_LOOKUP_CELLS
+        lookup = _dense_lookup(X) if dense else _csr_lookup(X, self.n_features)
+        # Row offsets into the flattened (n_samples, n_features) feature space
+        rows = np.tile(np.arange(n_samples, dtype=np.int64) * self.n_features, len(self.roots))
+        # (tree, sample) pairs still on an internal node
+        active = np.flatnonzero(self.left[nodes] != nodes)
+        while active.size:
+            current = nodes[active]
+            # float32 value vs float64 threshold, as in sklearn's Tree.apply
+            go_right = lookup(rows[active] + self.feature[current]) > self.threshold[current]
+            current = self.children[2 * current + go_right]
+            nodes[active] = current
+            active = active[self.left[current] != current]
+        return nodes.reshape(len(self.roots), n_samples)
+
+    def predict_proba(self, X, dense: Optional[bool] = None) -> np.ndarray:
+        # Summing over axis 0 adds the trees in estimator order, like
+        # RandomForestClassifier's sequential accumulation
+        proba = self.leaf_proba[self.apply(X, dense)].sum(axis=0)
+        proba /= len(self.roots)
+        return proba
+
+
+class CompiledLinear:
+    """
+    Logistic regression as ``X @ coef.T + intercept`` followed by sklearn's softmax
+    (multinomial) or normalized logistic (one-vs-rest).
+    """
+    max_batch: Optional[int] = None
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, multinomial: bool):
+        self.coef_t = np.ascontiguousarray(coef.T)
+        self.intercept = intercept
+        self.multinomial = multinomial
+
+    @classmethod
+    def from_estimator(cls, model) -> "CompiledLinear":
+        if len(model.classes_) < 3:
+            raise ValueError("Binary logistic regression is not compiled")
+        multi_class = getattr(model, "multi_class", "auto")
+        multinomial = multi_class == "multinomial" or (
+            multi_class in ("auto", "deprecated") and model.solver != "liblinear")
+        return cls(model.coef_, model.intercept_, multinomial)
+
+    def predict_proba(self, X) -> np.ndarray:
+        decision = X @ self.coef_t
+        if sparse.issparse(decision):
+            decision = decision.toarray()
+        decision = np.asarray(decision) + self.intercept
+        if self.multinomial:
+            # sklearn.utils.extmath.softmax
+            decision -= np.max(decision, axis=1).reshape((-1, 1))
+            np.exp(decision, decision)
+            decision /= np.sum(decision, axis=1).reshape((-1, 1))
+            return decision
+        np.negative(decision, decision)
+        np.exp(decision, decision)
+        decision += 1
+        np.reciprocal(decision, decision)
+        decision /= decision.sum(axis=1).reshape((decision.shape[0], -1))
+        return decision
+
+
+def _dense_lookup(X):
+    # Feature values as float32 (sklearn's DTYPE), promoted for the float64 thresholds
+    dense = X.toarray() if sparse.issparse(X) else np.asarray(X)
+    dense = dense.astype(np.float32).astype(np.float64).ravel()
+    return lambda keys: dense[keys]
+
+
+def _csr_lookup(X, n_features: int):
+    """
+    Look feature values up in the CSR arrays: every stored value gets the
+    sorted key ``row * n_features + column``; absent entries read as 0.
+    """
+    X = X.tocsr()
+    if not X.has_sorted_indices:
+        X = X.sorted_indices()
+    if X.nnz == 0:
+        return lambda wanted: np.zeros(wanted.shape)
+    rows = np.repeat(np.arange(X.shape[0], dtype=np.int64), np.diff(X.indptr))
+    keys = rows * n_features + X.indices
+    data = X.data.astype(np.float32).astype(np.float64)
+
+    def lookup(wanted):
+        pos = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        return np.where(keys[pos] == wanted, data[pos], 0.0)
+
+    return lookup
+
+
+def compile_classifier(classifier):
+    """
+    Compiled evaluator for ``classifier``, or None when its type is not supported.
+    """
+    kind = type(classifier).__name__
+    try:
+        if kind in ("RandomForestClassifier", "ExtraTreesClassifier"):
+            return CompiledForest.from_estimator(classifier)
+        if kind == "LogisticRegression":
+            return CompiledLinear.from_estimator(classifier)
+    except (AttributeError, ValueError) as e:
+        logging.info(f"{kind} not compiled: {e}")
+    return None
+
+
+def load_compiled(models_dir: str, model_name: str):
+    """
+    The exported ``<model_name>.compiled.mmap`` evaluator, if it is up to date
+    with the model's pickle; otherwise None.
+    """
+    pickle_path = os.path.join(models_dir, f"{model_name}.pkl")
+    path = mmap_artifact_for(pickle_path, suffix=COMPILED_SUFFIX + MMAP_SUFFIX)
+    return load_mmap_object(path) if path is not None else None
+
+
+def verify(compiled, classifier, n_samples: int = 256, density: float = 0.2, seed: int = 0,
+           atol: float = PARITY_ATOL) -> float:
+    """
+    Parity check against the original estimator on random sparse inputs (both
+    the dense and the CSR lookup); returns the largest absolute difference.
+    """
+    n_features = int(classifier.n_features_in_)
+    rng = np.random.default_rng(seed)
+    X = sparse.random(n_samples, n_features, density=density, format="csr", random_state=rng, dtype=np.float64)
+    # Exercise exact-threshold comparisons too
+    if isinstance(compiled, CompiledForest):
+        internal = compiled.threshold[np.isfinite(compiled.threshold)]
+        X.data[: len(X.data) // 4] = rng.choice(internal, size=len(X.data) // 4)
+    expected = classifier.predict_proba(X)
+    if isinstance(compiled, CompiledForest):
+        worst = max(float(np.max(np.abs(compiled.predict_proba(X, dense=dense) - expected)))
+                    for dense in (True, False))
+    else:
+        worst = float(np.max(np.abs(compiled.predict_proba(X) - expected)))
+    if not worst <= atol:
+        raise ParityError(f"{type(classifier).__name__} compiled evaluator differs by {worst:g}")
+    return worst
+
+
+def export_compiled(models_dir: str, names: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Flatten the forests in ``models_dir`` to ``<name>.compiled.mmap`` artifacts
+    after checking parity on random inputs and, if present, priority_test.csv.
+    """
+    from src.pipeline.featurizer import SparseFeaturizer
+    from src.pipeline.predict_pipeline import REQUIRED_COLUMNS
+    from src.utils.utils import load_object
+
+    test_path = os.path.join(os.path.dirname(os.path.abspath(models_dir)), "priority_test.csv")
+    names = names or sorted(f[:-len(".pkl")] for f in os.listdir(models_dir) if f.endswith(".pkl"))
+    report: Dict[str, Dict[str, float]] = {}
+    for name in names:
+        pickle_path = os.path.join(models_dir, f"{name}.pkl")
+        model = load_object(pickle_path)
+        compiled = compile_classifier(model.steps[-1][1])
+        if not isinstance(compiled, CompiledForest):
+            continue
+        worst = verify(compiled, model.steps[-1][1])
+        featurizer = SparseFeaturizer.from_pipeline(model, REQUIRED_COLUMNS)
+        if featurizer is not None and os.path.exists(test_path):
+            import pandas as pd
+
+            df = pd.read_csv(test_path)[REQUIRED_COLUMNS]
+            X = featurizer.transform(list(df.itertuples(index=False, name=None)))
+            worst = max(worst, float(np.max(np.abs(compiled.predict_proba(X) - model.predict_proba(df)))))
+            if not worst <= PARITY_ATOL:
+                raise ParityError(f"{name}: compiled forest differs by {worst:g} on {test_path}")
+        save_mmap_object(os.path.join(models_dir, f"{name}{COMPILED_SUFFIX}{MMAP_SUFFIX}"), compiled, source_path=pickle_path)
+        report[name] = {"nodes": float(len(compiled.feature)), "max_abs_diff": worst}
+    return report
+
+
+def benchmark(models_dir: str, names: Optional[List[str]] = None, batch_sizes: List[int] = (1, 32, 1024),
+              repeats: int = 50) -> List[Dict[str, float]]:
+    """
+    Median milliseconds per call of each model's sklearn classifier and its
+    compiled evaluator on featurized rows of priority_raw.csv.
+    """
+    import pandas as pd
+
+    from src.pipeline.featurizer import SparseFeaturizer
+    from src.pipeline.predict_pipeline import REQUIRED_COLUMNS
+    from src.utils.utils import load_object
+
+    data_path = os.path.join(os.path.dirname(os.path.abspath(models_dir)), "priority_raw.csv")
+    rows = list(pd.read_csv(data_path)[REQUIRED_COLUMNS].itertuples(index=False, name=None))
+    names = names or sorted(f[:-len(".pkl")] for f in os.listdir(models_dir) if f.endswith(".pkl"))
+
+    def _median_ms(fn) -> float:
+        fn()
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return float(np.median(times) * 1000)
+
+    report = []
+    for name in names:
+        model = load_object(os.path.join(models_dir, f"{name}.pkl"))
+        classifier = model.steps[-1][1]
+        compiled = compile_classifier(classifier)
+        featurizer = SparseFeaturizer.from_pipeline(model, REQUIRED_COLUMNS)
+        if compiled is None or featurizer is None:
+            continue
+        for batch_size in batch_sizes:
+            X = featurizer.transform([rows[k % len(rows)] for k in range(batch_size)])
+            report.append({
+                "model": name,
+                "batch_size": batch_size,
+                "sklearn_ms": _median_ms(lambda: classifier.predict_proba(X)),
+                "compiled_ms": _median_ms(lambda: compiled.predict_proba(X)),
+                "max_abs_diff": float(np.max(np.abs(compiled.predict_proba(X) - classifier.predict_proba(X)))),
+            })
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export flattened forests and check parity with sklearn")
+    parser.add_argument("models_dir", nargs="?", default=os.path.join("artifacts", "models"))
+    parser.add_argument("--model", action="append", dest="models")
+    parser.add_argument("--benchmark", default=None,
+                        help="Comma-separated batch sizes: time the evaluators instead of exporting")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        batch_sizes = [int(size) for size in args.benchmark.split(",")]
+        print(f"{'model':<22}{'batch':>7}{'sklearn ms':>12}{'compiled ms':>13}{'speedup':>9}{'max |diff|':>12}")
+        for row in benchmark(args.models_dir, args.models, batch_sizes):
+            print(f"{row['model']:<22}{row['batch_size']:>7}{row['sklearn_ms']:>12.3f}{row['compiled_ms']:>13.3f}"
+                  f"{row['sklearn_ms'] / row['compiled_ms']:>8.1f}x{row['max_abs_diff']:>12.2g}")
+        return
+    for name, info in export_compiled(args.models_dir, args.models).items():
+        print(f"{name}: {int(info['nodes'])} nodes, max |diff| vs sklearn {info['max_abs_diff']:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import csv
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.logger import logging
+from src.exception import CustomException
+from src.pipeline.predict_pipeline import PredictPipeline, REQUIRED_COLUMNS, caches_bypassed, stage_timer
+from src.utils.utils import load_object, same_state
+
+# ModelTrainer result names -> artifact names under artifacts/models
+TRAINER_MODEL_ARTIFACTS = {
+    "Random Forest": "random_forest",
+    "XGBoost": "xgb_model",
+    "Logistic Regression": "logistic_regression",
+}
+LABEL_COLUMN = "admin_priority"
+
+# Member scoring threads, shared by every ensemble: a hot swap rebuilds the
+# ensemble, and requests still holding the old one keep submitting to the pool
+_member_pool: Optional[ThreadPoolExecutor] = None
+_member_pool_lock = threading.Lock()
+
+
+def _shared_member_pool() -> ThreadPoolExecutor:
+    global _member_pool
+    with _member_pool_lock:
+        if _member_pool is None:
+            _member_pool = ThreadPoolExecutor(max_workers=len(TRAINER_MODEL_ARTIFACTS),
+                                              thread_name_prefix="ensemble")
+        return _member_pool
+
+
+def _majority_rate(test_path: str) -> float:
+    """
+    Share of the most common label in the holdout split: the accuracy of
+    always answering that label.
+    """
+    counts: Dict[str, int] = {}
+    with open(test_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            label = row.get(LABEL_COLUMN)
+            if label:
+                counts[label] = counts.get(label, 0) + 1
+    return max(counts.values()) / sum(counts.values()) if counts else 0.0
+
+
+def load_ensemble_weights(artifacts_dir: str = "artifacts",
+                          members: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Ensemble weights proportional to each model's validation accuracy in
+    training_metadata.pkl above the majority-class rate of priority_test.csv
+    (the split the accuracies were measured on), normalized to sum to 1.
+    Raw accuracies of ~0.9 would make any blend practically uniform. Even
+    the margin stays close to uniform when the members score alike:
+    0.906/0.885/0.906 over a 1/3 baseline gives 0.337/0.325/0.337.
+    Falls back to equal weights when the metadata is missing or a member
+    does not beat the baseline.
+    """
+    members = members or list(TRAINER_MODEL_ARTIFACTS.values())
+    scores: Dict[str, float] = {}
+    metadata_path = os.path.join(artifacts_dir, "training_metadata.pkl")
+    test_path = os.path.join(artifacts_dir, "priority_test.csv")
+    if os.path.exists(metadata_path):
+        try:
+            baseline = _majority_rate(test_path) if os.path.exists(test_path) else 0.0
+            results = load_object(metadata_path).get("model_results", {})
+            for trainer_name, accuracy in results.items():
+                name = TRAINER_MODEL_ARTIFACTS.get(trainer_name)
+                if name in members and accuracy > baseline:
+                    scores[name] = float(accuracy) - baseline
+        except Exception as e:
+            logging.warning(f"Could not read ensemble weights from {metadata_path}: {e}")
+    if set(scores) != set(members):
+        scores = {name: 1.0 for name in members}
+    total = sum(scores.values())
+    return {name: scores[name] / total for name in members}
+
+
+class EnsemblePipeline(PredictPipeline):
+    """
+    Weighted average of the class probabilities of several saved model pipelines.
+
+    When every member was fitted with the same preprocessor, features are
+    computed once and only the classifiers run, concurrently, on the whole
+    batch; otherwise each member runs its own full pipeline (still concurrently).
+    Members are looked up through ``member_fn`` on every call, so hot-swapped
+    artifacts are picked up without rebuilding the ensemble.
+    """
+
+    def __init__(self, member_fn: Callable[[str], PredictPipeline], weights: Dict[str, float],
+                 artifacts_dir: str = "artifacts", cache=None):
+        if not weights:
+            raise ValueError("An ensemble needs at least one member")
+        self.member_fn = member_fn
+        self.weights = dict(weights)
+        self._pool = _shared_member_pool()
+        self._shared_key: Optional[Tuple[str, ...]] = None
+        self._shared_preprocessor = False
+        super().__init__(artifacts_dir=artifacts_dir, model_name="ensemble", cache=cache)
+
+    def _load_model_and_encoder(self):
+        try:
+            members = self._members()
+            reference = next(iter(members.values()))
+            # The first member fixes class order and description normalization
+            self.model = reference.model
+            self.label_encoder = reference.label_encoder
+            self.class_names = list(reference.class_names)
+            # Members featurize for themselves; see _predict_proba_rows
+            self._featurizer = None
+            self._compiled = None
+            self.artifact_version = self._members_version(members)
+            self._normalize_description = self._description_normalizer()
+            logging.info(f"✓ Ensemble ready: {self.weights}")
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _members(self) -> Dict[str, PredictPipeline]:
+        return {name: self.member_fn(name) for name in self.weights}
+
+    @staticmethod
+    def _members_version(members: Dict[str, PredictPipeline]) -> str:
+        return "+".join(f"{name}:{member.artifact_version}" for name, member in members.items())
+
+    def _score_unique(self, df) -> Tuple[np.ndarray, np.ndarray]:
+        # Cache keys must follow member swaps
+        self.artifact_version = self._members_version(self._members())
+        return super()._score_unique(df)
+
+    def _shares_preprocessor(self, members: Dict[str, PredictPipeline]) -> bool:
+        key = tuple(member.artifact_version for member in members.values())
+        if key != self._shared_key:
+            preprocessors = [member.model.named_steps["preprocessor"] for member in members.values()]
+            self._shared_preprocessor = all(same_state(preprocessors[0], p) for p in preprocessors[1:])
+            self._shared_key = key
+            logging.info(f"Ensemble shares preprocessing: {self._shared_preprocessor}")
+        return self._shared_preprocessor
+
+    def _aligned(self, member: PredictPipeline, proba: np.ndarray) -> np.ndarray:
+        if member.class_names == self.class_names:
+            return proba
+        order = [member.class_names.index(name) for name in self.class_names]
+        return proba[:, order]
+
+    def _predict_proba_rows(self, rows: List[tuple]) -> np.ndarray:
+        members = self._members()
+        features = None
+        if self._shares_preprocessor(members):
+            reference = next(iter(members.values()))
+            if reference._featurizer is not None:
+                with stage_timer("preprocess"):
+                    features = reference._featurizer.transform(rows, use_cache=not caches_bypassed())
+            else:
+                import pandas as pd
+
+                with stage_timer("dataframe"):
+                    df = pd.DataFrame(rows, columns=REQUIRED_COLUMNS)
+                with stage_timer("preprocess"):
+                    features = reference.model.named_steps["preprocessor"].transform(df)
+
+        def _member_proba(member: PredictPipeline) -> np.ndarray:
+            if features is not None:
+                proba = member._classify(features)
+            else:
+                # Stage timers are no-ops on pool threads
+                proba = member._predict_proba_rows(rows)
+            return self._aligned(member, proba)
+
+        # Member threads are not recorded; time the concurrent section as a whole
+        with stage_timer("classifier"):
+            futures = {name: self._pool.submit(_member_proba, member) for name, member in members.items()}
+            return sum(self.weights[name] * futures[name].result() for name in members)
@@ -0,0 +1,179 @@
+"""
+DataFrame-free featurization for the saved priority pipelines.
+
+``SparseFeaturizer`` reads the fitted ``ColumnTransformer`` of a model
+Pipeline (TF-IDF on the description, one-hot on category and location) and
+builds the same feature matrix straight from Python strings. TF-IDF reuses
+the fitted vectorizer on a plain list, one-hot lookups use the fitted
+categories, and the blocks are stacked exactly like ``ColumnTransformer``
+does, so the classifier sees a bit-identical matrix.
+
+With a ``text_cache`` (see src.serving.cache.FeatureRowCache) the TF-IDF row
+of each normalized description is kept and only descriptions not seen before
+go through the vectorizer. Rows are keyed by a fingerprint of the fitted
+vectorizer, and TF-IDF rows do not depend on the rest of the batch, so the
+assembled matrix is the same as without the cache.
+"""
+import hashlib
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+_TEXT = "text"
+_ONE_HOT = "one_hot"
+
+
+class SparseFeaturizer:
+    """
+    Replays a fitted ``ColumnTransformer`` on rows of strings. Build it with
+    ``from_pipeline``, which returns None for preprocessors it cannot replay.
+    """
+
+    def __init__(self, blocks: List[tuple], sparse_output: bool, text_cache=None,
+                 normalize: Optional[Callable[[str], str]] = None):
+        self.blocks = blocks
+        self.sparse_output = sparse_output
+        # Optional TF-IDF row cache with get/put, and the description
+        # normalization that cannot change the vectorizer's output
+        self.text_cache = text_cache
+        self.normalize = normalize
+
+    @classmethod
+    def from_pipeline(cls, model, columns: Sequence[str], text_cache=None,
+                      normalize: Optional[Callable[[str], str]] = None) -> Optional["SparseFeaturizer"]:
+        """
+        ``columns`` is the order of the values in the rows passed to ``transform``.
+        """
+        steps = getattr(model, "steps", None)
+        if not steps or len(steps) != 2:
+            return None
+        preprocessor = steps[0][1]
+        transformers = getattr(preprocessor, "transformers_", None)
+        if transformers is None or getattr(preprocessor, "sparse_output_", None) is None:
+            return None
+        position = {column: k for k, column in enumerate(columns)}
+
+        blocks: List[tuple] = []
+        for name, transformer, selected in transformers:
+            if transformer == "drop" or (name == "remainder" and not _selects_any(selected)):
+                continue
+            kind = type(transformer).__name__
+            if kind == "TfidfVectorizer" and isinstance(selected, str) and selected in position:
+                fingerprint = vectorizer_fingerprint(transformer) if text_cache is not None else None
+                blocks.append((_TEXT, transformer, position[selected], fingerprint))
+            elif (kind == "OneHotEncoder" and isinstance(selected, list)
+                    and all(isinstance(c, str) and c in position for c in selected)):
+                block = _one_hot_block(transformer, [position[c] for c in selected])
+                if block is None:
+                    return None
+                blocks.append(block)
+            else:
+                return None
+        if not blocks:
+            return None
+        return cls(blocks, bool(preprocessor.sparse_output_), text_cache, normalize)
+
+    def transform(self, rows: Sequence[tuple], use_cache: bool = True):
+        """
+        Feature matrix for ``rows``, as ``preprocessor.transform`` would return it.
+        ``use_cache=False`` leaves the text cache untouched.
+        """
+        Xs = []
+        for block in self.blocks:
+            if block[0] == _TEXT:
+                Xs.append(self._text(block, rows, use_cache))
+            else:
+                Xs.append(_one_hot(block, rows))
+        if self.sparse_output:
+            # ColumnTransformer._hstack
+            return sparse.hstack(Xs).tocsr()
+        return np.hstack([X.toarray() for X in Xs])
+
+    def _text(self, block: tuple, rows: Sequence[tuple], use_cache: bool = True) -> sparse.csr_matrix:
+        _, vectorizer, k, fingerprint = block
+        if self.text_cache is None or not use_cache:
+            return vectorizer.transform([row[k] for row in rows])
+        texts = [row[k] for row in rows]
+        if self.normalize is not None:
+            texts = [self.normalize(text) for text in texts]
+        found = {text: None for text in texts}
+        for text in found:
+            found[text] = self.text_cache.get((fingerprint, text))
+        missing = [text for text, value in found.items() if value is None]
+        if missing:
+            X = vectorizer.transform(missing)
+            for i, text in enumerate(missing):
+                start, end = X.indptr[i], X.indptr[i + 1]
+                # Copies, so a cached row does not pin the whole batch matrix
+                value = (X.indices[start:end].copy(), X.data[start:end].copy())
+                for array in value:
+                    array.setflags(write=False)
+                found[text] = value
+                self.text_cache.put((fingerprint, text), value)
+
+        parts = [found[text] for text in texts]
+        indptr = np.zeros(len(parts) + 1, dtype=np.int32)
+        np.cumsum([len(indices) for indices, _ in parts], out=indptr[1:])
+        return sparse.csr_matrix(
+            (np.concatenate([data for _, data in parts]), np.concatenate([indices for indices, _ in parts]), indptr),
+            shape=(len(parts), len(vectorizer.vocabulary_)),
+            dtype=vectorizer.dtype,
+        )
+
+
+def vectorizer_fingerprint(vectorizer) -> str:
+    """
+    Digest of everything that determines a fitted vectorizer's output: its
+    parameters, vocabulary and idf weights.
+    """
+    digest = hashlib.sha1(repr(sorted(vectorizer.get_params().items(), key=lambda kv: kv[0])).encode())
+    digest.update(repr(sorted(vectorizer.vocabulary_.items())).encode())
+    idf = getattr(vectorizer, "idf_", None)
+    if idf is not None:
+        digest.update(np.ascontiguousarray(idf).tobytes())
+    return digest.hexdigest()
+
+
+def _selects_any(selected) -> bool:
+    try:
+        return len(selected) > 0
+    except TypeError:
+        return True
+
+
+def _one_hot_block(encoder, positions: List[int]) -> Optional[tuple]:
+    if (getattr(encoder, "drop_idx_", None) is not None
+            or getattr(encoder, "_infrequent_enabled", False)
+            or encoder.handle_unknown not in ("ignore", "error", "infrequent_if_exist")):
+        return None
+    lookups: List[Dict[Any, int]] = []
+    offset = 0
+    for categories in encoder.categories_:
+        lookups.append({value: offset + k for k, value in enumerate(categories.tolist())})
+        offset += len(categories)
+    return (_ONE_HOT, positions, lookups, offset, encoder.dtype, encoder.handle_unknown == "error")
+
+
+def _one_hot(block: tuple, rows: Sequence[tuple]) -> sparse.csr_matrix:
+    """
+    Same CSR layout as ``OneHotEncoder.transform``: per row, one entry per
+    known category in column order; unknown values are skipped (or rejected).
+    """
+    _, positions, lookups, n_features, dtype, strict = block
+    indices: List[int] = []
+    indptr = [0]
+    for row in rows:
+        for k, lookup in zip(positions, lookups):
+            index = lookup.get(row[k])
+            if index is not None:
+                indices.append(index)
+            elif strict:
+                raise ValueError(f"Found unknown categories [{row[k]!r}] during transform")
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=dtype)
+    return sparse.csr_matrix(
+        (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int32)),
+        shape=(len(rows), n_features),
+        dtype=dtype,
+    )
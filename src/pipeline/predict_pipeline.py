@@ -4,13 +4,22 @@ Prediction Pipeline for Priority Prediction Model
 Handles the complete prediction workflow:
 Load Model → Transform New Data → Predict
 """
+from __future__ import annotations
 
+import copy
 import os
 import sys
-import pandas as pd
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
 import numpy as np
 from datetime import datetime
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 # Add project root to path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 if project_root not in sys.path:
@@ -18,8 +27,138 @@ if project_root not in sys.path:
 
 from src.logger import logging
 from src.exception import CustomException
+from src.utils.artifact_store import MMAP_SUFFIX, MANIFEST_FILE, load_mmap_object, mmap_artifact_for
 from src.utils.utils import load_object
 
+# Feature columns in the order the training pipeline saw them
+REQUIRED_COLUMNS = ["short_description", "category", "location"]
+
+
+_stage_state = threading.local()
+
+
+@contextmanager
+def record_stages(timings: Dict[str, float]):
+    """
+    Accumulate the wall time (seconds) of each inference stage run by this
+    thread into ``timings`` for the duration of the block.
+    """
+    previous = getattr(_stage_state, "timings", None)
+    _stage_state.timings = timings
+    try:
+        yield timings
+    finally:
+        _stage_state.timings = previous
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    Time a block as ``stage`` when a ``record_stages`` block is active; no-op otherwise.
+    """
+    timings = getattr(_stage_state, "timings", None)
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def observe_predictions(observer):
+    """
+    Report every batch this thread scores through a ``PredictPipeline`` during
+    the block to ``observer.observe(pipeline, batch, codes, unique_proba)``
+    (see src.serving.drift); None observes nothing.
+    """
+    previous = getattr(_stage_state, "observer", None)
+    _stage_state.observer = observer
+    try:
+        yield observer
+    finally:
+        _stage_state.observer = previous
+
+
+@contextmanager
+def bypass_caches():
+    """
+    Score without reading or filling the prediction and TF-IDF row caches on
+    this thread for the duration of the block, e.g. for synthetic inputs.
+    """
+    previous = getattr(_stage_state, "bypass_caches", False)
+    _stage_state.bypass_caches = True
+    try:
+        yield
+    finally:
+        _stage_state.bypass_caches = previous
+
+
+def caches_bypassed() -> bool:
+    return getattr(_stage_state, "bypass_caches", False)
+
+
+class IssueBatch:
+    """
+    Column-oriented batch of issues, one list per ``REQUIRED_COLUMNS`` entry.
+    The serving path passes these (or plain dicts) instead of DataFrames.
+    """
+    __slots__ = ("short_description", "category", "location")
+
+    def __init__(self, short_description: List[str], category: List[str], location: List[str]):
+        if not len(short_description) == len(category) == len(location):
+            raise ValueError("IssueBatch columns must have the same length")
+        self.short_description = short_description
+        self.category = category
+        self.location = location
+
+    @classmethod
+    def from_records(cls, records: List[dict]) -> "IssueBatch":
+        try:
+            return cls(*([record[c] for record in records] for c in REQUIRED_COLUMNS))
+        except KeyError as e:
+            raise ValueError(f"Missing required columns: [{e.args[0]!r}]")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "IssueBatch":
+        return cls(*(df[c].tolist() for c in REQUIRED_COLUMNS))
+
+    def __len__(self) -> int:
+        return len(self.short_description)
+
+    def __getitem__(self, index: slice) -> "IssueBatch":
+        return IssueBatch(self.short_description[index], self.category[index], self.location[index])
+
+    def rows(self) -> List[tuple]:
+        return list(zip(self.short_description, self.category, self.location))
+
+    def to_frame(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame({c: getattr(self, c) for c in REQUIRED_COLUMNS}, columns=REQUIRED_COLUMNS)
+
+
+def model_artifact_path(models_dir: str, model_name: str) -> str:
+    """
+    File that identifies a model's current version: its pickle, or the manifest
+    of a memory-mapped conversion (src.utils.artifact_store) when only that exists.
+    """
+    pickle_path = os.path.join(models_dir, f"{model_name}.pkl")
+    manifest_path = os.path.join(models_dir, f"{model_name}{MMAP_SUFFIX}", MANIFEST_FILE)
+    if not os.path.exists(pickle_path) and os.path.exists(manifest_path):
+        return manifest_path
+    return pickle_path
+
+
+def artifact_version(path: str) -> str:
+    """
+    Cheap identity of an artifact file (mtime + size), changes when it is rewritten.
+    """
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
 
 class CustomData:
     """
@@ -50,6 +189,8 @@ class CustomData:
             "category": [self.category],
             "location": [self.location],
         }
+        import pandas as pd
+
         df = pd.DataFrame(data)
         # Ensure exact column order
         return df[["short_description", "category", "location"]]
@@ -59,9 +200,14 @@ class PredictPipeline:
     """
     Lightweight prediction pipeline that loads a trained model pipeline
     and produces predictions with class probabilities.
+
+    Results come as one dict per row (``predict_many``) or as columns
+    (``predict_columns``); both decode labels with a single lookup into a class
+    table built when ``class_names`` is set.
     """
 
-    def __init__(self, artifacts_dir: str = "artifacts", model_name: str = "random_forest"):
+    def __init__(self, artifacts_dir: str = "artifacts", model_name: str = "random_forest",
+                 cache=None, fast_path: bool = True, text_cache=None, verify_compiled: bool = True):
         self.artifacts_dir = artifacts_dir
         self.models_dir = os.path.join(artifacts_dir, "models")
         self.preprocessors_dir = os.path.join(artifacts_dir, "preprocessors")
@@ -69,17 +215,61 @@ class PredictPipeline:
         self.model_name = model_name
         self.model = None
         self.label_encoder = None
+        self.artifact_version = None
+        self.class_names = None
+        # Optional result cache with get/put (see src.serving.cache.PredictionCache)
+        self.cache = cache
+        self._normalize_description = None
+        # DataFrame-free featurizer (src.pipeline.featurizer) when the preprocessor allows it
+        self.fast_path = fast_path
+        self._featurizer = None
+        # Optional per-description TF-IDF row cache for the featurizer (src.serving.cache.FeatureRowCache)
+        self.text_cache = text_cache
+        # Flattened classifier (src.pipeline.compiled), verified against sklearn at load,
+        # or, with verify_compiled=False, by verify_compiled() before it is used
+        self._compiled = None
+        self._unverified_compiled = None
+        self._verify_at_load = verify_compiled
+        # Threads a classifier call may use, and from which batch size (set_thread_budget)
+        self._parallel_threads = 1
+        self._parallel_min_rows = 0
+        self._parallel_classifier = None
 
         self._load_model_and_encoder()
 
+    @property
+    def class_names(self) -> List[str] | None:
+        return self._class_names
+
+    @class_names.setter
+    def class_names(self, names: List[str] | None) -> None:
+        self._class_names = None if names is None else list(names)
+        # Label of every predict_proba column, indexed by argmax to decode a batch
+        self._class_table = None if names is None else np.asarray(self._class_names, dtype=object)
+
     def _load_model_and_encoder(self):
         try:
             # Load the trained sklearn Pipeline (includes preprocessor + classifier)
-            model_path = os.path.join(self.models_dir, f"{self.model_name}.pkl")
+            model_path = model_artifact_path(self.models_dir, self.model_name)
             if not os.path.exists(model_path):
                 raise FileNotFoundError(f"Model artifact not found: {model_path}")
-            self.model = load_object(model_path)
-            logging.info(f"✓ Model loaded: {self.model_name}")
+            version = artifact_version(model_path)
+            # A converted memory-mapped artifact shares its plain arrays (idf_, coef_) through the
+            # page cache; tree and booster state is still copied (see src.utils.artifact_store)
+            mmap_path = mmap_artifact_for(os.path.join(self.models_dir, f"{self.model_name}.pkl"))
+            if mmap_path is not None:
+                self.model = load_mmap_object(mmap_path)
+            else:
+                self.model = load_object(model_path)
+            self.artifact_version = version
+            self._normalize_description = self._description_normalizer()
+            self._featurizer = self._build_featurizer()
+            compiled = self._build_compiled()
+            if self._verify_at_load:
+                self._compiled = self._verified(compiled)
+            else:
+                self._unverified_compiled = compiled
+            logging.info(f"✓ Model loaded: {self.model_name} (version {self.artifact_version})")
 
             # Best-effort: load label encoder if present
             le_path = os.path.join(self.preprocessors_dir, "label_encoder.pkl")
@@ -89,81 +279,339 @@ class PredictPipeline:
                     logging.info("✓ Label encoder loaded")
                 except Exception as e:
                     logging.warning(f"Could not load label encoder: {e}")
+
+            # Decoded class-name table, in predict_proba column order
+            self.class_names = self._resolve_class_names()
         except Exception as e:
             raise CustomException(e, sys)
 
     def _ensure_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        required = ["short_description", "category", "location"]
-        missing = [c for c in required if c not in df.columns]
+        missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
         if missing:
             raise CustomException(f"Missing required columns: {missing}", sys)
         # Reorder to match training
-        return df[required]
+        return df[REQUIRED_COLUMNS]
+
+    def _as_batch(self, data) -> IssueBatch:
+        if isinstance(data, IssueBatch):
+            return data
+        if isinstance(data, dict):
+            return IssueBatch.from_records([data])
+        if isinstance(data, list):
+            return IssueBatch.from_records(data)
+        return IssueBatch.from_frame(self._ensure_columns(data))
+
+    def _build_featurizer(self):
+        if not self.fast_path:
+            return None
+        from src.pipeline.featurizer import SparseFeaturizer
+
+        featurizer = SparseFeaturizer.from_pipeline(self.model, REQUIRED_COLUMNS, text_cache=self.text_cache,
+                                                    normalize=self._normalize_description)
+        if featurizer is None:
+            logging.info(f"Model {self.model_name}: preprocessor not supported by the fast path, using DataFrames")
+        return featurizer
+
+    def _build_compiled(self):
+        steps = getattr(self.model, "steps", None)
+        if not self.fast_path or not steps:
+            return None
+        from src.pipeline.compiled import compile_classifier, load_compiled
+
+        return load_compiled(self.models_dir, self.model_name) or compile_classifier(steps[-1][1])
+
+    def _verified(self, compiled):
+        if compiled is None:
+            return None
+        from src.pipeline.compiled import ParityError, verify
+
+        try:
+            verify(compiled, self.model.steps[-1][1])
+        except ParityError as e:
+            logging.warning(f"Model {self.model_name}: {e}; using the sklearn classifier")
+            return None
+        return compiled
+
+    def verify_compiled(self) -> None:
+        """
+        Run the parity check deferred by ``verify_compiled=False`` and score
+        through the compiled evaluator from then on if it passes. The check
+        runs the sklearn/XGBoost classifier, which starts its OpenMP pool, so
+        a pre-fork parent leaves it to the workers.
+        """
+        compiled, self._unverified_compiled = self._unverified_compiled, None
+        if compiled is not None:
+            self._compiled = self._verified(compiled)
 
-    def predict(self, df: pd.DataFrame) -> dict:
+    def _description_normalizer(self):
+        """
+        Return a normalization for short_description that cannot change the
+        TF-IDF features (case and whitespace), or None when the fitted
+        vectorizer is configured in a way that makes them significant.
+        """
+        try:
+            vectorizer = self.model.named_steps["preprocessor"].named_transformers_["text"]
+        except (AttributeError, KeyError):
+            return None
+        if (getattr(vectorizer, "analyzer", None) != "word"
+                or vectorizer.preprocessor is not None
+                or vectorizer.tokenizer is not None
+                or vectorizer.token_pattern != r"(?u)\b\w\w+\b"):
+            return None
+        if vectorizer.lowercase:
+            return lambda text: " ".join(str(text).lower().split())
+        return lambda text: " ".join(str(text).split())
+
+    def _cache_key(self, row: tuple) -> tuple:
+        short_description, category, location = row
+        if self._normalize_description is not None:
+            short_description = self._normalize_description(short_description)
+        # One-hot categories are matched exactly, so they are keyed verbatim
+        return (self.model_name, self.artifact_version, short_description, category, location)
+
+    def _decode_classes(self, encoded_classes) -> np.ndarray:
+        """
+        Map encoded class ids to human-readable labels in one vectorized call.
+        """
+        if self.label_encoder is not None:
+            try:
+                return np.asarray(self.label_encoder.inverse_transform(encoded_classes)).astype(str)
+            except Exception:
+                pass
+        # Safe fallback
+        mapping_fallback = {0: "High", 1: "Low", 2: "Medium"}
+        return np.array([mapping_fallback.get(int(c), f"class_{c}") for c in encoded_classes])
+
+    def _resolve_class_names(self, n_columns: int | None = None) -> List[str] | None:
+        # Extract classifier classes (encoded labels)
+        if hasattr(self.model, "named_steps") and "classifier" in self.model.named_steps:
+            encoded_classes = self.model.named_steps["classifier"].classes_
+        elif n_columns is not None:
+            # Fallback: infer from proba shape
+            encoded_classes = np.arange(n_columns)
+        else:
+            return None
+        return self._decode_classes(encoded_classes).tolist()
+
+    def predict(self, df: pd.DataFrame | IssueBatch | dict) -> dict:
         """
         Run preprocessing + model prediction and return structured output.
 
         Returns keys: prediction, confidence, class_probabilities, model_used
         """
         try:
-            if self.model is None:
-                self._load_model_and_encoder()
+            # Single-row expectation from test usage; handle generally anyway
+            return self.predict_many(self._as_batch(df)[:1])[0]
+        except Exception as e:
+            logging.error("Error during prediction")
+            raise CustomException(e, sys)
 
-            input_df = self._ensure_columns(df)
+    def predict_many(self, df: pd.DataFrame | IssueBatch | List[dict]) -> List[dict]:
+        """
+        Batch counterpart of ``predict``: one result dict per input row, in order.
+        Accepts a DataFrame, an ``IssueBatch`` or a list of issue dicts.
 
-            # Predict and probabilities
-            y_pred_encoded = self.model.predict(input_df)
-            y_proba = self.model.predict_proba(input_df)
+        Identical rows are collapsed first, so preprocessing and ``predict_proba``
+        run once over the unique rows and labels are decoded with one array lookup.
+        With a cache attached, only rows missing from it are scored.
+        """
+        try:
+            codes, unique_proba = self._score_unique(df)
+            with stage_timer("decode"):
+                unique_results = self.build_results(unique_proba)
+                # Shallow copies so callers never share a dict between rows
+                return [
+                    {**unique_results[k], "class_probabilities": dict(unique_results[k]["class_probabilities"])}
+                    for k in codes.tolist()
+                ]
+        except Exception as e:
+            logging.error("Error during batch prediction")
+            raise CustomException(e, sys)
 
-            # Extract classifier classes (encoded labels)
-            if hasattr(self.model, "named_steps") and "classifier" in self.model.named_steps:
-                encoded_classes = self.model.named_steps["classifier"].classes_
-            else:
-                # Fallback: infer from proba shape
-                encoded_classes = np.arange(y_proba.shape[1])
-
-            # Map encoded class ids to human-readable labels
-            def decode_label(class_id: int) -> str:
-                if self.label_encoder is not None:
-                    try:
-                        return str(self.label_encoder.inverse_transform([class_id])[0])
-                    except Exception:
-                        pass
-                # Safe fallback
-                mapping_fallback = {0: "High", 1: "Low", 2: "Medium"}
-                return mapping_fallback.get(int(class_id), f"class_{class_id}")
+    def predict_columns(self, df: pd.DataFrame | IssueBatch | List[dict]) -> Dict[str, Any]:
+        """
+        Columnar counterpart of ``predict_many``, see ``build_columns``.
+        """
+        try:
+            codes, unique_proba = self._score_unique(df)
+            with stage_timer("decode"):
+                return self.build_columns(unique_proba[codes])
+        except Exception as e:
+            logging.error("Error during batch prediction")
+            raise CustomException(e, sys)
 
-            # Single-row expectation from test usage; handle generally anyway
-            proba_row = y_proba[0]
-            encoded_pred = int(y_pred_encoded[0])
-
-            # Build probabilities dict
-            class_probabilities = {}
-            for j, class_id in enumerate(encoded_classes):
-                label = decode_label(int(class_id))
-                class_probabilities[label] = float(proba_row[j])
-
-            prediction_label = decode_label(encoded_pred)
-            confidence = float(np.max(proba_row))
-
-            return {
-                "prediction": prediction_label,
-                "confidence": confidence,
-                "class_probabilities": class_probabilities,
-                "model_used": self.model_name,
-            }
+    def predict_proba_many(self, df: pd.DataFrame | IssueBatch | List[dict]) -> np.ndarray:
+        """
+        Class probabilities for every input row, columns ordered like ``class_names``.
+        """
+        try:
+            codes, unique_proba = self._score_unique(df)
+            return unique_proba[codes]
         except Exception as e:
-            logging.error("Error during prediction")
+            logging.error("Error during batch prediction")
             raise CustomException(e, sys)
 
+    def build_results(self, proba: np.ndarray) -> List[dict]:
+        """
+        Turn rows of a probability matrix into the structured result dicts.
+        """
+        labels = self._class_table[proba.argmax(axis=1)].tolist()
+        confidences = proba.max(axis=1).tolist()
+        return [
+            {
+                "prediction": labels[k],
+                "confidence": confidences[k],
+                "class_probabilities": dict(zip(self.class_names, proba_row)),
+                "model_used": self.model_name,
+            }
+            for k, proba_row in enumerate(proba.tolist())
+        ]
+
+    def build_columns(self, proba: np.ndarray) -> Dict[str, Any]:
+        """
+        Rows of a probability matrix as columns, for callers that post-process
+        or serialize in bulk: ``prediction`` (labels) and ``confidence`` per
+        row, and one ``class_probabilities`` array per class.
+        """
+        # Rows of the transpose are contiguous, which orjson needs for arrays
+        per_class = np.ascontiguousarray(proba.T)
+        return {
+            "model_used": self.model_name,
+            "classes": list(self.class_names),
+            "prediction": self._class_table[proba.argmax(axis=1)].tolist(),
+            "confidence": proba.max(axis=1),
+            "class_probabilities": dict(zip(self.class_names, per_class)),
+        }
+
+    def _score_unique(self, df: pd.DataFrame | IssueBatch | List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Collapse duplicate rows and score them, returning ``(codes, proba)``:
+        ``proba`` has one row per unique input row and ``codes[i]`` is the
+        unique row backing input row ``i``.
+        """
+        if self.model is None:
+            self._load_model_and_encoder()
+
+        batch = self._as_batch(df)
+        codes, unique_proba = self._score_batch(batch)
+        observer = getattr(_stage_state, "observer", None)
+        if observer is not None:
+            with stage_timer("observe"):
+                observer.observe(self, batch, codes, unique_proba)
+        return codes, unique_proba
+
+    def _score_batch(self, batch: IssueBatch) -> Tuple[np.ndarray, np.ndarray]:
+        unique_rows: Dict[tuple, int] = {}
+        codes = np.fromiter(
+            (unique_rows.setdefault(row, len(unique_rows))
+             for row in zip(batch.short_description, batch.category, batch.location)),
+            dtype=np.intp,
+            count=len(batch),
+        )
+        rows = list(unique_rows)
+        if not rows:
+            return codes, np.empty((0, len(self.class_names or ())))
+        if self.cache is None or caches_bypassed():
+            return codes, self._predict_proba_rows(rows)
+
+        cache_keys = [self._cache_key(row) for row in rows]
+        unique_proba = [self.cache.get(key) for key in cache_keys]
+        misses = [k for k, proba_row in enumerate(unique_proba) if proba_row is None]
+        if misses:
+            scored = self._predict_proba_rows([rows[k] for k in misses])
+            for k, proba_row in zip(misses, scored):
+                # Copy so the cache does not pin the whole batch matrix
+                proba_row = proba_row.copy()
+                proba_row.setflags(write=False)
+                unique_proba[k] = proba_row
+                self.cache.put(cache_keys[k], proba_row)
+        return codes, np.vstack(unique_proba)
+
+    def _predict_proba_rows(self, rows: List[tuple]) -> np.ndarray:
+        """
+        Score unique (short_description, category, location) rows in one call.
+        """
+        steps = getattr(self.model, "steps", None)
+        if self._featurizer is not None:
+            with stage_timer("preprocess"):
+                features = self._featurizer.transform(rows, use_cache=not caches_bypassed())
+            with stage_timer("classifier"):
+                y_proba = self._classify(features)
+        else:
+            import pandas as pd
+
+            with stage_timer("dataframe"):
+                df = pd.DataFrame(rows, columns=REQUIRED_COLUMNS)
+            if steps and len(steps) > 1:
+                # Same computation as Pipeline.predict_proba, split so stages can be timed
+                with stage_timer("preprocess"):
+                    features = df
+                    for _, transformer in steps[:-1]:
+                        features = transformer.transform(features)
+                with stage_timer("classifier"):
+                    y_proba = self._classify(features)
+            else:
+                with stage_timer("classifier"):
+                    y_proba = self.model.predict_proba(df)
+        if self.class_names is None:
+            self.class_names = self._resolve_class_names(y_proba.shape[1])
+        return y_proba
+
+    def set_thread_budget(self, threads: int, parallel_min_rows: int) -> None:
+        """
+        Run classifier calls on one thread, except for batches of at least
+        ``parallel_min_rows`` rows, which may use ``threads`` threads.
+        """
+        self._parallel_threads = max(1, threads)
+        self._parallel_min_rows = parallel_min_rows
+        steps = getattr(self.model, "steps", None)
+        if not steps:
+            return
+        classifier = steps[-1][1]
+        self._parallel_classifier = None
+        if type(classifier).__name__ == "XGBClassifier":
+            classifier.set_params(n_jobs=1)
+            if self._parallel_threads > 1:
+                # A booster's thread count cannot change while other threads predict
+                # with it, so large batches get a copy of their own
+                self._parallel_classifier = copy.deepcopy(classifier).set_params(n_jobs=self._parallel_threads)
+        elif hasattr(classifier, "n_jobs"):
+            # joblib's default of one job, or the n_jobs of an enclosing parallel_config
+            classifier.n_jobs = None
+        for compiled in (self._compiled, self._unverified_compiled):
+            if hasattr(compiled, "set_threads"):
+                compiled.set_threads(1, self._parallel_threads)
+
+    def _classify(self, features) -> np.ndarray:
+        """
+        Classifier probabilities for a preprocessed feature matrix.
+        """
+        compiled = self._compiled
+        n_rows = features.shape[0]
+        parallel = self._parallel_threads > 1 and n_rows >= self._parallel_min_rows
+        if compiled is not None and (compiled.max_batch is None or n_rows <= compiled.max_batch):
+            return compiled.predict_proba(features)
+        classifier = self.model.steps[-1][1]
+        if parallel and self._parallel_classifier is not None:
+            return self._parallel_classifier.predict_proba(features)
+        if parallel:
+            from joblib import parallel_config
+
+            with parallel_config(backend="threading", n_jobs=self._parallel_threads):
+                return classifier.predict_proba(features)
+        return classifier.predict_proba(features)
+
 
 # Explicit exports for test import
-__all__ = ["CustomData", "PredictPipeline"]
+__all__ = ["CustomData", "IssueBatch", "PredictPipeline"]
 
 class PredictionPipeline:
     """
     Complete prediction pipeline for priority prediction model
+
+    Notebook and command-line front end to ``PredictPipeline``: it scores
+    through the same engine as the serving apps and keeps the original
+    ``predict_single``/``predict_batch``/``predict_from_csv`` interface.
     """
     
     def __init__(self, artifacts_dir: str = "artifacts"):
@@ -178,7 +626,7 @@ class PredictionPipeline:
         self.preprocessors_dir = os.path.join(artifacts_dir, "preprocessors")
         
         # Initialize components
-        self.preprocessor = None
+        self.engine: PredictPipeline | None = None
         self.label_encoder = None
         self.model = None
         self.model_name = None
@@ -190,12 +638,10 @@ class PredictionPipeline:
 
     def _check_artifacts(self):
         """
-        Check if required artifacts exist
+        Check if the shared preprocessing artifacts exist; model pickles are
+        checked individually when load_models() asks for one
         """
         required_files = [
-            os.path.join(self.models_dir, "random_forest.pkl"),
-            os.path.join(self.models_dir, "xgb_model.pkl"),
-            os.path.join(self.models_dir, "logistic_regression.pkl"),
             os.path.join(self.preprocessors_dir, "preprocessor.pkl"),
             os.path.join(self.preprocessors_dir, "label_encoder.pkl")
         ]
@@ -206,27 +652,16 @@ class PredictionPipeline:
 
     def load_models(self, model_name: str = "random_forest"):
         """
-        Load the specified model and preprocessors
+        Load the specified model (the saved pipeline includes its preprocessor)
         
         Args:
             model_name (str): Name of the model to load ('random_forest', 'xgb_model', 'logistic_regression')
         """
         try:
             logging.info(f"Loading model: {model_name}")
-            
-            # Load preprocessor
-            preprocessor_path = os.path.join(self.preprocessors_dir, "preprocessor.pkl")
-            self.preprocessor = load_object(preprocessor_path)
-            logging.info("✓ Preprocessor loaded successfully")
-            
-            # Load label encoder
-            label_encoder_path = os.path.join(self.preprocessors_dir, "label_encoder.pkl")
-            self.label_encoder = load_object(label_encoder_path)
-            logging.info("✓ Label encoder loaded successfully")
-            
-            # Load model
-            model_path = os.path.join(self.models_dir, f"{model_name}.pkl")
-            self.model = load_object(model_path)
+            self.engine = PredictPipeline(artifacts_dir=self.artifacts_dir, model_name=model_name)
+            self.model = self.engine.model
+            self.label_encoder = self.engine.label_encoder
             self.model_name = model_name
             logging.info(f"✓ Model {model_name} loaded successfully")
             
@@ -234,6 +669,11 @@ class PredictionPipeline:
             logging.error(f"Error loading model {model_name}")
             raise CustomException(e, sys)
 
+    def _require_engine(self) -> PredictPipeline:
+        if self.engine is None:
+            raise ValueError("Model not loaded. Call load_models() first.")
+        return self.engine
+
     def predict_single(self, short_description: str, category: str, location: str):
         """
         Predict priority for a single issue
@@ -247,64 +687,10 @@ class PredictionPipeline:
             dict: Prediction results
         """
         try:
-            if self.model is None:
-                raise ValueError("Model not loaded. Call load_models() first.")
-            
-            # Create DataFrame for single prediction
-            data = {
-                'short_description': [short_description],
-                'category': [category],
-                'location': [location]
-            }
-            df = pd.DataFrame(data)
-            
-            # Make prediction (model includes preprocessor)
-            prediction_encoded = self.model.predict(df)[0]
-            prediction_proba = self.model.predict_proba(df)[0]
-            
-            # Get confidence score
-            confidence = float(np.max(prediction_proba))
-            
-            # Get probability for each class
-            # Since the model was trained with encoded labels, we need to map back to original labels
-            # The model trainer uses LabelEncoder, so we need to get the classes from the model
-            try:
-                # Preferred: map via saved label encoder if available
-                if self.label_encoder is not None and hasattr(self.model.named_steps['classifier'], 'classes_'):
-                    encoded_classes = self.model.named_steps['classifier'].classes_
-                    class_names = self.label_encoder.inverse_transform(encoded_classes)
-                elif hasattr(self.model.named_steps['classifier'], 'classes_'):
-                    encoded_classes = self.model.named_steps['classifier'].classes_
-                    # Safe fallback mapping if encoder missing
-                    fallback = {0: 'High', 1: 'Low', 2: 'Medium'}
-                    class_names = np.array([fallback.get(int(i), f'class_{int(i)}') for i in encoded_classes])
-                else:
-                    class_names = np.array(['High', 'Low', 'Medium'])
-
-                class_probabilities = {}
-                for i, class_name in enumerate(class_names):
-                    class_probabilities[str(class_name)] = float(prediction_proba[i])
-
-                # Get prediction label
-                if self.label_encoder is not None:
-                    prediction = str(self.label_encoder.inverse_transform([prediction_encoded])[0])
-                else:
-                    prediction = str(class_names[prediction_encoded])
-
-            except Exception as e:
-                logging.warning(f"Could not map prediction classes: {e}")
-                # Fallback to encoded prediction
-                prediction = str(prediction_encoded)
-                class_probabilities = {f"class_{i}": float(prob) for i, prob in enumerate(prediction_proba)}
-            
-            result = {
-                'prediction': prediction,
-                'confidence': confidence,
-                'class_probabilities': class_probabilities,
-                'model_used': self.model_name
-            }
-            
-            logging.info(f"Prediction completed: {prediction} (confidence: {confidence:.3f})")
+            result = self._require_engine().predict(
+                IssueBatch([short_description], [category], [location])
+            )
+            logging.info(f"Prediction completed: {result['prediction']} (confidence: {result['confidence']:.3f})")
             return result
             
         except Exception as e:
@@ -322,61 +708,10 @@ class PredictionPipeline:
             list: List of prediction results
         """
         try:
-            if self.model is None:
-                raise ValueError("Model not loaded. Call load_models() first.")
-            
-            # Create DataFrame for batch prediction
-            df = pd.DataFrame(data_list)
-            
-            # Validate required columns
-            required_columns = ['short_description', 'category', 'location']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise ValueError(f"Missing required columns: {missing_columns}")
-            
-            # Make predictions (model includes preprocessor)
-            predictions_encoded = self.model.predict(df)
-            predictions_proba = self.model.predict_proba(df)
-            
-            # Get classes for mapping
-            try:
-                if hasattr(self.model.named_steps['classifier'], 'classes_'):
-                    encoded_classes = self.model.named_steps['classifier'].classes_
-                    if self.label_encoder is not None:
-                        classes = self.label_encoder.inverse_transform(encoded_classes)
-                    else:
-                        fallback = {0: 'High', 1: 'Low', 2: 'Medium'}
-                        classes = np.array([fallback.get(int(i), f'class_{int(i)}') for i in encoded_classes])
-                else:
-                    classes = np.array(['High', 'Low', 'Medium'])
-            except:
-                classes = np.array(['High', 'Low', 'Medium'])
-            
-            # Prepare results
-            results = []
-            for i, (prediction_encoded, proba) in enumerate(zip(predictions_encoded, predictions_proba)):
-                confidence = float(np.max(proba))
-                
-                # Get probability for each class
-                class_probabilities = {}
-                for j, class_name in enumerate(classes):
-                    class_probabilities[class_name] = float(proba[j])
-                
-                # Get prediction label
-                if self.label_encoder is not None:
-                    prediction = str(self.label_encoder.inverse_transform([int(prediction_encoded)])[0])
-                else:
-                    prediction = str(classes[int(prediction_encoded)])
-                
-                result = {
-                    'index': i,
-                    'input': data_list[i],
-                    'prediction': prediction,
-                    'confidence': confidence,
-                    'class_probabilities': class_probabilities,
-                    'model_used': self.model_name
-                }
-                results.append(result)
+            # from_records rejects items missing a required column
+            results = self._require_engine().predict_many(IssueBatch.from_records(data_list))
+            results = [{'index': i, 'input': item, **result}
+                       for i, (item, result) in enumerate(zip(data_list, results))]
             
             logging.info(f"Batch prediction completed for {len(data_list)} items")
             return results
@@ -397,47 +732,22 @@ class PredictionPipeline:
             pd.DataFrame: DataFrame with predictions
         """
         try:
-            if self.model is None:
-                raise ValueError("Model not loaded. Call load_models() first.")
+            engine = self._require_engine()
             
             # Load CSV
+            import pandas as pd
+
             df = pd.read_csv(csv_path)
             logging.info(f"Loaded CSV with {len(df)} rows from {csv_path}")
-            
-            # Validate required columns
-            required_columns = ['short_description', 'category', 'location']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
             if missing_columns:
                 raise ValueError(f"Missing required columns: {missing_columns}")
             
-            # Make predictions (model includes preprocessor)
-            predictions_encoded = self.model.predict(df[required_columns])
-            predictions_proba = self.model.predict_proba(df[required_columns])
-            
-            # Get classes for mapping
-            try:
-                if hasattr(self.model.named_steps['classifier'], 'classes_'):
-                    encoded_classes = self.model.named_steps['classifier'].classes_
-                    if self.label_encoder is not None:
-                        classes = self.label_encoder.inverse_transform(encoded_classes)
-                    else:
-                        fallback = {0: 'High', 1: 'Low', 2: 'Medium'}
-                        classes = np.array([fallback.get(int(i), f'class_{int(i)}') for i in encoded_classes])
-                else:
-                    classes = np.array(['High', 'Low', 'Medium'])
-            except:
-                classes = np.array(['High', 'Low', 'Medium'])
-            
-            # Map predictions to class names
-            predictions = classes[predictions_encoded]
-            
-            # Add predictions to DataFrame
-            df['predicted_priority'] = predictions
-            df['confidence'] = np.max(predictions_proba, axis=1)
-            
-            # Add individual class probabilities
-            for i, class_name in enumerate(classes):
-                df[f'prob_{class_name.lower()}'] = predictions_proba[:, i]
+            columns = engine.predict_columns(IssueBatch.from_frame(df[REQUIRED_COLUMNS]))
+            df['predicted_priority'] = columns["prediction"]
+            df['confidence'] = columns["confidence"]
+            for class_name, probabilities in columns["class_probabilities"].items():
+                df[f'prob_{class_name.lower()}'] = probabilities
             
             # Save results if output path provided
             if output_path:
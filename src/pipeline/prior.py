@@ -0,0 +1,104 @@
+"""
+Priority prior per (category, location), for answering without a model.
+
+``PriorPipeline`` counts the labels of priority_train.csv per (category,
+location) pair and smooths each pair's distribution towards its category's,
+and the category's towards the overall one, so rare or unseen pairs still
+get a sensible answer. Scoring is a dict lookup per row; the serving apps use
+it as the last-resort degraded scorer (see src.serving.deadline).
+
+It exposes the parts of the ``PredictPipeline`` interface the apps use
+(``predict``, ``predict_many``, ``predict_proba_many``, ``build_results``,
+``build_columns``).
+"""
+import csv
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.predict_pipeline import IssueBatch, PredictPipeline
+
+LABEL_COLUMN = "admin_priority"
+PRIOR_MODEL_NAME = "prior"
+
+
+class PriorPipeline:
+    """
+    Smoothed P(priority | category, location) from the training split.
+    ``strength`` is how many pseudo-observations of the backoff distribution
+    each level adds.
+    """
+
+    def __init__(self, counts: Dict[Tuple[str, str], Dict[str, int]], strength: float = 2.0):
+        self.model_name = PRIOR_MODEL_NAME
+        self.class_names: List[str] = sorted({label for pair in counts.values() for label in pair})
+        if not self.class_names:
+            raise ValueError("A prior needs at least one labelled row")
+        self._class_table = np.asarray(self.class_names, dtype=object)
+        self.strength = strength
+        self.artifact_version = None
+
+        by_category: Dict[str, np.ndarray] = {}
+        pair_counts: Dict[Tuple[str, str], np.ndarray] = {}
+        for pair, labels in counts.items():
+            row = np.array([labels.get(name, 0) for name in self.class_names], dtype=float)
+            pair_counts[pair] = row
+            by_category[pair[0]] = by_category.get(pair[0], 0.0) + row
+        overall = sum(by_category.values())
+        self._overall = overall / overall.sum()
+        self._by_category = {category: self._smooth(row, self._overall) for category, row in by_category.items()}
+        self._by_pair = {pair: self._smooth(row, self._by_category[pair[0]]) for pair, row in pair_counts.items()}
+
+    @classmethod
+    def from_csv(cls, path: str, strength: float = 2.0) -> "PriorPipeline":
+        try:
+            counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    label = row.get(LABEL_COLUMN)
+                    if not label:
+                        continue
+                    labels = counts.setdefault((row["category"], row["location"]), {})
+                    labels[label] = labels.get(label, 0) + 1
+            prior = cls(counts, strength)
+            logging.info(f"✓ Priority prior built from {path} ({len(counts)} category/location pairs)")
+            return prior
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @classmethod
+    def from_artifacts(cls, artifacts_dir: str = "artifacts") -> Optional["PriorPipeline"]:
+        """
+        The prior of ``artifacts_dir/priority_train.csv``, or None when it is missing.
+        """
+        path = os.path.join(artifacts_dir, "priority_train.csv")
+        return cls.from_csv(path) if os.path.exists(path) else None
+
+    def _smooth(self, counts: np.ndarray, backoff: np.ndarray) -> np.ndarray:
+        return (counts + self.strength * backoff) / (counts.sum() + self.strength)
+
+    def distribution(self, category: str, location: str) -> np.ndarray:
+        pair = self._by_pair.get((category, location))
+        if pair is not None:
+            return pair
+        return self._by_category.get(category, self._overall)
+
+    def predict_proba_many(self, data) -> np.ndarray:
+        batch = data if isinstance(data, IssueBatch) else IssueBatch.from_records(data)
+        if not len(batch):
+            return np.zeros((0, len(self.class_names)))
+        return np.vstack([self.distribution(c, l) for c, l in zip(batch.category, batch.location)])
+
+    # Same decoding as the model pipelines
+    build_results = PredictPipeline.build_results
+    build_columns = PredictPipeline.build_columns
+
+    def predict_many(self, data) -> List[dict]:
+        return self.build_results(self.predict_proba_many(data))
+
+    def predict(self, record: dict) -> dict:
+        return self.predict_many([record])[0]
@@ -0,0 +1,155 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.logger import logging
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Gathers concurrent single-item prediction requests into one batch and
+    scores them with a single vectorized call.
+
+    A batch is flushed once it holds ``max_batch_size`` items or ``max_wait_ms``
+    after its first item arrived, whichever comes first. ``submit`` raises
+    ``queue.Full`` when ``max_queue_depth`` requests are already waiting.
+    """
+
+    def __init__(self,
+                 predict_fn: Callable[[List[dict]], List[dict]],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0,
+                 max_queue_depth: int = 1024,
+                 name: str = "micro-batcher"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_depth = max_queue_depth
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_depth)
+        self._lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+        self._items = 0
+        self._rejected = 0
+
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, record: dict) -> Future:
+        """
+        Queue one record for scoring and return a Future resolving to its result dict.
+        """
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((record, future))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise
+        return future
+
+    def predict(self, record: dict, timeout: float | None = None) -> dict:
+        return self.submit(record).result(timeout=timeout)
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    # Drain whatever is already queued even when the wait is over
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[Tuple[dict, Future]]) -> None:
+        # Callers that gave up (cancelled futures) are not scored
+        live = [(record, future) for record, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            results = self.predict_fn([record for record, _ in live])
+        except Exception as e:
+            logging.error(f"Micro-batch of {len(live)} failed: {e}")
+            for _, future in live:
+                future.set_exception(e)
+        else:
+            for (_, future), result in zip(live, results):
+                future.set_result(result)
+        with self._lock:
+            self._batch_sizes[len(live)] += 1
+            self._items += len(live)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Configuration plus the distribution of batch sizes actually formed.
+        """
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_queue_depth": self.max_queue_depth,
+                "queue_depth": self._queue.qsize(),
+                "batches": batches,
+                "items": self._items,
+                "rejected": self._rejected,
+                "mean_batch_size": (self._items / batches) if batches else 0.0,
+                "batch_sizes": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+            }
+
+
+class BatcherPool:
+    """
+    One MicroBatcher per model name, created on first use.
+    """
+
+    def __init__(self, predict_fn_for: Callable[[str], Callable[[List[dict]], List[dict]]],
+                 **batcher_kwargs):
+        self.predict_fn_for = predict_fn_for
+        self.batcher_kwargs = batcher_kwargs
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> MicroBatcher:
+        batcher = self._batchers.get(name)
+        if batcher is None:
+            with self._lock:
+                batcher = self._batchers.get(name)
+                if batcher is None:
+                    batcher = MicroBatcher(self.predict_fn_for(name), name=f"micro-batcher-{name}",
+                                           **self.batcher_kwargs)
+                    self._batchers[name] = batcher
+        return batcher
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: batcher.stats() for name, batcher in list(self._batchers.items())}
+
+    def close(self) -> None:
+        with self._lock:
+            for batcher in self._batchers.values():
+                batcher.close()
+            self._batchers.clear()
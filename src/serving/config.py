@@ -0,0 +1,112 @@
+import os
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class ServingConfig:
+    """
+    Serving settings shared by the FastAPI and Flask apps, read from the environment
+    """
+    # Every variable read below, in order; load-test runs record them (src.serving.loadtest)
+    ENV_NAMES = (
+        "PRIORITY_MODEL", "PRIORITY_ARTIFACTS_DIR", "MODEL_RELOAD_INTERVAL_S", "PRELOAD_MODELS",
+        "PARALLEL_MODEL_LOADING", "CASCADE_MODELS", "CASCADE_THRESHOLD", "PREDICT_BATCHING",
+        "PREDICT_BATCH_MAX_SIZE", "PREDICT_BATCH_MAX_WAIT_MS", "PREDICT_BATCH_QUEUE_DEPTH", "INFERENCE_WORKERS",
+        "INFERENCE_QUEUE_DEPTH", "INFERENCE_RETRY_AFTER_S", "INFERENCE_THREADS", "PARALLEL_MIN_ROWS",
+        "CPU_AFFINITY", "REQUEST_DEADLINE_MS", "DEGRADED_FALLBACKS", "PREDICTION_CACHE_SIZE",
+        "PREDICTION_CACHE_TTL_S", "TFIDF_CACHE_MB", "SHADOW_MODEL", "SHADOW_SAMPLE_RATE", "SHADOW_QUEUE_DEPTH",
+        "SHADOW_MAX_ROWS", "DRIFT_MONITORING", "DRIFT_WINDOW_ROWS", "DRIFT_TOP_K", "PROFILE_HEADER",
+        "PROFILE_SAMPLE_EVERY", "PROFILE_LATENCY_MS", "PROFILE_INTERVAL_MS", "PROFILE_DIR", "PROFILE_MAX_FILES",
+        "STREAM_CHUNK_SIZE", "STREAM_MAX_LINE_BYTES", "PREFORK_WORKERS", "PREFORK_PRELOAD",
+        "PREFORK_MEMORY_REPORT_INTERVAL_S",
+    )
+
+    def __init__(self):
+        self.model_name = os.getenv("PRIORITY_MODEL", "random_forest")
+        self.artifacts_dir = os.getenv("PRIORITY_ARTIFACTS_DIR", "artifacts")
+        # Poll loaded model artifacts and hot-swap changed ones; 0 disables
+        self.model_reload_interval_s = float(os.getenv("MODEL_RELOAD_INTERVAL_S", "0"))
+        # Models loaded and warmed in the background at startup; /ready waits for them
+        preload = [m.strip() for m in os.getenv("PRELOAD_MODELS", "").split(",") if m.strip()]
+        self.preload_models = preload or [self.model_name]
+        self.parallel_model_loading = _env_flag("PARALLEL_MODEL_LOADING", True)
+        # The "cascade" model: cheap-to-heavy models, and the top-class probability
+        # below which a row moves on to the next one
+        self.cascade_models = [m.strip() for m in os.getenv("CASCADE_MODELS", "").split(",") if m.strip()]
+        self.cascade_threshold = float(os.getenv("CASCADE_THRESHOLD", "0.5"))
+
+        # Opt-in micro-batching of concurrent single-item /predict calls; each flushed
+        # batch is one call on the inference executor, under the same admission
+        self.batching_enabled = _env_flag("PREDICT_BATCHING")
+        self.batch_max_size = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "32"))
+        self.batch_max_wait_ms = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "5"))
+        self.batch_queue_depth = int(os.getenv("PREDICT_BATCH_QUEUE_DEPTH", "1024"))
+
+        # Dedicated inference pool for the FastAPI app; excess requests get 503 + Retry-After
+        self.inference_workers = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.inference_queue_depth = int(os.getenv("INFERENCE_QUEUE_DEPTH", "64"))
+        self.inference_retry_after_s = float(os.getenv("INFERENCE_RETRY_AFTER_S", "1"))
+        # CPU budget per serving process (src.serving.threads): threads for large
+        # batches, 0 = this process's share of the CPUs; batches of at least
+        # PARALLEL_MIN_ROWS rows may use them, smaller ones run on one thread
+        self.inference_threads = int(os.getenv("INFERENCE_THREADS", "0"))
+        self.parallel_min_rows = int(os.getenv("PARALLEL_MIN_ROWS", "512"))
+        # Pin serving processes to CPUs: "auto" (one block per pre-fork worker) or a list like "0-3,8"
+        self.cpu_affinity = os.getenv("CPU_AFFINITY", "")
+
+        # Deadline budget (ms) for requests without an X-Request-Deadline-Ms header; 0 means none
+        self.default_deadline_ms = float(os.getenv("REQUEST_DEADLINE_MS", "0"))
+        # Scorers tried in order for requests that would miss their deadline: model
+        # names and/or "prior" (per category/location priority prior); empty disables
+        self.degraded_fallbacks = [
+            m.strip() for m in os.getenv("DEGRADED_FALLBACKS", "logistic_regression,prior").split(",") if m.strip()
+        ]
+
+        # Normalized prediction cache in front of PredictPipeline; size 0 disables it
+        self.cache_max_entries = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+        ttl = os.getenv("PREDICTION_CACHE_TTL_S")
+        self.cache_ttl_s = float(ttl) if ttl else None
+        # Per-description TF-IDF rows reused across models and categories/locations; 0 disables
+        self.tfidf_cache_mb = float(os.getenv("TFIDF_CACHE_MB", "32"))
+
+        # Shadow scoring (FastAPI): a candidate model scores a sampled fraction of
+        # answered requests on a low-priority background thread, compared with the
+        # live model; samples that find the queue full are dropped. Empty disables
+        self.shadow_model = os.getenv("SHADOW_MODEL", "")
+        self.shadow_sample_rate = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+        self.shadow_queue_depth = int(os.getenv("SHADOW_QUEUE_DEPTH", "64"))
+        self.shadow_max_rows = int(os.getenv("SHADOW_MAX_ROWS", "256"))
+
+        # Opt-in drift monitor over scored rows (inputs against priority_train.csv,
+        # predictions against the holdout split): rows per tumbling window and
+        # heavy-hitter counters kept per category/location
+        self.drift_monitoring = _env_flag("DRIFT_MONITORING")
+        self.drift_window_rows = int(os.getenv("DRIFT_WINDOW_ROWS", "10000"))
+        self.drift_top_k = int(os.getenv("DRIFT_TOP_K", "64"))
+
+        # Sampling profiler for scoring calls (src.serving.profiling), off unless a trigger
+        # is set: an "X-Profile: 1" request header (PROFILE_HEADER), every Nth call
+        # (PROFILE_SAMPLE_EVERY) or inference running past PROFILE_LATENCY_MS. Profiles
+        # (collapsed stacks plus stage timings) go to PROFILE_DIR, newest PROFILE_MAX_FILES kept
+        self.profile_header = _env_flag("PROFILE_HEADER")
+        self.profile_sample_every = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+        self.profile_latency_ms = float(os.getenv("PROFILE_LATENCY_MS", "0"))
+        self.profile_interval_ms = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+        self.profile_dir = os.getenv("PROFILE_DIR", "profiles")
+        self.profile_max_files = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+        # Rows scored per inference call by the NDJSON /predict/stream endpoint
+        self.stream_chunk_size = int(os.getenv("STREAM_CHUNK_SIZE", "256"))
+        # Longest accepted input line; longer ones are skipped and answered with an error line
+        self.stream_max_line_bytes = int(os.getenv("STREAM_MAX_LINE_BYTES", str(64 * 1024)))
+
+        # Pre-fork launcher (python -m src.serving.prefork): worker count, models
+        # loaded in the parent before forking, and seconds between memory reports
+        self.prefork_workers = int(os.getenv("PREFORK_WORKERS", str(os.cpu_count() or 1)))
+        self.prefork_preload = [m.strip() for m in os.getenv("PREFORK_PRELOAD", "").split(",") if m.strip()]
+        self.prefork_memory_report_interval_s = float(os.getenv("PREFORK_MEMORY_REPORT_INTERVAL_S", "60"))
@@ -0,0 +1,203 @@
+"""
+Deadline-aware admission for the inference executor.
+
+A request's budget comes from the ``X-Request-Deadline-Ms`` header (milliseconds
+from arrival) or the server default. Before queueing, the predicted wait for
+the work already admitted plus this request's own service time is compared
+with what is left of the budget; a request that cannot make it is answered by
+a cheap fallback scorer instead and marked as degraded. Work that is queued
+anyway re-checks its deadline when a worker picks it up and is dropped,
+without running inference, if the deadline has passed.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from src.serving.executor import BoundedExecutor
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+DEGRADED_HEADER = "X-Degraded"
+
+# Reasons reported in the degraded header and body
+DEGRADED_DEADLINE = "deadline"
+DEGRADED_OVERLOAD = "overload"
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised for queued work whose deadline passed before inference started.
+    """
+
+
+class Deadline:
+    """
+    Absolute deadline on the ``time.perf_counter`` clock (the clock the apps
+    stamp request arrival with).
+    """
+
+    def __init__(self, budget_s: float, start: Optional[float] = None):
+        self.budget_s = budget_s
+        self.expires_at = (time.perf_counter() if start is None else start) + budget_s
+
+    @classmethod
+    def from_header(cls, value: Optional[str], default_ms: float,
+                    start: Optional[float] = None) -> Optional["Deadline"]:
+        """
+        Deadline for a request, or None when it has no budget (no header and no
+        server default). Raises ValueError for a malformed header.
+        """
+        if value is not None and value.strip():
+            try:
+                budget_ms = float(value)
+            except ValueError:
+                budget_ms = float("nan")
+            if not budget_ms > 0 or budget_ms == float("inf"):
+                raise ValueError(f"{DEADLINE_HEADER} must be a positive number of milliseconds")
+        elif default_ms > 0:
+            budget_ms = default_ms
+        else:
+            return None
+        return cls(budget_ms / 1000.0, start)
+
+    def remaining(self) -> float:
+        return self.expires_at - time.perf_counter()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class ServiceTimeModel:
+    """
+    Per-model estimate of inference seconds as ``base + per_row * rows``: an
+    exponentially weighted least-squares fit over recent calls, so it follows
+    load and artifact changes. Until calls of two different sizes have been
+    seen the split between base and per-row cost is unknown, and the estimate
+    is the mean time per call whatever the size.
+    """
+
+    def __init__(self, decay: float = 0.95):
+        self.decay = decay
+        self._lock = threading.Lock()
+        # model -> [sum w, sum w*x, sum w*y, sum w*x*x, sum w*x*y]
+        self._sums: Dict[str, list] = {}
+        # model -> (smallest, largest) row count observed
+        self._sizes: Dict[str, tuple] = {}
+
+    def observe(self, model: str, rows: int, seconds: float) -> None:
+        with self._lock:
+            sums = self._sums.setdefault(model, [0.0] * 5)
+            smallest, largest = self._sizes.get(model, (rows, rows))
+            self._sizes[model] = (min(smallest, rows), max(largest, rows))
+            for k in range(5):
+                sums[k] *= self.decay
+            x = float(rows)
+            sums[0] += 1.0
+            sums[1] += x
+            sums[2] += seconds
+            sums[3] += x * x
+            sums[4] += x * seconds
+
+    def estimate(self, model: str, rows: int) -> Optional[float]:
+        """
+        Predicted seconds for ``rows`` rows, or None before any call was seen.
+        """
+        with self._lock:
+            sums = self._sums.get(model)
+            if sums is None:
+                return None
+            w, sx, sy, sxx, sxy = sums
+            smallest, largest = self._sizes[model]
+        denominator = w * sxx - sx * sx
+        # One batch size seen (or decayed to one): a single size cannot separate
+        # the fixed cost from the per-row cost, so do not extrapolate
+        if smallest == largest or denominator <= 1e-9 * max(w * sxx, 1.0):
+            return sy / w
+        per_row = max(0.0, (w * sxy - sx * sy) / denominator)
+        base = max(0.0, (sy - per_row * sx) / w)
+        return base + per_row * rows
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {model: {"one_row_s": self.estimate(model, 1), "hundred_rows_s": self.estimate(model, 100)}
+                for model in list(self._sums)}
+
+
+class AdmissionController:
+    """
+    Tracks the predicted seconds of work admitted to ``executor`` and runs
+    calls with a deadline check at dequeue time.
+    """
+
+    def __init__(self, executor: BoundedExecutor, service_times: Optional[ServiceTimeModel] = None):
+        self.executor = executor
+        self.service_times = service_times or ServiceTimeModel()
+        self._lock = threading.Lock()
+        self._backlog_s = 0.0
+        self._dropped = 0
+        self._degraded: Dict[str, int] = {}
+
+    def predicted_wait(self) -> float:
+        """
+        Seconds before newly admitted work is expected to start.
+        """
+        with self._lock:
+            return self._backlog_s / max(1, self.executor.max_workers)
+
+    def fits(self, deadline: Optional[Deadline], model: str, rows: int) -> bool:
+        """
+        Whether ``rows`` rows scored by ``model`` are expected to finish in time.
+        """
+        if deadline is None:
+            return True
+        estimate = self.service_times.estimate(model, rows)
+        return self.predicted_wait() + (estimate or 0.0) <= deadline.remaining()
+
+    def submit(self, model: str, rows: int, deadline: Optional[Deadline], fn: Callable[[], Any]) -> Future:
+        """
+        Queue ``fn()`` on the executor. The future fails with ``DeadlineExceeded``
+        if the deadline has passed when a worker picks it up; raises
+        ``ExecutorSaturated`` at once if the queue is full.
+        """
+        cost = self.service_times.estimate(model, rows) or 0.0
+
+        def _call() -> Any:
+            if deadline is not None and deadline.expired():
+                with self._lock:
+                    self._dropped += 1
+                raise DeadlineExceeded(f"Deadline passed after {deadline.budget_s * 1000:.0f}ms in the queue")
+            start = time.perf_counter()
+            result = fn()
+            self.service_times.observe(model, rows, time.perf_counter() - start)
+            return result
+
+        def _release(_: Any = None) -> None:
+            with self._lock:
+                self._backlog_s -= cost
+
+        with self._lock:
+            self._backlog_s += cost
+        try:
+            future = self.executor.submit(_call)
+        except BaseException:
+            _release()
+            raise
+        future.add_done_callback(_release)
+        return future
+
+    async def run(self, model: str, rows: int, deadline: Optional[Deadline], fn: Callable[[], Any]) -> Any:
+        """
+        Await ``fn()`` on the executor; see ``submit``.
+        """
+        return await asyncio.wrap_future(self.submit(model, rows, deadline, fn))
+
+    def record_degraded(self, reason: str) -> None:
+        with self._lock:
+            self._degraded[reason] = self._degraded.get(reason, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = {"predicted_wait_s": self._backlog_s / max(1, self.executor.max_workers),
+                                     "dropped": self._dropped, "degraded": dict(self._degraded)}
+        stats["service_time"] = self.service_times.stats()
+        return stats
@@ -0,0 +1,467 @@
+"""
+Streaming drift monitor for serving inputs and predictions.
+
+Every batch scored inside an ``observe_predictions(monitor)`` block updates
+fixed-size sketches of the current window of ``window_rows`` rows:
+
+- Space-Saving heavy hitters (``top_k`` counters) of category and location,
+  plus the exact share of values the fitted ``OneHotEncoder`` has never seen
+  (they are silently ignored by ``handle_unknown="ignore"``);
+- the out-of-vocabulary token rate of short_description under the fitted
+  ``TfidfVectorizer`` analyzer, and the share of descriptions with no
+  vocabulary token at all (checked for at most ``text_rows`` distinct
+  descriptions per batch, through a bounded per-description cache);
+- per model, a histogram of top-class confidence and the predicted class mix.
+
+``report()`` compares the current and the last complete window with a
+baseline: input distributions from ``priority_train.csv``, and each model's
+confidence and class mix on the holdout split (``priority_test.csv``; a
+model's confidence on its own training rows would overstate it). Drift is
+scored as the population stability index (PSI); above 0.2 is usually read
+as a significant shift.
+
+A model's holdout baseline is scored on a background thread the first time
+a batch from a new model or artifact version is observed, with the caches
+bypassed, so neither a request nor /metrics waits for it; until it is ready
+the report marks that model's baseline as pending.
+"""
+import csv
+import os
+import sys
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.predict_pipeline import REQUIRED_COLUMNS, IssueBatch, bypass_caches, observe_predictions
+from src.serving.metrics import stats_gauges
+
+# Values outside the tracked heavy hitters, in shares and PSI
+OTHER = "__other__"
+# Added to every share before taking the PSI's logarithm
+PSI_EPSILON = 1e-4
+
+
+def psi(live: Dict[str, float], baseline: Dict[str, float]) -> float:
+    """
+    Population stability index between two distributions given as
+    ``{value: count or share}``, over the union of their values.
+    """
+    keys = set(live) | set(baseline)
+    live_total = sum(live.values()) or 1.0
+    baseline_total = sum(baseline.values()) or 1.0
+    score = 0.0
+    for key in keys:
+        a = live.get(key, 0.0) / live_total + PSI_EPSILON
+        b = baseline.get(key, 0.0) / baseline_total + PSI_EPSILON
+        score += (a - b) * np.log(a / b)
+    return float(score)
+
+
+def histogram_quantiles(counts: np.ndarray, quantiles=(0.1, 0.5, 0.9)) -> Dict[str, Optional[float]]:
+    """
+    Quantiles of values in [0, 1] from equal-width bin counts, interpolated within bins.
+    """
+    total = counts.sum()
+    if not total:
+        return {f"p{int(q * 100)}": None for q in quantiles}
+    edges = np.linspace(0.0, 1.0, len(counts) + 1)
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)]) / total
+    return {f"p{int(q * 100)}": float(np.interp(q, cumulative, edges)) for q in quantiles}
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters: at most ``capacity`` counters, each count an
+    overestimate by at most its ``error``. Any value with more than
+    ``total / capacity`` occurrences is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.total = 0
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, value: str, count: int = 1) -> None:
+        self.total += count
+        if value in self.counts:
+            self.counts[value] += count
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[value] = count
+            self.errors[value] = 0
+            return
+        # Replace the smallest counter; its count is the new value's error bound
+        victim = min(self.counts, key=self.counts.__getitem__)
+        floor = self.counts.pop(victim)
+        del self.errors[victim]
+        self.counts[value] = floor + count
+        self.errors[value] = floor
+
+    def shares(self) -> Dict[str, float]:
+        """
+        Tracked values' counts plus the remainder under ``OTHER``, summing to ``total``.
+        """
+        shares: Dict[str, float] = dict(self.counts)
+        other = self.total - sum(self.counts.values())
+        if other > 0:
+            shares[OTHER] = other
+        return shares
+
+    def top(self, n: int) -> List[Tuple[str, int, int]]:
+        ranked = sorted(self.counts.items(), key=lambda kv: -kv[1])[:n]
+        return [(value, count, self.errors[value]) for value, count in ranked]
+
+
+class Vocabulary:
+    """
+    Tokens of a description under the fitted vectorizer's analyzer, and how
+    many fall outside its vocabulary; cached per description (LRU).
+    """
+
+    def __init__(self, vectorizer, max_entries: int = 4096):
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+
+    def check(self, description: str) -> Tuple[int, int]:
+        """
+        ``(tokens, out_of_vocabulary_tokens)`` of ``description``.
+        """
+        with self._lock:
+            counts = self._cache.get(description)
+            if counts is not None:
+                self._cache.move_to_end(description)
+                return counts
+        tokens = self.analyzer(description)
+        counts = (len(tokens), sum(token not in self.vocabulary for token in tokens))
+        with self._lock:
+            self._cache[description] = counts
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return counts
+
+
+class _PredictionSketch:
+    def __init__(self, bins: int):
+        self.rows = 0
+        self.confidence = np.zeros(bins)
+        self.classes: Dict[str, float] = {}
+
+
+class _Window:
+    """
+    Sketches of one window of scored rows.
+    """
+
+    def __init__(self, top_k: int, bins: int):
+        self.bins = bins
+        self.rows = 0
+        self.category = SpaceSaving(top_k)
+        self.location = SpaceSaving(top_k)
+        self.unknown = {"category": 0, "location": 0}
+        # Rows whose description was checked against the vocabulary
+        self.text_rows = 0
+        self.tokens = 0
+        self.oov_tokens = 0
+        self.no_vocabulary_rows = 0
+        self.predictions: Dict[str, _PredictionSketch] = {}
+
+    def prediction(self, model: str) -> _PredictionSketch:
+        sketch = self.predictions.get(model)
+        if sketch is None:
+            sketch = self.predictions[model] = _PredictionSketch(self.bins)
+        return sketch
+
+
+class DriftBaseline:
+    """
+    Reference distributions: inputs of the training split, and each model's
+    predictions on the holdout split (``compute_predictions``, per artifact version).
+    """
+
+    def __init__(self, category: Dict[str, float], location: Dict[str, float], oov_token_rate: Optional[float],
+                 no_vocabulary_rate: Optional[float], holdout: Optional[IssueBatch], bins: int):
+        self.category = category
+        self.location = location
+        self.oov_token_rate = oov_token_rate
+        self.no_vocabulary_rate = no_vocabulary_rate
+        self.holdout = holdout
+        self.bins = bins
+        self._lock = threading.Lock()
+        self._predictions: Dict[str, Tuple[Any, _PredictionSketch]] = {}
+
+    @classmethod
+    def from_csv(cls, train_path: str, holdout_path: Optional[str], vocabulary: Optional[Vocabulary],
+                 bins: int) -> "DriftBaseline":
+        try:
+            rows = _read_issues(train_path)
+            tokens = oov = no_vocabulary = 0
+            if vocabulary is not None:
+                for description in rows.short_description:
+                    n, n_oov = vocabulary.check(description)
+                    tokens += n
+                    oov += n_oov
+                    no_vocabulary += n == n_oov
+            holdout = _read_issues(holdout_path) if holdout_path and os.path.exists(holdout_path) else None
+            baseline = cls(
+                dict(Counter(rows.category)),
+                dict(Counter(rows.location)),
+                oov / tokens if vocabulary is not None and tokens else None,
+                no_vocabulary / len(rows) if vocabulary is not None and len(rows) else None,
+                holdout,
+                bins,
+            )
+            logging.info(f"✓ Drift baseline built from {train_path} ({len(rows)} rows)")
+            return baseline
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def has_holdout(self) -> bool:
+        return self.holdout is not None and len(self.holdout) > 0
+
+    def predictions(self, model: str) -> Tuple[Any, Optional[_PredictionSketch]]:
+        """
+        ``(artifact_version, sketch)`` of the last holdout baseline computed
+        for ``model``, or ``(None, None)``.
+        """
+        with self._lock:
+            return self._predictions.get(model, (None, None))
+
+    def compute_predictions(self, pipeline) -> Optional[_PredictionSketch]:
+        """
+        Score the holdout split with ``pipeline`` and keep its confidence
+        histogram and class mix. The caches and observers are bypassed, so the
+        holdout rows neither fill the caches nor count as traffic.
+        """
+        if not self.has_holdout():
+            return None
+        with observe_predictions(None), bypass_caches():
+            proba = pipeline.predict_proba_many(self.holdout)
+        sketch = _PredictionSketch(self.bins)
+        _add_predictions(sketch, proba, np.ones(len(proba)), pipeline.class_names)
+        with self._lock:
+            self._predictions[pipeline.model_name] = (pipeline.artifact_version, sketch)
+        return sketch
+
+
+def _read_issues(path: str) -> IssueBatch:
+    columns: List[List[str]] = [[] for _ in REQUIRED_COLUMNS]
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for values, column in zip(columns, REQUIRED_COLUMNS):
+                values.append(row[column])
+    return IssueBatch(*columns)
+
+
+def _add_predictions(sketch: _PredictionSketch, proba: np.ndarray, weights: np.ndarray,
+                     class_names: List[str]) -> None:
+    bins = len(sketch.confidence)
+    confidence_bin = np.minimum((proba.max(axis=1) * bins).astype(np.intp), bins - 1)
+    sketch.confidence += np.bincount(confidence_bin, weights=weights, minlength=bins)
+    class_counts = np.bincount(proba.argmax(axis=1), weights=weights, minlength=len(class_names))
+    for name, count in zip(class_names, class_counts.tolist()):
+        sketch.classes[name] = sketch.classes.get(name, 0.0) + count
+    sketch.rows += int(weights.sum())
+
+
+class DriftMonitor:
+    """
+    Bounded-memory drift sketches over tumbling windows of ``window_rows`` rows.
+    ``known_values`` maps category/location to the encoder's fitted values.
+    """
+
+    def __init__(self, baseline: DriftBaseline, vocabulary: Optional[Vocabulary] = None,
+                 known_values: Optional[Dict[str, set]] = None, window_rows: int = 10000,
+                 top_k: int = 64, text_rows: int = 64):
+        self.baseline = baseline
+        self.vocabulary = vocabulary
+        self.known_values = known_values or {}
+        self.window_rows = window_rows
+        self.top_k = top_k
+        self.text_rows = text_rows
+        self._lock = threading.Lock()
+        # (model, artifact version) pairs whose holdout baseline is being computed
+        self._baselines_pending: set = set()
+        self._current = _Window(top_k, baseline.bins)
+        self._previous: Optional[_Window] = None
+        self._windows = 0
+
+    @classmethod
+    def from_artifacts(cls, artifacts_dir: str = "artifacts", window_rows: int = 10000, top_k: int = 64,
+                       bins: int = 20) -> Optional["DriftMonitor"]:
+        """
+        A monitor with the baseline of ``artifacts_dir``, or None without priority_train.csv.
+        """
+        train_path = os.path.join(artifacts_dir, "priority_train.csv")
+        if not os.path.exists(train_path):
+            return None
+        vocabulary = None
+        known_values: Dict[str, set] = {}
+        preprocessor_path = os.path.join(artifacts_dir, "preprocessors", "preprocessor.pkl")
+        if os.path.exists(preprocessor_path):
+            from src.utils.utils import load_object
+
+            for name, transformer, columns in load_object(preprocessor_path).transformers_:
+                if hasattr(transformer, "vocabulary_"):
+                    vocabulary = Vocabulary(transformer)
+                elif hasattr(transformer, "categories_"):
+                    for column, values in zip(columns, transformer.categories_):
+                        known_values[column] = set(values.tolist())
+        baseline = DriftBaseline.from_csv(train_path, os.path.join(artifacts_dir, "priority_test.csv"),
+                                          vocabulary, bins)
+        return cls(baseline, vocabulary, known_values, window_rows, top_k)
+
+    def observe(self, pipeline, batch: IssueBatch, codes: np.ndarray, unique_proba: np.ndarray) -> None:
+        """
+        Add a scored batch: ``unique_proba[codes[i]]`` are row ``i``'s probabilities.
+        """
+        n = len(batch)
+        if not n:
+            return
+        weights = np.bincount(codes, minlength=len(unique_proba)).astype(float)
+        inputs = {"category": Counter(batch.category), "location": Counter(batch.location)}
+        descriptions = Counter(batch.short_description)
+        text = []
+        if self.vocabulary is not None:
+            sample = list(descriptions.items())
+            if len(sample) > self.text_rows:
+                sample = sample[:: -(-len(sample) // self.text_rows)]
+            text = [(self.vocabulary.check(description), count) for description, count in sample]
+
+        with self._lock:
+            window = self._current
+            window.rows += n
+            for column, counts in inputs.items():
+                sketch = getattr(window, column)
+                known = self.known_values.get(column)
+                for value, count in counts.items():
+                    sketch.add(value, count)
+                    if known is not None and value not in known:
+                        window.unknown[column] += count
+            for (tokens, oov), count in text:
+                window.text_rows += count
+                window.tokens += tokens * count
+                window.oov_tokens += oov * count
+                window.no_vocabulary_rows += count if tokens == oov else 0
+            _add_predictions(window.prediction(pipeline.model_name), unique_proba, weights, pipeline.class_names)
+            if window.rows >= self.window_rows:
+                self._previous = window
+                self._current = _Window(self.top_k, self.baseline.bins)
+                self._windows += 1
+        self._ensure_baseline(pipeline)
+
+    def _ensure_baseline(self, pipeline) -> None:
+        if not self.baseline.has_holdout():
+            return
+        version, _ = self.baseline.predictions(pipeline.model_name)
+        if version == pipeline.artifact_version:
+            return
+        key = (pipeline.model_name, pipeline.artifact_version)
+        with self._lock:
+            if key in self._baselines_pending:
+                return
+            self._baselines_pending.add(key)
+
+        def _compute() -> None:
+            try:
+                self.baseline.compute_predictions(pipeline)
+                logging.info(f"✓ Drift baseline for model {pipeline.model_name} computed on the holdout split")
+            except Exception as e:
+                logging.warning(f"No drift baseline for model {pipeline.model_name}: {e}")
+            finally:
+                with self._lock:
+                    self._baselines_pending.discard(key)
+
+        threading.Thread(target=_compute, name=f"drift-baseline-{pipeline.model_name}", daemon=True).start()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Drift scores of the current window and of the last complete one.
+        """
+        with self._lock:
+            # Completed windows are never written again; the current one is summarized under the lock
+            current = self._summarize(self._current)
+            previous = self._previous
+            windows = self._windows
+        report: Dict[str, Any] = {"window_rows": self.window_rows, "completed_windows": windows,
+                                  "current": self._score(current)}
+        report["previous"] = self._score(self._summarize(previous)) if previous is not None else None
+        return report
+
+    def _summarize(self, window: _Window) -> Dict[str, Any]:
+        return {
+            "rows": window.rows,
+            "category": (window.category.shares(), window.category.top(10), window.unknown["category"]),
+            "location": (window.location.shares(), window.location.top(10), window.unknown["location"]),
+            "text": (window.text_rows, window.tokens, window.oov_tokens, window.no_vocabulary_rows),
+            "predictions": {model: (sketch.rows, sketch.confidence.copy(), dict(sketch.classes))
+                            for model, sketch in window.predictions.items()},
+        }
+
+    def _score(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        rows = summary["rows"]
+        scores: Dict[str, Any] = {"rows": rows}
+        for column in ("category", "location"):
+            shares, top, unknown = summary[column]
+            baseline = getattr(self.baseline, column)
+            baseline_total = sum(baseline.values()) or 1
+            # Baseline values outside the live heavy hitters are compared as OTHER too
+            folded: Dict[str, float] = {}
+            for value, count in baseline.items():
+                key = value if value in shares else OTHER
+                folded[key] = folded.get(key, 0.0) + count
+            scores[column] = {
+                "psi": psi(shares, folded) if rows else None,
+                "unknown_rate": unknown / rows if rows else None,
+                "top": [{"value": value, "count": count, "error": error,
+                         "baseline_share": baseline.get(value, 0) / baseline_total}
+                        for value, count, error in top],
+            }
+        text_rows, tokens, oov, no_vocabulary = summary["text"]
+        scores["description"] = {
+            "oov_token_rate": oov / tokens if tokens else None,
+            "baseline_oov_token_rate": self.baseline.oov_token_rate,
+            "no_vocabulary_rate": no_vocabulary / text_rows if text_rows else None,
+            "baseline_no_vocabulary_rate": self.baseline.no_vocabulary_rate,
+        }
+        scores["predictions"] = {}
+        for model, (model_rows, confidence, classes) in summary["predictions"].items():
+            scored: Dict[str, Any] = {
+                "rows": model_rows,
+                "confidence_quantiles": histogram_quantiles(confidence),
+                "class_mix": {name: count / model_rows for name, count in classes.items()},
+            }
+            _, baseline = self.baseline.predictions(model)
+            if baseline is None:
+                scored["baseline_pending"] = self.baseline.has_holdout()
+            else:
+                edges = {str(k): count for k, count in enumerate(confidence.tolist())}
+                baseline_edges = {str(k): count for k, count in enumerate(baseline.confidence.tolist())}
+                scored["confidence_psi"] = psi(edges, baseline_edges)
+                scored["baseline_confidence_quantiles"] = histogram_quantiles(baseline.confidence)
+                scored["class_mix_psi"] = psi(classes, baseline.classes)
+                scored["baseline_class_mix"] = {name: count / baseline.rows for name, count in baseline.classes.items()}
+            scores["predictions"][model] = scored
+        return scores
+
+    def metric_lines(self, prefix: str = "civic_drift") -> List[str]:
+        """
+        The current window's scores as gauges for /metrics.
+        """
+        current = self.report()["current"]
+        flat: Dict[str, Any] = {"rows": current["rows"]}
+        for column in ("category", "location"):
+            flat[f"{column}_psi"] = current[column]["psi"]
+            flat[f"{column}_unknown_rate"] = current[column]["unknown_rate"]
+        flat.update(current["description"])
+        lines = stats_gauges(prefix, flat)
+        for model, scored in current["predictions"].items():
+            lines += stats_gauges(prefix, scored, {"model": model})
+        return lines
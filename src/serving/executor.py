@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturated(Exception):
+    """
+    Raised when the inference executor's admission queue is full.
+    """
+    def __init__(self, retry_after: float):
+        super().__init__("Inference queue is full, retry later")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Dedicated, size-limited thread pool for model inference.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more may
+    wait for a worker; anything beyond that is rejected immediately with
+    ``ExecutorSaturated`` instead of piling up behind slow batches.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: float = 1.0,
+                 name: str = "inference"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorSaturated(self.retry_after)
+        with self._lock:
+            self._admitted += 1
+
+        def _call():
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._admitted -= 1
+                    self._completed += 1
+                self._slots.release()
+
+        try:
+            return self._pool.submit(_call)
+        except Exception:
+            with self._lock:
+                self._admitted -= 1
+            self._slots.release()
+            raise
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Await ``fn(*args, **kwargs)`` on the pool without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._admitted - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,448 @@
+"""
+HTTP load test for the scoring apps.
+
+    python -m src.serving.loadtest --app fastapi --models random_forest,logistic_regression \\
+        --endpoints predict,batch,rank --batch-sizes 1,32,256 --concurrency 1,8 \\
+        --duration 10 --output loadtest.json
+
+``--app`` serves backend/api.py (uvicorn) or backend/flask_api.py (werkzeug)
+from a thread of this process on a free localhost port; ``--url`` drives a
+server that is already running instead. In-process runs share the GIL with the
+client threads, so use them to compare builds and ``--url`` for absolute
+numbers. Request bodies are issues sampled from Dummy_DataSet.csv, with every
+description made unique (``--no-cache-bust`` sends them as they are) so the
+server's caches do not answer repeats.
+
+Every scenario (model x endpoint x batch size x concurrency) reports
+throughput, p50/p95/p99 latency and the hit rates of the server's caches
+while it ran. The JSON written to ``--output`` can be
+passed back as ``--baseline`` to print the change against an earlier run.
+"""
+import argparse
+import csv
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from src.pipeline.predict_pipeline import REQUIRED_COLUMNS
+from src.serving.config import ServingConfig
+
+ENDPOINTS = {"predict": "/predict", "batch": "/predict/batch", "rank": "/rank"}
+APPS = ("fastapi", "flask")
+DEFAULT_DATASET = os.path.join("notebooks", "data", "raw", "Dummy_DataSet.csv")
+
+# Environment that changes serving behaviour, recorded with every run: all of
+# ServingConfig plus the native thread pool sizes
+_NATIVE_THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+# /health sections whose hit rates are recorded per scenario
+_CACHE_SECTIONS = ("cache", "tfidf_cache")
+
+
+def load_issues(path: str = DEFAULT_DATASET) -> List[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        issues = [{column: row.get(column) or "" for column in REQUIRED_COLUMNS} for row in csv.DictReader(f)]
+    issues = [issue for issue in issues if all(issue.values())]
+    if not issues:
+        raise ValueError(f"No complete issues in {path}")
+    return issues
+
+
+class PayloadFactory:
+    """
+    Request bodies of ``batch_size`` issues sampled from the dataset (a single
+    issue object for /predict). With ``cache_bust`` every description gets a
+    unique token, which the TF-IDF vocabulary ignores but the prediction cache
+    does not, so each row is really scored.
+    """
+
+    def __init__(self, issues: List[Dict[str, str]], batch_size: Optional[int], columnar: bool = False,
+                 cache_bust: bool = True, seed: int = 0):
+        self.issues = issues
+        self.batch_size = batch_size
+        self.columnar = columnar
+        self.cache_bust = cache_bust
+        self._rng = random.Random(seed)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def body(self) -> bytes:
+        with self._lock:
+            sample = [self._rng.choice(self.issues) for _ in range(self.batch_size or 1)]
+            serial = next(self._counter)
+        if self.cache_bust:
+            sample = [{**issue, "short_description": f"{issue['short_description']} lt{serial}x{k}"}
+                      for k, issue in enumerate(sample)]
+        if self.batch_size is None:
+            payload: Any = sample[0]
+        elif self.columnar:
+            payload = {column: [issue[column] for issue in sample] for column in REQUIRED_COLUMNS}
+        else:
+            payload = sample
+        return json.dumps(payload).encode("utf-8")
+
+
+class InProcessServer:
+    """
+    One of the apps served from a daemon thread on 127.0.0.1.
+    """
+
+    def __init__(self, app: str):
+        if app not in APPS:
+            raise ValueError(f"app must be one of {APPS}, got {app!r}")
+        self.app = app
+        self.port = _free_port()
+        self._server: Any = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> str:
+        if self.app == "fastapi":
+            import uvicorn
+
+            from backend.api import create_app
+
+            config = uvicorn.Config(create_app(), host="127.0.0.1", port=self.port,
+                                    log_level="warning", access_log=False)
+            self._server = uvicorn.Server(config)
+            target = self._server.run
+        else:
+            import logging as std_logging
+
+            from werkzeug.serving import make_server
+
+            from backend.flask_api import create_app
+
+            std_logging.getLogger("werkzeug").setLevel(std_logging.WARNING)
+            self._server = make_server("127.0.0.1", self.port, create_app(), threaded=True)
+            target = self._server.serve_forever
+        self._thread = threading.Thread(target=target, name=f"loadtest-{self.app}", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        if self.app == "fastapi":
+            self._server.should_exit = True
+        else:
+            self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Client:
+    """
+    Keep-alive HTTP/1.1 connection to the target, reopened after errors.
+    """
+
+    def __init__(self, url: str, timeout: float = 60.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            self._conn.request(method, path, body=body, headers=headers)
+            response = self._conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def wait_ready(url: str, timeout_s: float = 120.0) -> None:
+    """
+    Poll /ready until the server answers 200 (404 means it predates /ready).
+    """
+    client = Client(url, timeout=5.0)
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            status, _ = client.request("GET", "/ready")
+            if status in (200, 404):
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{url} was not ready after {timeout_s:.0f}s")
+        time.sleep(0.2)
+
+
+def served_models(url: str) -> List[str]:
+    """
+    Single (non-composite) models the target can serve, from /admin/models.
+    """
+    status, body = Client(url).request("GET", "/admin/models")
+    if status != 200:
+        raise RuntimeError(f"GET /admin/models returned {status}")
+    models = json.loads(body)["models"]
+    return [name for name, info in models.items() if "members" not in info]
+
+
+def cache_counters(url: str) -> Dict[str, Tuple[int, int]]:
+    """
+    ``(hits, misses)`` of each cache the target reports in /health.
+    """
+    client = Client(url, timeout=5.0)
+    try:
+        status, body = client.request("GET", "/health")
+    except (OSError, http.client.HTTPException):
+        return {}
+    finally:
+        client.close()
+    if status != 200:
+        return {}
+    health = json.loads(body)
+    return {name: (health[name]["hits"], health[name]["misses"]) for name in _CACHE_SECTIONS if name in health}
+
+
+def _hit_rates(before: Dict[str, Tuple[int, int]], after: Dict[str, Tuple[int, int]]) -> Dict[str, Any]:
+    rates: Dict[str, Any] = {}
+    for name, (hits, misses) in after.items():
+        hits_before, misses_before = before.get(name, (0, 0))
+        lookups = hits - hits_before + misses - misses_before
+        rates[name] = round((hits - hits_before) / lookups, 4) if lookups > 0 else None
+    return rates
+
+
+def run_scenario(url: str, path: str, payloads: PayloadFactory, concurrency: int,
+                 requests: Optional[int] = None, duration_s: Optional[float] = None,
+                 warmup: int = 5) -> Dict[str, Any]:
+    """
+    Drive ``path`` from ``concurrency`` threads until ``requests`` have been
+    sent or ``duration_s`` has passed; returns latency and throughput figures
+    and the cache hit rates over the measured requests (from /health, so
+    other traffic to the target counts too).
+    """
+    if requests is None and duration_s is None:
+        raise ValueError("Give a request count or a duration")
+    warm = Client(url)
+    for _ in range(warmup):
+        warm.request("POST", path, payloads.body())
+    warm.close()
+    counters = cache_counters(url)
+
+    issued = itertools.count()
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    statuses: List[Dict[str, int]] = [{} for _ in range(concurrency)]
+    start = time.perf_counter()
+    deadline = start + duration_s if duration_s is not None else None
+
+    def _worker(slot: int) -> None:
+        client = Client(url)
+        while True:
+            if requests is not None and next(issued) >= requests:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            body = payloads.body()
+            sent = time.perf_counter()
+            try:
+                status, _ = client.request("POST", path, body)
+                key = str(status)
+            except (OSError, http.client.HTTPException) as e:
+                status, key = 0, type(e).__name__
+            if status == 200:
+                latencies[slot].append((time.perf_counter() - sent) * 1000.0)
+            statuses[slot][key] = statuses[slot].get(key, 0) + 1
+        client.close()
+
+    threads = [threading.Thread(target=_worker, args=(slot,), daemon=True) for slot in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    hit_rates = _hit_rates(counters, cache_counters(url))
+
+    latency = np.asarray([ms for per_thread in latencies for ms in per_thread])
+    counts: Dict[str, int] = {}
+    for per_thread in statuses:
+        for key, n in per_thread.items():
+            counts[key] = counts.get(key, 0) + n
+    ok = len(latency)
+    rows = payloads.batch_size or 1
+    result: Dict[str, Any] = {
+        "requests": sum(counts.values()),
+        "ok": ok,
+        "errors": {key: n for key, n in sorted(counts.items()) if key != "200"},
+        "duration_s": round(wall, 4),
+        "throughput_rps": round(ok / wall, 2) if wall > 0 else 0.0,
+        "rows_per_s": round(ok * rows / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": None,
+        "cache_hit_rate": hit_rates,
+    }
+    if ok:
+        p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+        result["latency_ms"] = {"mean": round(float(latency.mean()), 3), "p50": round(float(p50), 3),
+                                "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+                                "max": round(float(latency.max()), 3)}
+    return result
+
+
+def scenario_key(result: Dict[str, Any]) -> Tuple:
+    return result["model"], result["endpoint"], result["batch_size"], result["concurrency"]
+
+
+def run_meta(args: argparse.Namespace, url: str) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "target": url,
+        "app": args.app if not args.url else None,
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "env": {k: os.environ[k] for k in ServingConfig.ENV_NAMES + _NATIVE_THREAD_ENV if k in os.environ},
+        "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+    }
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    latency = result["latency_ms"] or {}
+    errors = sum(result["errors"].values())
+    hit_rate = (result.get("cache_hit_rate") or {}).get("cache")
+    return (f"{result['model']:<20}{result['endpoint']:<8}{result['batch_size']:>6}{result['concurrency']:>5}"
+            f"{result['throughput_rps']:>10.1f}{result['rows_per_s']:>11.1f}"
+            f"{latency.get('p50', float('nan')):>9.2f}{latency.get('p95', float('nan')):>9.2f}"
+            f"{latency.get('p99', float('nan')):>9.2f}{errors:>7}"
+            f"{f'{hit_rate * 100:.1f}' if hit_rate is not None else '-':>8}")
+
+
+HEADER = (f"{'model':<20}{'endpoint':<8}{'batch':>6}{'conc':>5}{'req/s':>10}{'rows/s':>11}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>7}{'hit %':>8}")
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Per-scenario change of throughput and p50/p99 latency against a previous run.
+    """
+    previous = {scenario_key(r): r for r in baseline.get("results", [])}
+    lines = [f"{'model':<20}{'endpoint':<8}{'batch':>6}{'conc':>5}{'req/s':>10}{'p50':>9}{'p99':>9}"]
+    for result in results:
+        before = previous.get(scenario_key(result))
+        if before is None or not before.get("latency_ms") or not result["latency_ms"]:
+            continue
+
+        def _change(new: float, old: float) -> str:
+            return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+        lines.append(
+            f"{result['model']:<20}{result['endpoint']:<8}{result['batch_size']:>6}{result['concurrency']:>5}"
+            f"{_change(result['throughput_rps'], before['throughput_rps']):>10}"
+            f"{_change(result['latency_ms']['p50'], before['latency_ms']['p50']):>9}"
+            f"{_change(result['latency_ms']['p99'], before['latency_ms']['p99']):>9}"
+        )
+    return lines
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the priority scoring API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--app", choices=APPS, default="fastapi", help="serve this app in-process (default)")
+    target.add_argument("--url", help="drive a running server instead, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--models", help="comma-separated models (default: every single model the server has)")
+    parser.add_argument("--endpoints", default="predict,batch,rank",
+                        help=f"comma-separated subset of {','.join(ENDPOINTS)}")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[32],
+                        help="issues per /predict/batch and /rank request (comma-separated)")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4], help="client threads (comma-separated)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--duration", type=float, help="seconds per scenario (overrides --requests)")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests before each scenario")
+    parser.add_argument("--columnar", action="store_true", help="send batches as columnar JSON")
+    parser.add_argument("--cache-bust", action=argparse.BooleanOptionalAction, default=True,
+                        help="make every description unique so cached results are not measured (default)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    args = parser.parse_args(argv)
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints {unknown}; choose from {list(ENDPOINTS)}")
+    issues = load_issues(args.dataset)
+
+    server = None
+    url = args.url
+    if url is None:
+        server = InProcessServer(args.app)
+        url = server.start()
+    try:
+        wait_ready(url)
+        models = [m.strip() for m in args.models.split(",") if m.strip()] if args.models else served_models(url)
+        meta = run_meta(args, url)
+        print(f"Load testing {url}: models {models}, endpoints {endpoints}", flush=True)
+        print(HEADER, flush=True)
+        results: List[Dict[str, Any]] = []
+        for model, endpoint, concurrency in itertools.product(models, endpoints, args.concurrency):
+            batch_sizes: List[Optional[int]] = [None] if endpoint == "predict" else list(args.batch_sizes)
+            for batch_size in batch_sizes:
+                query = {"model": model}
+                if args.columnar and endpoint == "batch":
+                    query["format"] = "columnar"
+                payloads = PayloadFactory(issues, batch_size, columnar=args.columnar and batch_size is not None,
+                                          cache_bust=args.cache_bust, seed=args.seed)
+                result = {"model": model, "endpoint": endpoint, "batch_size": batch_size or 1,
+                          "concurrency": concurrency}
+                result.update(run_scenario(url, f"{ENDPOINTS[endpoint]}?{urlencode(query)}", payloads, concurrency,
+                                           requests=None if args.duration else args.requests,
+                                           duration_s=args.duration, warmup=args.warmup))
+                results.append(result)
+                print(format_result(result), flush=True)
+    finally:
+        if server is not None:
+            server.stop()
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+    print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            print("\n".join(compare(results, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
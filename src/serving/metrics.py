@@ -0,0 +1,201 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition format served by /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative) + overflow, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1])) for key, state in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class ServingMetrics:
+    """
+    Request, per-stage inference and batch-size metrics for the scoring apps.
+
+    Stages come from ``src.pipeline.predict_pipeline.record_stages``: request
+    parsing, DataFrame construction, the ColumnTransformer, the classifier,
+    label decoding, drift monitoring and response serialization. Every update is a dict lookup
+    and an add under a lock.
+    """
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "civic_request_seconds", "End-to-end scoring request latency.", ("endpoint", "model"))
+        self.stage_seconds = Histogram(
+            "civic_inference_stage_seconds", "Time spent in each inference stage.",
+            ("stage", "endpoint", "model"))
+        self.batch_size = Histogram(
+            "civic_batch_size", "Rows scored per inference call.", ("endpoint", "model"),
+            buckets=BATCH_SIZE_BUCKETS)
+        self.in_flight = Gauge(
+            "civic_requests_in_flight", "Scoring requests currently being handled.", ("endpoint",))
+        self.requests = Counter(
+            "civic_requests_total", "Scoring requests handled.", ("endpoint", "model", "status"))
+        self.errors = Counter(
+            "civic_request_errors_total", "Scoring requests that failed.", ("endpoint", "model", "status"))
+        self.degraded = Counter(
+            "civic_degraded_responses_total", "Requests answered by a fallback scorer.",
+            ("endpoint", "model", "reason", "fallback"))
+        self.deadline_dropped = Counter(
+            "civic_deadline_dropped_total", "Queued requests dropped because their deadline passed.",
+            ("endpoint", "model"))
+        self._metrics = [self.request_seconds, self.stage_seconds, self.batch_size,
+                         self.in_flight, self.requests, self.errors, self.degraded, self.deadline_dropped]
+
+    @contextmanager
+    def track(self, endpoint: str, model: str) -> Iterator[None]:
+        """
+        Time a request and count it; exceptions are counted as errors using
+        their ``status_code`` attribute (HTTPException) or 500.
+        """
+        start = self.request_started(endpoint)
+        status = "200"
+        try:
+            yield
+        except BaseException as e:
+            status = str(getattr(e, "status_code", None) or 500)
+            raise
+        finally:
+            self.request_finished(endpoint, model, status, start)
+
+    def request_started(self, endpoint: str) -> float:
+        self.in_flight.inc(endpoint=endpoint)
+        return time.perf_counter()
+
+    def request_finished(self, endpoint: str, model: str, status, started_at: float) -> None:
+        status = str(status)
+        self.in_flight.dec(endpoint=endpoint)
+        self.request_seconds.observe(time.perf_counter() - started_at, endpoint=endpoint, model=model)
+        self.requests.inc(endpoint=endpoint, model=model, status=status)
+        if not status.startswith("2"):
+            self.errors.inc(endpoint=endpoint, model=model, status=status)
+
+    def observe_stages(self, endpoint: str, model: str, timings: Dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            self.stage_seconds.observe(seconds, stage=stage, endpoint=endpoint, model=model)
+
+    def observe_batch(self, endpoint: str, model: str, size: int) -> None:
+        self.batch_size.observe(size, endpoint=endpoint, model=model)
+
+    def observe_degraded(self, endpoint: str, model: str, reason: str, fallback: str) -> None:
+        self.degraded.inc(endpoint=endpoint, model=model, reason=reason, fallback=fallback)
+
+    def observe_deadline_dropped(self, endpoint: str, model: str) -> None:
+        self.deadline_dropped.inc(endpoint=endpoint, model=model)
+
+    def render(self, extra: Optional[List[str]] = None) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines + (extra or [])) + "\n"
+
+
+def stats_gauges(prefix: str, stats: Dict[str, object], labels: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Expose the numeric fields of a component's ``stats()`` dict as untyped gauges.
+    """
+    names = tuple(labels or ())
+    values = tuple((labels or {}).values())
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"{prefix}_{key}{_format_labels(names, values)} {_format_value(value)}")
+    return lines
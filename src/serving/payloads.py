@@ -0,0 +1,255 @@
+"""
+Wire formats for the batch scoring endpoints.
+
+Issues can be sent as
+
+    application/json                      an array of issue objects (the original
+                                          format) or one array per column:
+                                          {"short_description": [...], "category": [...],
+                                           "location": [...]}
+    application/msgpack                   either of the JSON shapes, MessagePack-encoded
+    application/vnd.apache.arrow.stream   an Arrow IPC stream with those three string columns
+
+and every shape decodes straight into an ``IssueBatch``: no per-item models,
+no DataFrame. Responses stay an array of result objects unless the client asks
+for columns, with ``?format=columnar`` or an ``Accept`` of one of
+``COLUMNAR_JSON``, ``MSGPACK`` or ``ARROW``:
+
+    {"model_used": "...", "classes": [...], "prediction": [...], "confidence": [...],
+     "class_probabilities": {"High": [...], "Low": [...], "Medium": [...]}}
+
+(Arrow carries ``class_probabilities`` as a struct column and ``model_used`` as
+schema metadata). Answers from a fallback scorer also carry ``"degraded"``
+with the reason, per row or once for the columns. orjson, msgpack and pyarrow
+are optional: JSON falls back to the standard library, binary request bodies
+answer 415 and binary ``Accept`` types are ignored when their package is missing.
+
+An empty batch keeps each app's original answer: 400 ("Provide a non-empty
+list of issues") from the Flask app, an empty result from the FastAPI app.
+"""
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.pipeline.predict_pipeline import REQUIRED_COLUMNS, IssueBatch, stage_timer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.civic.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+_MSGPACK_TYPES = {MSGPACK, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+class PayloadError(ValueError):
+    """
+    Raised when a request body cannot be turned into an issue batch.
+    ``loc`` points at the offending value, e.g. ``("category", 3)``.
+    """
+    status_code = 400
+
+    def __init__(self, message: str, loc: Sequence[Any] = ()):
+        super().__init__(message)
+        self.loc = tuple(loc)
+
+
+class UnsupportedMediaType(PayloadError):
+    status_code = 415
+
+
+class NotAcceptable(PayloadError):
+    status_code = 406
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or "").split(";", 1)[0].strip().lower()
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise UnsupportedMediaType("MessagePack payloads need the msgpack package")
+    return msgpack
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise UnsupportedMediaType("Arrow payloads need the pyarrow package")
+    return pa
+
+
+def _available(importer) -> bool:
+    try:
+        importer()
+    except PayloadError:
+        return False
+    return True
+
+
+def loads_json(body: bytes) -> Any:
+    try:
+        return orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError as e:
+        raise PayloadError(f"Invalid JSON body: {e}")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """
+    Encode ``obj`` (which may hold NumPy arrays and scalars) as JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_jsonable).encode("utf-8")
+
+
+def _jsonable(obj: Any) -> Any:
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def decode_issues(body: bytes, content_type: Optional[str]) -> IssueBatch:
+    """
+    Decode a request body into an ``IssueBatch``; the content type picks the
+    format and anything that is not MessagePack or Arrow is read as JSON.
+    """
+    media_type = _media_type(content_type)
+    if media_type in _MSGPACK_TYPES:
+        try:
+            payload = _msgpack().unpackb(body)
+        except PayloadError:
+            raise
+        except Exception as e:
+            raise PayloadError(f"Invalid MessagePack body: {e}")
+    elif media_type == ARROW:
+        return _arrow_issues(body)
+    else:
+        payload = loads_json(body)
+    return issues_from_payload(payload)
+
+
+def issues_from_payload(payload: Any) -> IssueBatch:
+    """
+    Validate a decoded array of issue objects, or a mapping of columns, into
+    an ``IssueBatch``. Every field must be a non-empty string.
+    """
+    if isinstance(payload, dict):
+        columns = []
+        for column in REQUIRED_COLUMNS:
+            values = payload.get(column)
+            if not isinstance(values, list):
+                raise PayloadError(f"{column} must be an array of strings", (column,))
+            columns.append(values)
+        if len({len(values) for values in columns}) > 1:
+            raise PayloadError("Columns must have the same length")
+    elif isinstance(payload, list):
+        columns = [[], [], []]
+        for k, item in enumerate(payload):
+            if not isinstance(item, dict):
+                raise PayloadError("Each issue must be an object", (k,))
+            for values, column in zip(columns, REQUIRED_COLUMNS):
+                values.append(item.get(column))
+    else:
+        raise PayloadError("Provide a list of issues or one array per column")
+    for values, column in zip(columns, REQUIRED_COLUMNS):
+        _check_strings(column, values, columnar=isinstance(payload, dict))
+    return IssueBatch(*columns)
+
+
+def _check_strings(column: str, values: List[Any], columnar: bool) -> None:
+    if all(type(value) is str and value for value in values):
+        return
+    for k, value in enumerate(values):
+        if not isinstance(value, str) or not value:
+            loc = (column, k) if columnar else (k, column)
+            raise PayloadError(f"{column} must be a non-empty string", loc)
+
+
+def _arrow_issues(body: bytes) -> IssueBatch:
+    pa = _pyarrow()
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except Exception as e:
+        raise PayloadError(f"Invalid Arrow IPC stream: {e}")
+    missing = [column for column in REQUIRED_COLUMNS if column not in table.column_names]
+    if missing:
+        raise PayloadError(f"Missing required columns: {missing}")
+    return issues_from_payload({column: table.column(column).to_pylist() for column in REQUIRED_COLUMNS})
+
+
+def negotiate(accept: Optional[str], format_param: Optional[str] = None) -> str:
+    """
+    Response media type for a batch request: ``JSON`` (rows) unless ``Accept``
+    names a columnar type or ``format_param`` is ``"columnar"``. The binary
+    formats are always columnar.
+    """
+    for part in (accept or "").split(","):
+        media_type = _media_type(part)
+        # Formats whose package is missing are skipped like any other unknown type
+        if media_type in _MSGPACK_TYPES and _available(_msgpack):
+            return MSGPACK
+        if media_type == ARROW and _available(_pyarrow):
+            return ARROW
+        if media_type == COLUMNAR_JSON:
+            return COLUMNAR_JSON
+    if format_param in (None, "", "rows"):
+        return JSON
+    if format_param == "columnar":
+        return COLUMNAR_JSON
+    raise NotAcceptable(f"Unknown response format: {format_param!r}")
+
+
+def encode_columnar(media_type: str, columns: Dict[str, Any]) -> bytes:
+    if media_type == MSGPACK:
+        return _msgpack().packb(columns, default=_jsonable)
+    if media_type == ARROW:
+        pa = _pyarrow()
+        probabilities = columns["class_probabilities"]
+        table = pa.table(
+            {
+                "prediction": pa.array(columns["prediction"], type=pa.string()),
+                "confidence": pa.array(columns["confidence"]),
+                "class_probabilities": pa.StructArray.from_arrays(
+                    [pa.array(probabilities[name]) for name in columns["classes"]], names=columns["classes"]),
+            },
+            metadata={key: columns[key] for key in ("model_used", "degraded") if key in columns},
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return dumps_json(columns)
+
+
+def score_batch(pipeline, batch: IssueBatch, media_type: str, degraded: Optional[str] = None) -> bytes:
+    """
+    Score ``batch`` and encode the results as ``media_type`` (see ``negotiate``).
+    ``degraded`` marks a fallback answer. Encoding is timed as the ``serialize`` stage.
+    """
+    if media_type == JSON:
+        results = pipeline.predict_many(batch) if len(batch) else []
+        if degraded is not None:
+            for result in results:
+                result["degraded"] = degraded
+        with stage_timer("serialize"):
+            return dumps_json(results)
+    if len(batch):
+        proba = pipeline.predict_proba_many(batch)
+    else:
+        proba = np.zeros((0, len(pipeline.class_names)))
+    with stage_timer("decode"):
+        columns = pipeline.build_columns(proba)
+    if degraded is not None:
+        columns["degraded"] = degraded
+    with stage_timer("serialize"):
+        return encode_columnar(media_type, columns)
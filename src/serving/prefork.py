@@ -0,0 +1,250 @@
+"""
+Pre-fork launcher: load models once, then fork workers that share them.
+
+    python -m src.serving.prefork --app fastapi --workers 32 --port 8000 \\
+        --preload random_forest,xgb_model
+
+The parent loads the requested models into one ``ModelRegistry``, moves every
+object it has allocated into the permanent GC generation (``gc.freeze``) and
+forks the workers, which inherit the listening socket and the registry. The
+model pages stay shared copy-on-write until a worker writes to them; freezing
+keeps the cyclic GC from doing so, although reference counting still dirties
+the pages of objects a request actually touches. Nothing in the parent runs
+a model: the warmup inference and the compiled evaluators' parity check,
+which would start XGBoost's OpenMP pool, run in each worker after the fork.
+
+The parent supervises the workers (restarting any that die) and logs each
+worker's unique versus shared memory every ``--report-interval`` seconds and
+on SIGUSR1.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from src.logger import logging
+from src.serving.config import ServingConfig
+from src.serving.registry import ModelRegistry
+
+APPS = ("fastapi", "flask")
+
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Memory of ``pid`` in bytes from /proc/<pid>/smaps_rollup: ``unique`` pages are
+    private to the process (USS), ``shared`` pages are mapped by other processes
+    too, and ``pss`` charges each shared page proportionally. None when unavailable.
+    """
+    fields: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    if "Rss" not in fields:
+        return None
+    return {
+        "rss": fields["Rss"],
+        "pss": fields.get("Pss", 0),
+        "unique": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def memory_report(pids: Dict[str, int]) -> str:
+    """
+    One line per process plus the total PSS, i.e. what the group really costs.
+    """
+    mib = 1024 * 1024
+    lines = [f"{'process':<12}{'pid':>8}{'rss MiB':>10}{'unique MiB':>12}{'shared MiB':>12}{'pss MiB':>10}"]
+    total_pss = 0
+    for label, pid in pids.items():
+        mem = process_memory(pid)
+        if mem is None:
+            lines.append(f"{label:<12}{pid:>8}{'n/a':>10}")
+            continue
+        total_pss += mem["pss"]
+        lines.append(
+            f"{label:<12}{pid:>8}{mem['rss'] / mib:>10.1f}{mem['unique'] / mib:>12.1f}"
+            f"{mem['shared'] / mib:>12.1f}{mem['pss'] / mib:>10.1f}"
+        )
+    lines.append(f"{'total pss':<20}{total_pss / mib:>52.1f}")
+    return "\n".join(lines)
+
+
+class PreforkServer:
+    """
+    Forks ``workers`` copies of the FastAPI or Flask app around one preloaded registry.
+    """
+
+    def __init__(self, app: str, host: str, port: int, workers: int, preload: List[str],
+                 report_interval_s: float, config: Optional[ServingConfig] = None):
+        if app not in APPS:
+            raise ValueError(f"app must be one of {APPS}, got {app!r}")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.config = config or ServingConfig()
+        self.preload = preload or [self.config.model_name]
+        self.report_interval_s = report_interval_s
+
+        self.registry: Optional[ModelRegistry] = None
+        self.socket: Optional[socket.socket] = None
+        self._children: Dict[int, int] = {}  # pid -> worker slot
+        self._stopping = False
+        self._report_requested = False
+
+    def run(self) -> None:
+        # Allocations made while loading stay compact when no collection runs midway
+        gc.disable()
+        start = time.perf_counter()
+        self.registry = self._build_registry()
+        loaded = self.registry.preload(self.preload, warmup=False)
+        self._create_app_factory()
+        gc.collect()
+        gc.freeze()
+        logging.info(f"Pre-fork parent loaded {loaded} in {time.perf_counter() - start:.3f}s, "
+                     f"{gc.get_freeze_count()} objects frozen")
+        print(f"Loaded {', '.join(loaded)} in {time.perf_counter() - start:.2f}s; "
+              f"forking {self.workers} {self.app} workers on {self.host}:{self.port}", flush=True)
+
+        self.socket = self._bind()
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGUSR1, self._on_report)
+        for slot in range(self.workers):
+            self._spawn(slot)
+        self._supervise()
+
+    def _build_registry(self) -> ModelRegistry:
+        from src.serving.cache import FeatureRowCache, PredictionCache
+        from src.serving.threads import ThreadBudget
+
+        cache = None
+        if self.config.cache_max_entries > 0:
+            cache = PredictionCache(self.config.cache_max_entries, self.config.cache_ttl_s)
+        text_cache = None
+        if self.config.tfidf_cache_mb > 0:
+            text_cache = FeatureRowCache(int(self.config.tfidf_cache_mb * 1024 * 1024))
+        return ModelRegistry(self.config.artifacts_dir, default_model=self.config.model_name, cache=cache,
+                             text_cache=text_cache,
+                             thread_budget=ThreadBudget.from_config(self.config, processes=self.workers),
+                             cascade_models=self.config.cascade_models,
+                             cascade_threshold=self.config.cascade_threshold)
+
+    def _create_app_factory(self):
+        # Import the app module (and its web framework) once, before forking
+        if self.app == "fastapi":
+            from backend.api import create_app
+        else:
+            from backend.flask_api import create_app
+        return create_app
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid:
+            self._children[pid] = slot
+            return
+        code = 0
+        try:
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+                signal.signal(sig, signal.SIG_DFL)
+            gc.enable()
+            self._serve(slot)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _serve(self, slot: int) -> None:
+        # Thread pools are per process, so the limits are applied after the fork
+        budget = self.registry.thread_budget
+        if budget is not None:
+            budget.pin(slot)
+            budget.limit_native_pools()
+        self.registry.warmup()
+        create_app = self._create_app_factory()
+        app = create_app(registry=self.registry)
+        logging.info(f"Pre-fork worker {slot} (pid {os.getpid()}) serving")
+        if self.app == "fastapi":
+            import uvicorn
+            uvicorn.Server(uvicorn.Config(app, log_level="warning")).run(sockets=[self.socket])
+        else:
+            from werkzeug.serving import make_server
+            make_server(self.host, self.port, app, threaded=True, fd=self.socket.fileno()).serve_forever()
+
+    def _supervise(self) -> None:
+        next_report = time.monotonic() + min(self.report_interval_s, 5.0) if self.report_interval_s > 0 else None
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                slot = self._children.pop(pid)
+                if not self._stopping:
+                    logging.warning(f"Pre-fork worker {slot} (pid {pid}) exited with status {status}, restarting")
+                    self._spawn(slot)
+                continue
+            if self._report_requested or (next_report is not None and time.monotonic() >= next_report):
+                self._report_requested = False
+                self._report()
+                if next_report is not None:
+                    next_report = time.monotonic() + self.report_interval_s
+            time.sleep(0.2)
+
+    def _report(self) -> None:
+        pids = {"parent": os.getpid()}
+        pids.update({f"worker-{slot}": pid for pid, slot in sorted(self._children.items(), key=lambda x: x[1])})
+        report = memory_report(pids)
+        logging.info(f"Pre-fork memory report\n{report}")
+        print(report, flush=True)
+
+    def _on_report(self, signum, frame) -> None:
+        self._report_requested = True
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    config = ServingConfig()
+    parser = argparse.ArgumentParser(description="Serve the priority API from pre-forked workers sharing loaded models")
+    parser.add_argument("--app", choices=APPS, default="fastapi")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=config.prefork_workers)
+    parser.add_argument("--preload", default=",".join(config.prefork_preload),
+                        help="comma-separated models to load before forking (default: PRIORITY_MODEL)")
+    parser.add_argument("--report-interval", type=float, default=config.prefork_memory_report_interval_s,
+                        help="seconds between worker memory reports; 0 reports only on SIGUSR1")
+    args = parser.parse_args(argv)
+
+    preload = [m.strip() for m in args.preload.split(",") if m.strip()]
+    PreforkServer(args.app, args.host, args.port, args.workers, preload, args.report_interval, config).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Opt-in sampling profiler for scoring calls.
+
+A scoring call runs inside ``SamplingProfiler.capture`` and is profiled when
+the request sends ``X-Profile: 1`` (with ``header=True``), when it is the
+``sample_every``-th call, or, with ``latency_threshold_s``, for as long as it
+runs past that threshold. One background thread samples the stacks of the
+threads being profiled every ``interval_s`` with ``sys._current_frames`` and
+sleeps while none are. The sampler needs the GIL, so while the profiled code
+holds it (pure-Python stages) samples come at most every
+``sys.getswitchinterval()`` (5ms by default); native sections that release
+it, such as tree evaluation, are sampled at the full rate. Each profile is written to ``directory`` as
+
+    <id>.collapsed   one "outer;...;inner count" line per distinct stack, the
+                     input of flamegraph.pl, speedscope or inferno
+    <id>.json        endpoint, model, rows, trigger, wall time and the stage
+                     breakdown of the call (``record_stages``)
+
+and only the newest ``max_files`` profiles are kept. With no trigger enabled
+the apps do not build a profiler at all, so scoring runs exactly as before.
+"""
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.logger import logging
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Why a call was profiled
+TRIGGER_HEADER = "header"
+TRIGGER_SAMPLE = "sample"
+TRIGGER_LATENCY = "latency"
+
+
+class _Capture:
+    """
+    Stack samples of one profiled call on one thread.
+    """
+
+    def __init__(self, thread_id: int, trigger: Optional[str], sample_from: float):
+        self.thread_id = thread_id
+        self.trigger = trigger
+        self.started_at = time.perf_counter()
+        # Sampling starts here: at once when triggered up front, after the threshold otherwise
+        self.sample_from = sample_from
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        # Set when the call is profiled
+        self.profile_id: Optional[str] = None
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of calls run under ``capture`` and writes them to ``directory``.
+    """
+
+    def __init__(self, directory: str = "profiles", interval_s: float = 0.001, sample_every: int = 0,
+                 latency_threshold_s: float = 0.0, header: bool = False, max_files: int = 200):
+        self.directory = directory
+        self.interval_s = interval_s
+        self.sample_every = sample_every
+        self.latency_threshold_s = latency_threshold_s
+        self.header = header
+        self.max_files = max_files
+
+        self._calls = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._active: Dict[int, _Capture] = {}
+        self._frame_names: Dict[Any, str] = {}
+        self._written = 0
+        self._sampler: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, config) -> Optional["SamplingProfiler"]:
+        """
+        The profiler for ``config``, or None when no trigger is enabled.
+        """
+        if not (config.profile_header or config.profile_sample_every > 0 or config.profile_latency_ms > 0):
+            return None
+        return cls(config.profile_dir, config.profile_interval_ms / 1000.0, config.profile_sample_every,
+                   config.profile_latency_ms / 1000.0, config.profile_header, config.profile_max_files)
+
+    def requested(self, header_value: Optional[str]) -> bool:
+        """
+        Whether the request's ``X-Profile`` header asks for a profile.
+        """
+        return self.header and header_value is not None and header_value.strip().lower() in ("1", "true", "yes", "on")
+
+    def trigger(self, header_value: Optional[str] = None) -> Optional[str]:
+        """
+        Why the next call should be profiled from its start, or None. Call once per request.
+        """
+        if self.requested(header_value):
+            return TRIGGER_HEADER
+        if self.sample_every > 0 and next(self._calls) % self.sample_every == 0:
+            return TRIGGER_SAMPLE
+        return None
+
+    @contextmanager
+    def capture(self, endpoint: str, model: str, rows: int, timings: Dict[str, float],
+                trigger: Optional[str] = None) -> Iterator[Optional[_Capture]]:
+        """
+        Profile the block on this thread if ``trigger`` is set, or once it runs
+        past the latency threshold; writes the profile when the block exits,
+        and sets the capture's ``profile_id`` if it did.
+        """
+        if trigger is None and self.latency_threshold_s <= 0:
+            yield None
+            return
+        capture = _Capture(threading.get_ident(), trigger, 0.0)
+        capture.sample_from = capture.started_at + (0.0 if trigger is not None else self.latency_threshold_s)
+        if trigger is not None:
+            capture.profile_id = self._new_id(endpoint, model)
+        with self._cond:
+            self._active[capture.thread_id] = capture
+            self._ensure_sampler()
+            self._cond.notify()
+        try:
+            yield capture
+        finally:
+            with self._cond:
+                self._active.pop(capture.thread_id, None)
+            elapsed = time.perf_counter() - capture.started_at
+            if capture.trigger is None and elapsed >= self.latency_threshold_s:
+                capture.trigger = TRIGGER_LATENCY
+                capture.profile_id = self._new_id(endpoint, model)
+            if capture.trigger is not None and not self._write(capture, endpoint, model, rows, elapsed, timings):
+                capture.profile_id = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            active = len(self._active)
+            written = self._written
+        return {"directory": os.path.abspath(self.directory), "interval_s": self.interval_s,
+                "sample_every": self.sample_every, "latency_threshold_s": self.latency_threshold_s,
+                "header": self.header, "active": active, "written": written}
+
+    def _new_id(self, endpoint: str, model: str) -> str:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{endpoint}-{model}").strip("_")
+        return f"{stamp}-{os.getpid()}-{next(self._ids)}-{slug}"
+
+    def _ensure_sampler(self) -> None:
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._sampler.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._active:
+                    self._cond.wait()
+                # Latency captures only start sampling at their threshold
+                delay = min(capture.sample_from for capture in self._active.values()) - time.perf_counter()
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+            time.sleep(self.interval_s)
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            with self._cond:
+                for thread_id, capture in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and now >= capture.sample_from:
+                        stack = self._collapse(frame)
+                        capture.stacks[stack] = capture.stacks.get(stack, 0) + 1
+                        capture.samples += 1
+            del frames
+
+    def _collapse(self, frame) -> str:
+        names: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            name = self._frame_names.get(code)
+            if name is None:
+                path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)
+                name = f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})".replace(";", ",")
+                self._frame_names[code] = name
+            names.append(name)
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _write(self, capture: _Capture, endpoint: str, model: str, rows: int, elapsed: float,
+               timings: Dict[str, float]) -> bool:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, capture.profile_id)
+            with open(base + ".collapsed", "w", encoding="utf-8") as f:
+                for stack, count in sorted(capture.stacks.items(), key=lambda kv: -kv[1]):
+                    f.write(f"{stack} {count}\n")
+            summary = {
+                "endpoint": endpoint,
+                "model": model,
+                "rows": rows,
+                "trigger": capture.trigger,
+                "wall_s": elapsed,
+                "sampled_from_s": max(0.0, capture.sample_from - capture.started_at),
+                "interval_s": self.interval_s,
+                "samples": capture.samples,
+                "stages_s": dict(timings),
+            }
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            with self._cond:
+                self._written += 1
+            logging.info(f"Profile {capture.profile_id} written ({capture.samples} samples, "
+                         f"{elapsed * 1000:.1f}ms, trigger {capture.trigger})")
+            self._prune()
+            return True
+        except OSError as e:
+            logging.warning(f"Could not write profile {capture.profile_id}: {e}")
+            return False
+
+    def _prune(self) -> None:
+        profiles = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in profiles[: max(0, len(profiles) - self.max_files)]:
+            for suffix in (".json", ".collapsed"):
+                try:
+                    os.remove(entry.path[: -len(".json")] + suffix)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,99 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.pipeline.predict_pipeline import IssueBatch, stage_timer
+
+RANK_CLASS = "High"
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a /rank pagination cursor cannot be decoded.
+    """
+
+
+def encode_cursor(probability: float, index: int) -> str:
+    payload = json.dumps({"p": probability, "i": index}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(payload["p"]), int(payload["i"])
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def select_ranked(scores: np.ndarray,
+                  k: Optional[int] = None,
+                  min_score: Optional[float] = None,
+                  after: Optional[Tuple[float, int]] = None) -> Tuple[np.ndarray, bool]:
+    """
+    Indices of the rows to return, ordered by score descending then input
+    position ascending (the order a stable full sort would give).
+
+    Only the top ``k`` rows that pass ``min_score`` and come after the ``after``
+    cursor position are selected, using a partial selection rather than a full
+    sort. The second value tells whether more matching rows remain.
+    """
+    positions = np.arange(len(scores))
+    mask = np.ones(len(scores), dtype=bool)
+    if min_score is not None:
+        mask &= scores >= min_score
+    if after is not None:
+        after_score, after_index = after
+        mask &= (scores < after_score) | ((scores == after_score) & (positions > after_index))
+    candidates = positions[mask]
+
+    has_more = k is not None and len(candidates) > k
+    if has_more:
+        candidate_scores = scores[candidates]
+        # k-th largest score; everything above it is in, ties fill by position
+        threshold = np.partition(candidate_scores, len(candidates) - k)[len(candidates) - k]
+        above = candidates[candidate_scores > threshold]
+        tied = candidates[candidate_scores == threshold][: k - len(above)]
+        candidates = np.concatenate([above, tied])
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order], has_more
+
+
+def rank_by_high_probability(pipeline,
+                             data: IssueBatch | List[Dict[str, Any]],
+                             k: Optional[int] = None,
+                             min_high_probability: Optional[float] = None,
+                             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Score ``data`` (an ``IssueBatch`` or a list of issue dicts) with
+    ``pipeline`` and return ``(ranked, next_cursor)``.
+
+    Result dicts are only built for the selected slice. ``next_cursor`` is set
+    when ``k`` cut the selection short and can be passed back with the same
+    input to fetch the next page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    batch = data if isinstance(data, IssueBatch) else IssueBatch.from_records(data)
+    proba = pipeline.predict_proba_many(batch)
+    if RANK_CLASS in pipeline.class_names:
+        scores = proba[:, pipeline.class_names.index(RANK_CLASS)]
+    else:
+        scores = np.zeros(len(batch))
+
+    selected, has_more = select_ranked(scores, k, min_high_probability, after)
+    with stage_timer("decode"):
+        results = pipeline.build_results(proba[selected])
+        ranked = [
+            {"input": {"short_description": batch.short_description[i], "category": batch.category[i],
+                       "location": batch.location[i]}, **res}
+            for i, res in zip(selected.tolist(), results)
+        ]
+
+    next_cursor = None
+    if has_more and len(selected):
+        last = int(selected[-1])
+        next_cursor = encode_cursor(float(scores[last]), last)
+    return ranked, next_cursor
@@ -0,0 +1,300 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.logger import logging
+from src.pipeline.cascade import CASCADE_MODELS, DEFAULT_THRESHOLD, CascadePipeline
+from src.pipeline.ensemble import EnsemblePipeline, load_ensemble_weights
+from src.pipeline.predict_pipeline import PredictPipeline, artifact_version, bypass_caches, model_artifact_path, \
+    observe_predictions
+from src.utils.artifact_store import COMPILED_SUFFIX, MMAP_SUFFIX, is_mmap_artifact
+
+# Tiny input used to warm a freshly loaded pipeline before it takes traffic; scored
+# with the caches bypassed so it never occupies a prediction or TF-IDF cache entry
+WARMUP_RECORD = {"short_description": "warmup", "category": "warmup", "location": "warmup"}
+
+
+class UnknownModel(KeyError):
+    """
+    Raised when a request names a model with no artifact in the models directory.
+    """
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _LoadedModel:
+    def __init__(self, pipeline: PredictPipeline, load_seconds: float, process_rss_delta: Optional[int],
+                 artifact_bytes: Optional[int], warmup_seconds: Optional[float] = None):
+        self.pipeline = pipeline
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        # Growth of the whole process's RSS across the load: it includes anything
+        # other threads allocated meanwhile (parallel preloads, requests) and
+        # one-off costs such as the first import of sklearn or xgboost, so it is
+        # only an upper bound on what this model holds
+        self.process_rss_delta = process_rss_delta
+        self.artifact_bytes = artifact_bytes
+
+
+class ModelRegistry:
+    """
+    Loads ``PredictPipeline`` instances by model name on first use and swaps in
+    new artifact versions without interrupting traffic.
+
+    A reload builds and warms the new pipeline off to the side, then replaces
+    the registry entry in a single assignment; requests already holding the
+    old pipeline finish on it. Composite models (such as ``ensemble``) are
+    built from other registry entries instead of an artifact of their own;
+    ``cascade`` (see src.pipeline.cascade) runs ``cascade_models`` in order.
+    """
+
+    def __init__(self, artifacts_dir: str = "artifacts", default_model: str = "random_forest",
+                 cache=None, text_cache=None, cascade_models: Optional[List[str]] = None,
+                 cascade_threshold: float = DEFAULT_THRESHOLD, thread_budget=None):
+        self.artifacts_dir = artifacts_dir
+        self.models_dir = os.path.join(artifacts_dir, "models")
+        self.default_model = default_model
+        self.cache = cache
+        self.text_cache = text_cache
+        # src.serving.threads.ThreadBudget applied to every loaded model
+        self.thread_budget = thread_budget
+
+        self._entries: Dict[str, _LoadedModel] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._reloading: Dict[str, threading.Thread] = {}
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._composites: Dict[str, tuple] = {}
+
+        members = [name for name in load_ensemble_weights(artifacts_dir) if name in self.available()]
+        if len(members) > 1:
+            self.register_composite(
+                "ensemble", members,
+                lambda: EnsemblePipeline(self.get, load_ensemble_weights(artifacts_dir, members),
+                                         artifacts_dir=artifacts_dir, cache=self.cache),
+            )
+        cascade_models = cascade_models or CASCADE_MODELS
+        if len(cascade_models) > 1 and all(name in self.available() for name in cascade_models):
+            self.register_composite(
+                "cascade", cascade_models,
+                lambda: CascadePipeline(self.get, cascade_models, cascade_threshold,
+                                        artifacts_dir=artifacts_dir, cache=self.cache),
+            )
+
+    def register_composite(self, name: str, members: List[str],
+                           factory: Callable[[], PredictPipeline]) -> None:
+        """
+        Serve ``name`` from ``factory()``, a pipeline built on the given member models.
+        """
+        self._composites[name] = (list(members), factory)
+
+    def available(self) -> List[str]:
+        names = set(self._composites)
+        if os.path.isdir(self.models_dir):
+            for f in os.listdir(self.models_dir):
+                if f.endswith(".pkl"):
+                    names.add(f[:-len(".pkl")])
+                elif f.endswith(MMAP_SUFFIX) and is_mmap_artifact(os.path.join(self.models_dir, f)):
+                    name = f[:-len(MMAP_SUFFIX)]
+                    # Compiled classifiers belong to their model, they are not models
+                    if not name.endswith(COMPILED_SUFFIX):
+                        names.add(name)
+        return sorted(names)
+
+    def resolve(self, name: Optional[str] = None) -> str:
+        """
+        Validate a requested model name, defaulting to the configured model.
+        """
+        name = name or self.default_model
+        if name in self._entries or name in self._composites:
+            return name
+        if os.path.basename(name) != name or not os.path.exists(self._artifact_path(name)):
+            raise UnknownModel(name)
+        return name
+
+    def get(self, name: Optional[str] = None) -> PredictPipeline:
+        name = self.resolve(name)
+        entry = self._entries.get(name)
+        if entry is None:
+            with self._lock_for(name):
+                entry = self._entries.get(name)
+                if entry is None:
+                    entry = self._load(name)
+                    self._entries[name] = entry
+        return entry.pipeline
+
+    def preload(self, names: List[str], warmup: bool = True, parallel: bool = False) -> List[str]:
+        """
+        Load ``names`` now instead of on first request; composites load their
+        members first. Returns the names that are loaded afterwards.
+
+        ``parallel=True`` loads the artifacts on one thread each; unpickling and
+        the first sklearn/xgboost imports then overlap with file I/O.
+
+        ``warmup=False`` skips the warmup inference and the compiled evaluators'
+        parity check, e.g. in a parent process that is about to fork: OpenMP
+        runtimes used by XGBoost are not fork-safe once their thread pool has
+        started. ``warmup()`` runs both later.
+        """
+        ordered: List[str] = []
+        for name in names:
+            name = self.resolve(name)
+            for member in self._composites.get(name, ([], None))[0] + [name]:
+                if member not in ordered:
+                    ordered.append(member)
+
+        def _ensure(name: str) -> None:
+            with self._lock_for(name):
+                if name not in self._entries:
+                    self._entries[name] = self._load(name, warmup=warmup)
+
+        artifacts = [name for name in ordered if name not in self._composites]
+        if parallel and len(artifacts) > 1:
+            with ThreadPoolExecutor(max_workers=len(artifacts), thread_name_prefix="preload") as pool:
+                list(pool.map(_ensure, artifacts))
+        for name in ordered:
+            _ensure(name)
+        return ordered
+
+    def warmup(self) -> None:
+        """
+        Run the warmup inference through every loaded model, after any parity
+        check deferred by ``preload(warmup=False)``.
+        """
+        for entry in list(self._entries.values()):
+            start = time.perf_counter()
+            if hasattr(entry.pipeline, "verify_compiled"):
+                entry.pipeline.verify_compiled()
+            with observe_predictions(None), bypass_caches():
+                entry.pipeline.predict_many([WARMUP_RECORD])
+            entry.warmup_seconds = time.perf_counter() - start
+
+    def reload(self, name: Optional[str] = None, background: bool = True) -> bool:
+        """
+        Load the current artifact for ``name`` and swap it in atomically.
+        Returns False when a reload of that model is already running.
+        Reloading a composite reloads its members.
+        """
+        name = self.resolve(name)
+        if name in self._composites:
+            return all([self.reload(member, background) for member in self._composites[name][0]])
+        with self._locks_guard:
+            running = self._reloading.get(name)
+            if running is not None and running.is_alive():
+                return False
+            thread = threading.Thread(target=self._swap, args=(name,), name=f"reload-{name}", daemon=True)
+            self._reloading[name] = thread
+        thread.start()
+        if not background:
+            thread.join()
+        return True
+
+    def reload_if_changed(self) -> List[str]:
+        """
+        Reload every loaded model whose artifact changed on disk.
+        """
+        changed = [
+            name for name, entry in list(self._entries.items())
+            if os.path.exists(self._artifact_path(name))
+            and artifact_version(self._artifact_path(name)) != entry.pipeline.artifact_version
+        ]
+        for name in changed:
+            self.reload(name)
+        return changed
+
+    def start_watcher(self, interval_s: float) -> None:
+        """
+        Poll loaded artifacts every ``interval_s`` seconds and hot-swap changed ones.
+        """
+        if interval_s <= 0 or self._watcher is not None:
+            return
+
+        def _watch():
+            while not self._stop.wait(interval_s):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logging.warning(f"Model watcher error: {e}")
+
+        self._watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def describe(self) -> Dict[str, Any]:
+        models = {}
+        for name in self.available():
+            entry = self._entries.get(name)
+            info: Dict[str, Any] = {"loaded": entry is not None}
+            if name in self._composites:
+                info["members"] = self._composites[name][0]
+                if entry is not None:
+                    info.update({"loaded_at": entry.loaded_at, "load_seconds": entry.load_seconds,
+                                 "warmup_seconds": entry.warmup_seconds})
+                    if hasattr(entry.pipeline, "stats"):
+                        info["stats"] = entry.pipeline.stats()
+            elif entry is not None:
+                info.update({
+                    "artifact_version": entry.pipeline.artifact_version,
+                    "loaded_at": entry.loaded_at,
+                    "load_seconds": entry.load_seconds,
+                    "warmup_seconds": entry.warmup_seconds,
+                    "artifact_bytes": entry.artifact_bytes,
+                    "process_rss_delta_bytes": entry.process_rss_delta,
+                    "on_disk_version": artifact_version(self._artifact_path(name)),
+                })
+            thread = self._reloading.get(name)
+            info["reloading"] = thread is not None and thread.is_alive()
+            models[name] = info
+        return {"default_model": self.default_model, "models": models}
+
+    def _swap(self, name: str) -> None:
+        try:
+            entry = self._load(name)
+        except Exception as e:
+            logging.error(f"Reload of model {name} failed, keeping current version: {e}")
+            return
+        self._entries[name] = entry
+        logging.info(f"✓ Model {name} swapped to version {entry.pipeline.artifact_version}")
+
+    def _load(self, name: str, warmup: bool = True) -> _LoadedModel:
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        if name in self._composites:
+            pipeline = self._composites[name][1]()
+        else:
+            pipeline = PredictPipeline(artifacts_dir=self.artifacts_dir, model_name=name, cache=self.cache,
+                                       text_cache=self.text_cache, verify_compiled=warmup)
+            if self.thread_budget is not None:
+                self.thread_budget.apply(pipeline)
+        load_seconds = time.perf_counter() - start
+        warmup_seconds = None
+        if warmup:
+            # Models can load on a request's thread; the warmup row is not traffic
+            with observe_predictions(None), bypass_caches():
+                pipeline.predict_many([WARMUP_RECORD])
+            warmup_seconds = time.perf_counter() - start - load_seconds
+        rss_after = _rss_bytes()
+        process_rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        logging.info(f"✓ Model {name} loaded in {load_seconds:.3f}s"
+                     + (f", warmed up in {warmup_seconds:.3f}s" if warmup_seconds is not None else ""))
+        artifact_bytes = None if name in self._composites else os.path.getsize(self._artifact_path(name))
+        return _LoadedModel(pipeline, load_seconds, process_rss_delta, artifact_bytes, warmup_seconds)
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _artifact_path(self, name: str) -> str:
+        return model_artifact_path(self.models_dir, name)
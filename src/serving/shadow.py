@@ -0,0 +1,202 @@
+"""
+Shadow scoring of a candidate model on live traffic.
+
+``ShadowScorer.offer`` is called after a request has been answered: a sample
+of requests (``sample_rate``) is copied into a bounded queue, and a background
+thread at lowered OS priority scores them with the candidate model. A full
+queue drops the sample, so shadow work never waits on or delays the request
+path. For each sample the worker compares the candidate with the live model
+(the live probabilities are passed in when the endpoint has them, otherwise
+re-scored in the background) and records how often the top classes agree,
+how the top-class confidence moves, which labels flip, and the candidate's
+latency. Shadow scoring bypasses the prediction and TF-IDF caches, so it
+neither evicts live entries nor moves their hit rates.
+"""
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.logger import logging
+from src.pipeline.predict_pipeline import bypass_caches
+
+_STOP = object()
+
+# Candidate latencies kept for the percentiles in stats()
+LATENCY_WINDOW = 1024
+
+
+class _Comparison:
+    """
+    Running agreement and confidence statistics against one live model.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.rows = 0
+        self.agreements = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.flips: Dict[str, int] = {}
+
+    def add(self, live_labels: np.ndarray, live_confidence: np.ndarray,
+            labels: np.ndarray, confidence: np.ndarray) -> None:
+        delta = confidence - live_confidence
+        agree = live_labels == labels
+        self.samples += 1
+        self.rows += len(labels)
+        self.agreements += int(agree.sum())
+        self.delta_sum += float(delta.sum())
+        self.abs_delta_sum += float(np.abs(delta).sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(np.abs(delta).max()))
+        for live, candidate in zip(live_labels[~agree].tolist(), labels[~agree].tolist()):
+            flip = f"{live}->{candidate}"
+            self.flips[flip] = self.flips.get(flip, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self.rows or 1
+        return {
+            "samples": self.samples,
+            "rows": self.rows,
+            "agreement_rate": self.agreements / rows if self.rows else None,
+            "mean_confidence_delta": self.delta_sum / rows if self.rows else None,
+            "mean_abs_confidence_delta": self.abs_delta_sum / rows if self.rows else None,
+            "max_abs_confidence_delta": self.max_abs_delta,
+            "label_flips": dict(sorted(self.flips.items(), key=lambda kv: -kv[1])),
+        }
+
+
+def _lower_priority(niceness: int) -> None:
+    # Linux applies setpriority to a single thread when given its native id
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except (AttributeError, OSError) as e:
+        logging.info(f"Shadow worker priority not lowered: {e}")
+
+
+class ShadowScorer:
+    """
+    Scores a sample of live requests with ``candidate`` on a background thread.
+    ``pipeline_fn`` maps a model name to its pipeline (``ModelRegistry.get``).
+    """
+
+    def __init__(self, pipeline_fn: Callable[[str], Any], candidate: str, sample_rate: float = 0.1,
+                 max_queue: int = 64, max_rows: int = 256, niceness: int = 10, seed: Optional[int] = None):
+        self.pipeline_fn = pipeline_fn
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.max_queue = max_queue
+        self.max_rows = max_rows
+        self.niceness = niceness
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._offered = 0
+        self._sampled = 0
+        self._dropped = 0
+        self._errors = 0
+        self._comparisons: Dict[str, _Comparison] = {}
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._waits: deque = deque(maxlen=LATENCY_WINDOW)
+
+        self._worker = threading.Thread(target=self._run, name="shadow", daemon=True)
+        self._worker.start()
+
+    def offer(self, model: str, batch, proba: Optional[np.ndarray] = None,
+              class_names: Optional[List[str]] = None) -> bool:
+        """
+        Maybe queue ``batch``, answered by ``model`` with probabilities
+        ``proba`` (columns ``class_names``) when known. Never blocks; returns
+        whether the sample was queued.
+        """
+        with self._lock:
+            self._offered += 1
+        if model == self.candidate or not len(batch) or self._random.random() >= self.sample_rate:
+            return False
+        if proba is not None:
+            proba = proba[: self.max_rows]
+        try:
+            self._queue.put_nowait((model, batch[: self.max_rows], proba, class_names, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._sampled += 1
+        return True
+
+    def close(self) -> None:
+        try:
+            self._queue.put(_STOP, timeout=1.0)
+        except queue.Full:
+            return
+        self._worker.join(timeout=5.0)
+
+    def _run(self) -> None:
+        _lower_priority(self.niceness)
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            try:
+                self._score(*item)
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                logging.warning(f"Shadow scoring with {self.candidate} failed: {e}")
+
+    def _score(self, model: str, batch, proba: Optional[np.ndarray], class_names: Optional[List[str]],
+               queued_at: float) -> None:
+        wait = time.perf_counter() - queued_at
+        with bypass_caches():
+            if proba is None:
+                live = self.pipeline_fn(model)
+                proba, class_names = live.predict_proba_many(batch), live.class_names
+            candidate = self.pipeline_fn(self.candidate)
+            start = time.perf_counter()
+            candidate_proba = candidate.predict_proba_many(batch)
+            latency = time.perf_counter() - start
+
+        live_table = np.asarray(class_names, dtype=object)
+        candidate_table = np.asarray(candidate.class_names, dtype=object)
+        live_labels = live_table[proba.argmax(axis=1)]
+        labels = candidate_table[candidate_proba.argmax(axis=1)]
+        with self._lock:
+            comparison = self._comparisons.setdefault(model, _Comparison())
+            comparison.add(live_labels, proba.max(axis=1), labels, candidate_proba.max(axis=1))
+            self._latencies.append((latency, len(batch)))
+            self._waits.append(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            waits = list(self._waits)
+            stats: Dict[str, Any] = {
+                "candidate": self.candidate,
+                "sample_rate": self.sample_rate,
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "offered": self._offered,
+                "sampled": self._sampled,
+                "dropped": self._dropped,
+                "errors": self._errors,
+                "by_live_model": {model: c.stats() for model, c in self._comparisons.items()},
+            }
+        if latencies:
+            seconds = np.array([latency for latency, _ in latencies])
+            rows = sum(n for _, n in latencies)
+            stats["candidate_latency_ms"] = {
+                "p50": float(np.percentile(seconds, 50) * 1000),
+                "p95": float(np.percentile(seconds, 95) * 1000),
+                "p99": float(np.percentile(seconds, 99) * 1000),
+                "per_row": float(seconds.sum() / rows * 1000),
+            }
+            stats["queue_wait_ms_p95"] = float(np.percentile(waits, 95) * 1000)
+        return stats
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.logger import logging
+
+
+def process_age_seconds() -> Optional[float]:
+    """
+    Seconds since this process started, from /proc; None when unavailable.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name start at field 3; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Readiness:
+    """
+    Loads and warms the startup models off the request path and records a
+    timing breakdown of the cold start.
+
+    ``/ready`` reports ready only once every model has served its warmup
+    inference; ``/health`` stays a plain liveness check. Requests that arrive
+    earlier still work, they just wait on the registry's per-model load lock.
+    """
+
+    def __init__(self, registry, models: List[str], parallel: bool = True):
+        self.registry = registry
+        self.models = list(models)
+        self.parallel = parallel
+        self.ready = False
+        self.error: Optional[str] = None
+        self.breakdown: Dict[str, Any] = {}
+        self._created_at = time.perf_counter()
+        # Interpreter start-up plus imports, up to the point the app is built
+        self._age_at_create = process_age_seconds()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, background: bool = True) -> None:
+        if self._thread is not None or self.ready:
+            return
+        if background:
+            self._thread = threading.Thread(target=self._run, name="startup-preload", daemon=True)
+            self._thread.start()
+        else:
+            self._run()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def status(self) -> Dict[str, Any]:
+        state = "ready" if self.ready else ("failed" if self.error else "starting")
+        status: Dict[str, Any] = {"status": state, "models": self.models}
+        if self.breakdown:
+            status["startup"] = self.breakdown
+        if self.error:
+            status["error"] = self.error
+        return status
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            loaded = self.registry.preload(self.models, parallel=self.parallel)
+        except Exception as e:
+            self.error = str(e)
+            logging.error(f"Startup model loading failed: {e}")
+            return
+        described = self.registry.describe()["models"]
+        self.breakdown = {
+            "imports_s": self._age_at_create,
+            "app_to_preload_s": start - self._created_at,
+            "preload_s": time.perf_counter() - start,
+            "models": {
+                name: {"load_s": described[name].get("load_seconds"),
+                       "warmup_s": described[name].get("warmup_seconds")}
+                for name in loaded
+            },
+            "ready_after_s": process_age_seconds(),
+        }
+        self.ready = True
+        report = self.report()
+        logging.info(report)
+        print(report, flush=True)
+
+    def report(self) -> str:
+        b = self.breakdown
+
+        def _s(value: Optional[float]) -> str:
+            return "n/a" if value is None else f"{value:.3f}s"
+
+        lines = [f"Startup timing ({'parallel' if self.parallel else 'sequential'} model loading):",
+                 f"  interpreter + imports  {_s(b.get('imports_s'))}",
+                 f"  app built -> preload   {_s(b.get('app_to_preload_s'))}"]
+        for name, timing in b.get("models", {}).items():
+            lines.append(f"  {name:<22} load {_s(timing['load_s'])}, warmup {_s(timing['warmup_s'])}")
+        lines.append(f"  preload wall time      {_s(b.get('preload_s'))}")
+        lines.append(f"  ready after process start {_s(b.get('ready_after_s'))}")
+        return "\n".join(lines)
@@ -0,0 +1,143 @@
+"""
+CPU budget for a serving process.
+
+Every serving process (an app, or one pre-fork worker) gets ``threads`` CPUs:
+by default its share of the CPUs it may run on. Inference calls are
+single-threaded, since concurrency comes from the inference workers, so the
+BLAS and OpenMP pools are limited to one thread, random forests predict with
+joblib's default of one job and XGBoost boosters with ``nthread=1``. Only
+batches of at least ``parallel_min_rows`` rows evaluate trees on all budget
+threads (joblib threads for forests, a copy of the model with more threads
+for XGBoost).
+
+The native pools are limited once at startup and again after every model
+load, since scikit-learn's and XGBoost's OpenMP runtimes and SciPy's BLAS are
+only loaded with the first model that needs them.
+
+Workers can also be pinned to CPUs: ``"auto"`` gives each pre-fork slot its
+own block of ``threads`` CPUs, an explicit list such as ``"0-3,8"`` pins every
+process to those CPUs.
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from src.logger import logging
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(value: str) -> List[int]:
+    """
+    CPUs of a list like ``"0-3,8"``. Raises ValueError when malformed.
+    """
+    cpus = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    if not cpus:
+        raise ValueError(f"Empty CPU list: {value!r}")
+    return sorted(cpus)
+
+
+class ThreadBudget:
+    """
+    Thread limits for the models of one serving process. ``processes`` is how
+    many serving processes share the CPUs (pre-fork workers).
+    """
+
+    def __init__(self, threads: int = 0, parallel_min_rows: int = 512, affinity: str = "",
+                 processes: int = 1):
+        self.processes = max(1, processes)
+        cpus = available_cpus()
+        self.threads = threads if threads > 0 else max(1, len(cpus) // self.processes)
+        self.parallel_min_rows = parallel_min_rows
+        self.affinity = affinity.strip()
+        self.pinned: Optional[List[int]] = None
+        self.native_limited = False
+        self._native_lock = threading.Lock()
+        # Libraries already limited and logged
+        self._native_seen: Set[str] = set()
+        # threadpool_info() as of the last limit_native_pools(); describe() serves it,
+        # since querying the pools takes milliseconds
+        self._native_pools: Optional[List[Dict[str, Any]]] = None
+
+    @classmethod
+    def from_config(cls, config, processes: int = 1) -> "ThreadBudget":
+        return cls(config.inference_threads, config.parallel_min_rows, config.cpu_affinity, processes)
+
+    def pin(self, slot: int = 0) -> Optional[List[int]]:
+        """
+        Apply the CPU affinity for pre-fork slot ``slot`` to this process.
+        """
+        if not self.affinity or not hasattr(os, "sched_setaffinity"):
+            return None
+        try:
+            if self.affinity == "auto":
+                cpus = available_cpus()
+                start = (slot * self.threads) % len(cpus)
+                cpus = [cpus[(start + k) % len(cpus)] for k in range(min(self.threads, len(cpus)))]
+            else:
+                cpus = parse_cpu_list(self.affinity)
+            os.sched_setaffinity(0, cpus)
+            self.pinned = cpus
+        except (OSError, ValueError) as e:
+            logging.warning(f"CPU affinity {self.affinity!r} not applied: {e}")
+        return self.pinned
+
+    def limit_native_pools(self) -> bool:
+        """
+        Limit the BLAS and OpenMP thread pools loaded in this process so far to
+        one thread, and log the pools whenever new libraries have appeared; a
+        no-op without threadpoolctl. The process environment is left alone:
+        OMP_NUM_THREADS and friends stay whatever the deployment sets.
+        """
+        try:
+            from threadpoolctl import threadpool_info, threadpool_limits
+        except ImportError:
+            if not self.native_limited:
+                logging.info("threadpoolctl not installed, BLAS/OpenMP thread pools left as they are")
+            return False
+        with self._native_lock:
+            threadpool_limits(limits=1)
+            self.native_limited = True
+            pools = threadpool_info()
+            self._native_pools = [
+                {"api": pool["user_api"], "library": pool["internal_api"], "threads": pool["num_threads"]}
+                for pool in pools
+            ]
+            libraries = {pool["filepath"] for pool in pools}
+            if libraries - self._native_seen:
+                self._native_seen |= libraries
+                logging.info("Native thread pools: " + ", ".join(
+                    f"{pool['internal_api']} ({pool['user_api']}, {os.path.basename(pool['filepath'])}) "
+                    f"{pool['num_threads']} thread(s)" for pool in pools))
+        return True
+
+    def apply(self, pipeline) -> None:
+        """
+        Apply the limits to a freshly loaded ``PredictPipeline``, including the
+        native pools of the libraries its model brought in.
+        """
+        pipeline.set_thread_budget(self.threads, self.parallel_min_rows)
+        self.limit_native_pools()
+
+    def describe(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {
+            "threads": self.threads,
+            "processes": self.processes,
+            "parallel_min_rows": self.parallel_min_rows,
+            "affinity": self.affinity or None,
+            "cpus": available_cpus(),
+            "native_pools_limited": self.native_limited,
+        }
+        if self._native_pools is not None:
+            info["native_pools"] = self._native_pools
+        return info
@@ -0,0 +1,317 @@
+"""
+Memory-mappable artifact format for trained model objects.
+
+A converted artifact is a directory ``<name>.mmap/`` next to ``<name>.pkl``:
+
+    manifest.json   format version, checksums, source artifact and array table
+    object.pkl      the object graph, pickled with its large arrays left out
+    arrays.bin      every large numeric array (and the XGBoost booster bytes),
+                    uncompressed and 64-byte aligned
+
+Loading maps ``arrays.bin`` read-only and hands the unpickler zero-copy array
+views into it. Only arrays an object keeps as plain attributes stay views and
+are shared through the page cache by every process on the host: TF-IDF
+``idf_``, linear ``coef_`` and the node arrays of a forest flattened by
+src.pipeline.compiled (``<name>.compiled.mmap``, which the pipeline scores
+from). Everything whose ``__setstate__`` copies into native memory is private
+to each process, whatever the file format:
+
+    sklearn trees   memcpy their node and value arrays; a mapped forest saves
+                    the unpickling, not the per-worker copy
+    XGBoost         unserializes the booster into its own structures and cannot
+                    score from an external buffer, so boosters are never shared
+
+Loading checks file sizes and modification times against the manifest; the
+full sha256 comparison is opt-in (``checksum=True``) and done on conversion.
+
+Convert existing pickles with:
+
+    python -m src.utils.artifact_store artifacts/models
+"""
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import os
+import pickle
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+
+FORMAT_NAME = "civic-mmap-artifact"
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+OBJECT_FILE = "object.pkl"
+ARRAYS_FILE = "arrays.bin"
+MMAP_SUFFIX = ".mmap"
+# Flattened classifiers exported by src.pipeline.compiled: <name>.compiled.mmap
+COMPILED_SUFFIX = ".compiled"
+
+# Smaller arrays stay inline in object.pkl; a table entry costs more than they do
+MIN_EXTERNAL_BYTES = 1024
+_ALIGNMENT = 64
+
+
+class ArtifactChecksumError(ValueError):
+    """
+    Raised when a file of a memory-mapped artifact does not match its manifest.
+    """
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_version(path: str) -> str:
+    st = os.stat(path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+class _ArrayWriter:
+    def __init__(self, f):
+        self.f = f
+        self.table: List[Dict[str, Any]] = []
+        # Distinct dtypes, referenced by index from the table (a forest has two)
+        self.dtypes: List[Any] = []
+        self._dtype_index: Dict[np.dtype, int] = {}
+
+    def add(self, kind: str, array: np.ndarray) -> int:
+        offset = self.f.tell()
+        padding = -offset % _ALIGNMENT
+        if padding:
+            self.f.write(b"\0" * padding)
+            offset += padding
+        array = np.ascontiguousarray(array)
+        self.f.write(array.tobytes())
+        dtype_index = self._dtype_index.get(array.dtype)
+        if dtype_index is None:
+            dtype_index = self._dtype_index[array.dtype] = len(self.dtypes)
+            self.dtypes.append(np.lib.format.dtype_to_descr(array.dtype))
+        self.table.append({
+            "kind": kind,
+            "offset": offset,
+            "nbytes": int(array.nbytes),
+            "dtype": dtype_index,
+            "shape": list(array.shape),
+        })
+        return len(self.table) - 1
+
+
+class _ExternalizingPickler(pickle.Pickler):
+    def __init__(self, file, writer: _ArrayWriter):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.writer = writer
+
+    def persistent_id(self, obj):
+        if type(obj) is np.ndarray and not obj.dtype.hasobject and obj.nbytes >= MIN_EXTERNAL_BYTES:
+            return ("ndarray", self.writer.add("ndarray", obj))
+        if type(obj) is bytearray and len(obj) >= MIN_EXTERNAL_BYTES:
+            return ("bytearray", self.writer.add("bytearray", np.frombuffer(obj, dtype=np.uint8)))
+        return None
+
+
+class _MappedUnpickler(pickle.Unpickler):
+    def __init__(self, file, buffer, table: List[Dict[str, Any]], dtypes: List[Any]):
+        super().__init__(file)
+        self.buffer = buffer
+        self.table = table
+        self.dtypes = [np.lib.format.descr_to_dtype(_as_descr(descr)) for descr in dtypes]
+
+    def persistent_load(self, pid):
+        kind, index = pid
+        entry = self.table[index]
+        array = np.ndarray(tuple(entry["shape"]), dtype=self.dtypes[entry["dtype"]],
+                           buffer=self.buffer, offset=entry["offset"])
+        if kind == "bytearray":
+            # Consumers (XGBoost's Booster) need a writable buffer they copy from anyway
+            return bytearray(array)
+        return array
+
+
+def _as_descr(descr):
+    # JSON turns the (name, format) tuples of structured dtypes into lists
+    if isinstance(descr, list):
+        return [tuple(_as_descr(part) if isinstance(part, list) else part for part in field) for field in descr]
+    return descr
+
+
+def is_mmap_artifact(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_NAME or manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a {FORMAT_NAME} v{FORMAT_VERSION} artifact")
+    return manifest
+
+
+def save_mmap_object(path: str, obj, source_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write ``obj`` as a memory-mappable artifact directory at ``path``.
+    ``source_path`` records the pickle it was converted from, so loaders can
+    tell when the conversion is stale.
+    """
+    try:
+        os.makedirs(path, exist_ok=True)
+        arrays_path = os.path.join(path, ARRAYS_FILE)
+        object_path = os.path.join(path, OBJECT_FILE)
+        with open(arrays_path, "wb") as arrays_file:
+            writer = _ArrayWriter(arrays_file)
+            payload = io.BytesIO()
+            _ExternalizingPickler(payload, writer).dump(obj)
+        with open(object_path, "wb") as f:
+            f.write(payload.getvalue())
+
+        manifest: Dict[str, Any] = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "object": {"file": OBJECT_FILE, "sha256": _sha256(object_path),
+                       "bytes": os.path.getsize(object_path)},
+            "arrays": {"file": ARRAYS_FILE, "sha256": _sha256(arrays_path),
+                       "bytes": os.path.getsize(arrays_path), "dtypes": writer.dtypes,
+                       "table": writer.table},
+        }
+        if source_path is not None:
+            manifest["source"] = {"file": os.path.basename(source_path),
+                                  "version": _source_version(source_path),
+                                  "sha256": _sha256(source_path)}
+        # The manifest is written last: a directory without one is not an artifact
+        tmp_path = os.path.join(path, MANIFEST_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, os.path.join(path, MANIFEST_FILE))
+        logging.info(f"Memory-mapped artifact saved at: {path} ({len(writer.table)} external arrays)")
+        return manifest
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def _verify_files(path: str, manifest: Dict[str, Any], checksum: bool) -> None:
+    # The manifest is written after both files, so neither may be newer than it
+    written = os.stat(os.path.join(path, MANIFEST_FILE)).st_mtime_ns
+    for section in ("object", "arrays"):
+        file_path = os.path.join(path, manifest[section]["file"])
+        st = os.stat(file_path)
+        if st.st_size != manifest[section]["bytes"] or st.st_mtime_ns > written:
+            raise ArtifactChecksumError(f"{file_path} changed after its manifest was written")
+        if checksum and _sha256(file_path) != manifest[section]["sha256"]:
+            raise ArtifactChecksumError(f"Checksum mismatch for {file_path}")
+
+
+def load_mmap_object(path: str, verify: bool = True, checksum: bool = False):
+    """
+    Load an artifact written by ``save_mmap_object``; large arrays come back as
+    read-only views of the mapped ``arrays.bin``. ``verify`` checks the size
+    and mtime of both files against the manifest, ``checksum`` also compares
+    their sha256 (reads every byte, so it is off for serving loads).
+    """
+    try:
+        manifest = read_manifest(path)
+        object_path = os.path.join(path, manifest["object"]["file"])
+        arrays_path = os.path.join(path, manifest["arrays"]["file"])
+        if verify or checksum:
+            _verify_files(path, manifest, checksum)
+
+        buffer = b""
+        if manifest["arrays"]["bytes"]:
+            with open(arrays_path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(object_path, "rb") as f:
+            obj = _MappedUnpickler(f, buffer, manifest["arrays"]["table"], manifest["arrays"]["dtypes"]).load()
+        logging.info(f"Memory-mapped artifact loaded from: {path}")
+        return obj
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def mmap_artifact_for(pickle_path: str, suffix: str = MMAP_SUFFIX) -> Optional[str]:
+    """
+    The converted directory (``<name><suffix>``) for ``pickle_path`` if there is
+    one and it was made from the pickle currently on disk (or the pickle is
+    gone); otherwise None. The pickle is only hashed when its mtime or size
+    differ from the recorded ones, e.g. after a fresh checkout.
+    """
+    path = os.path.splitext(pickle_path)[0] + suffix
+    if not is_mmap_artifact(path):
+        return None
+    if not os.path.exists(pickle_path):
+        return path
+    try:
+        source = read_manifest(path).get("source") or {}
+    except (OSError, ValueError):
+        return None
+    if source.get("version") != _source_version(pickle_path) and source.get("sha256") != _sha256(pickle_path):
+        logging.warning(f"Ignoring stale memory-mapped artifact {path}; {pickle_path} changed since conversion")
+        return None
+    return path
+
+
+def _parity_frame(artifacts_dir: str):
+    test_path = os.path.join(artifacts_dir, "priority_test.csv")
+    if not os.path.exists(test_path):
+        return None
+    import pandas as pd
+
+    from src.pipeline.predict_pipeline import REQUIRED_COLUMNS
+
+    df = pd.read_csv(test_path)
+    return df[REQUIRED_COLUMNS] if set(REQUIRED_COLUMNS).issubset(df.columns) else None
+
+
+def convert_models(models_dir: str, names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Convert ``models_dir/*.pkl`` (or just ``names``) to memory-mapped artifacts.
+    Each conversion is loaded back and, when ``priority_test.csv`` is next to
+    the models directory, must reproduce the pickle's predict_proba exactly.
+    """
+    from src.utils.utils import load_object
+
+    frame = _parity_frame(os.path.dirname(os.path.abspath(models_dir)))
+    names = names or sorted(f[:-len(".pkl")] for f in os.listdir(models_dir) if f.endswith(".pkl"))
+    report: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        pickle_path = os.path.join(models_dir, f"{name}.pkl")
+        target = os.path.join(models_dir, f"{name}{MMAP_SUFFIX}")
+        original = load_object(pickle_path)
+        manifest = save_mmap_object(target, original, source_path=pickle_path)
+        converted = load_mmap_object(target, checksum=True)
+        checked = 0
+        if frame is not None and hasattr(original, "predict_proba"):
+            if not np.array_equal(original.predict_proba(frame), converted.predict_proba(frame)):
+                raise ValueError(f"Converted artifact {target} does not reproduce {pickle_path}")
+            checked = len(frame)
+        report[name] = {
+            "path": target,
+            "external_arrays": len(manifest["arrays"]["table"]),
+            "arrays_bytes": manifest["arrays"]["bytes"],
+            "object_bytes": manifest["object"]["bytes"],
+            "parity_rows": checked,
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert dill model pickles to memory-mapped artifacts")
+    parser.add_argument("models_dir", nargs="?", default=os.path.join("artifacts", "models"))
+    parser.add_argument("--model", action="append", dest="models",
+                        help="model name to convert (repeatable; default: every .pkl)")
+    args = parser.parse_args(argv)
+    for name, info in convert_models(args.models_dir, args.models).items():
+        print(f"{name}: {info['external_arrays']} arrays, {info['arrays_bytes']} bytes mapped, "
+              f"{info['object_bytes']} bytes pickled, parity checked on {info['parity_rows']} rows "
+              f"-> {info['path']}")
+
+
+if __name__ == "__main__":
+    main()
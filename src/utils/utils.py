@@ -1,10 +1,9 @@
 import os
 import sys
 import dill
+import numpy as np
 import logging
 from src.exception import CustomException
-from sklearn.model_selection import GridSearchCV
-from sklearn.metrics import accuracy_score, f1_score
 
 def save_object(file_path, obj):
     try:
@@ -28,7 +27,37 @@ def load_object(file_path):
     except Exception as e:
         raise CustomException(e)
 
+# Bookkeeping set during transform (CountVectorizer stores id(stop_words)); not fitted state
+_VOLATILE_ATTRIBUTES = {"_stop_words_id"}
+
+
+def same_state(a, b) -> bool:
+    """
+    Structural equality of two fitted objects (arrays, containers, estimators).
+    """
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return (isinstance(a, np.ndarray) and isinstance(b, np.ndarray)
+                and a.dtype == b.dtype and a.shape == b.shape and bool(np.array_equal(a, b)))
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same_state(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(same_state(x, y) for x, y in zip(a, b))
+    if hasattr(a, "__dict__") and not isinstance(a, type):
+        state_a = {k: v for k, v in vars(a).items() if k not in _VOLATILE_ATTRIBUTES}
+        state_b = {k: v for k, v in vars(b).items() if k not in _VOLATILE_ATTRIBUTES}
+        return same_state(state_a, state_b)
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
 def evaluate_models(X_train, y_train, X_test, y_test, models, params):
+    # Training-only imports; keeps load_object (the serving path) free of them
+    from sklearn.model_selection import GridSearchCV
+    from sklearn.metrics import accuracy_score
+
     try:
         report = {}
 
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ARTIFACTS_DIR = os.path.join(PROJECT_ROOT, "artifacts")
+HOLDOUT_CSV = os.path.join(ARTIFACTS_DIR, "priority_test.csv")
+
+
+@pytest.fixture
+def artifacts_dir(monkeypatch):
+    """
+    The trained artifacts, with the repository root as working directory
+    (the apps read ``artifacts/`` relative to it).
+    """
+    if not os.path.exists(os.path.join(ARTIFACTS_DIR, "models")):
+        pytest.skip("trained artifacts not available")
+    monkeypatch.chdir(PROJECT_ROOT)
+    return ARTIFACTS_DIR
+
+
+@pytest.fixture
+def holdout_records(artifacts_dir):
+    import pandas as pd
+
+    df = pd.read_csv(HOLDOUT_CSV)
+    return df[["short_description", "category", "location"]].to_dict("records")
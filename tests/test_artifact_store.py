@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.exception import CustomException
+from src.utils.artifact_store import ARRAYS_FILE, MANIFEST_FILE, load_mmap_object, save_mmap_object
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = str(tmp_path / "model.mmap")
+    save_mmap_object(path, {"coef": np.arange(1024, dtype=np.float64), "name": "linear"})
+    return path
+
+
+def _corrupt_in_place(path):
+    # Same size and, once the mtime is put back, invisible to the stat check
+    arrays_path = os.path.join(path, ARRAYS_FILE)
+    st = os.stat(arrays_path)
+    with open(arrays_path, "r+b") as f:
+        f.seek(8)
+        f.write(b"\xff" * 8)
+    os.utime(arrays_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def test_round_trip_maps_arrays(artifact):
+    obj = load_mmap_object(artifact)
+    assert obj["name"] == "linear"
+    np.testing.assert_array_equal(obj["coef"], np.arange(1024, dtype=np.float64))
+    assert not obj["coef"].flags.writeable
+
+
+def test_truncated_file_is_rejected(artifact):
+    with open(os.path.join(artifact, ARRAYS_FILE), "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(CustomException, match="changed after its manifest"):
+        load_mmap_object(artifact)
+
+
+def test_file_newer_than_manifest_is_rejected(artifact):
+    manifest_mtime = os.stat(os.path.join(artifact, MANIFEST_FILE)).st_mtime_ns
+    os.utime(os.path.join(artifact, ARRAYS_FILE), ns=(manifest_mtime, manifest_mtime + 10**9))
+    with pytest.raises(CustomException, match="changed after its manifest"):
+        load_mmap_object(artifact)
+
+
+def test_checksum_is_opt_in(artifact):
+    _corrupt_in_place(artifact)
+    assert load_mmap_object(artifact)["coef"][1] != 1.0
+    with pytest.raises(CustomException, match="Checksum mismatch"):
+        load_mmap_object(artifact, checksum=True)
@@ -0,0 +1,37 @@
+import pytest
+
+# Each app keeps its original answer to an empty batch
+EMPTY_BATCH = {"fastapi": (200, []), "flask": (400, {"error": "Provide a non-empty list of issues"})}
+
+
+@pytest.fixture(params=["fastapi", "flask"])
+def app(request, artifacts_dir):
+    """
+    (app name, POST returning (status code, parsed JSON body)) for either serving app.
+    """
+    if request.param == "fastapi":
+        from fastapi.testclient import TestClient
+
+        from backend.api import create_app
+
+        with TestClient(create_app()) as client:
+            yield "fastapi", lambda path, body: (lambda r: (r.status_code, r.json()))(client.post(path, json=body))
+    else:
+        from backend.flask_api import create_app
+
+        client = create_app().test_client()
+        yield "flask", lambda path, body: (lambda r: (r.status_code, r.get_json()))(client.post(path, json=body))
+
+
+@pytest.mark.parametrize("path", ["/predict/batch", "/predict/ensemble", "/rank", "/rank?k=2"])
+def test_empty_batch_keeps_original_answer(app, path):
+    name, post = app
+    assert post(path, []) == EMPTY_BATCH[name]
+
+
+def test_empty_columnar_batch(app):
+    name, post = app
+    status, body = post("/predict/batch?format=columnar", {"short_description": [], "category": [], "location": []})
+    assert status == EMPTY_BATCH[name][0]
+    if status == 200:
+        assert body["prediction"] == [] and body["confidence"] == []
@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from src.serving.batching import BatcherPool, MicroBatcher
+
+
+class _Recorder:
+    """
+    predict_fn that records the batches it was called with; ``gate`` holds
+    the first call until it is set.
+    """
+
+    def __init__(self, gate: threading.Event = None):
+        self.batches = []
+        self.gate = gate
+        self.started = threading.Event()
+
+    def __call__(self, records):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append([record["id"] for record in records])
+        return [{"id": record["id"], "batch_size": len(records)} for record in records]
+
+
+@pytest.fixture
+def batcher_factory():
+    batchers = []
+
+    def _make(predict_fn, **kwargs):
+        batcher = MicroBatcher(predict_fn, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield _make
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_flushes_when_batch_is_full(batcher_factory):
+    recorder = _Recorder()
+    # A long wait: only reaching max_batch_size can flush in time
+    batcher = batcher_factory(recorder, max_batch_size=4, max_wait_ms=10_000)
+    futures = [batcher.submit({"id": i}) for i in range(4)]
+    results = [future.result(timeout=2) for future in futures]
+    assert [result["id"] for result in results] == [0, 1, 2, 3]
+    assert recorder.batches == [[0, 1, 2, 3]]
+
+
+def test_flushes_partial_batch_after_max_wait(batcher_factory):
+    recorder = _Recorder()
+    batcher = batcher_factory(recorder, max_batch_size=32, max_wait_ms=50)
+    start = time.monotonic()
+    futures = [batcher.submit({"id": i}) for i in range(3)]
+    assert [future.result(timeout=2)["batch_size"] for future in futures] == [3, 3, 3]
+    assert time.monotonic() - start >= 0.045
+    assert batcher.stats()["batch_sizes"] == {"3": 1}
+
+
+def test_items_beyond_max_batch_size_go_to_next_batch(batcher_factory):
+    gate = threading.Event()
+    recorder = _Recorder(gate)
+    batcher = batcher_factory(recorder, max_batch_size=2, max_wait_ms=1)
+    first = batcher.submit({"id": 0})
+    assert recorder.started.wait(2)
+    futures = [batcher.submit({"id": i}) for i in range(1, 4)]
+    gate.set()
+    for future in [first] + futures:
+        future.result(timeout=2)
+    assert recorder.batches == [[0], [1, 2], [3]]
+
+
+def test_full_queue_rejects(batcher_factory):
+    gate = threading.Event()
+    recorder = _Recorder(gate)
+    batcher = batcher_factory(recorder, max_batch_size=1, max_wait_ms=0, max_queue_depth=1)
+    running = batcher.submit({"id": 0})
+    assert recorder.started.wait(2)
+    queued = batcher.submit({"id": 1})
+    with pytest.raises(queue.Full):
+        batcher.submit({"id": 2})
+    gate.set()
+    assert running.result(timeout=2)["id"] == 0 and queued.result(timeout=2)["id"] == 1
+    assert batcher.stats()["rejected"] == 1
+
+
+def test_cancelled_request_is_not_scored(batcher_factory):
+    recorder = _Recorder()
+    batcher = batcher_factory(recorder, max_batch_size=8, max_wait_ms=100)
+    cancelled = batcher.submit({"id": 0})
+    kept = batcher.submit({"id": 1})
+    assert cancelled.cancel()
+    assert kept.result(timeout=2)["batch_size"] == 1
+    assert recorder.batches == [[1]]
+
+
+def test_batch_failure_fails_every_request(batcher_factory):
+    def _fail(records):
+        raise RuntimeError("model error")
+
+    batcher = batcher_factory(_fail, max_batch_size=2, max_wait_ms=10_000)
+    futures = [batcher.submit({"id": i}) for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model error"):
+            future.result(timeout=2)
+
+
+def test_pool_creates_one_batcher_per_model():
+    created = []
+
+    def _predict_fn_for(name):
+        created.append(name)
+        return _Recorder()
+
+    pool = BatcherPool(_predict_fn_for, max_batch_size=1, max_wait_ms=0)
+    try:
+        assert pool.get("a") is pool.get("a")
+        assert pool.get("b") is not pool.get("a")
+        assert created == ["a", "b"]
+    finally:
+        pool.close()
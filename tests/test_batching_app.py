@@ -0,0 +1,53 @@
+import json
+import os
+import time
+
+import pytest
+
+
+@pytest.fixture
+def batching_client(artifacts_dir, monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+
+    monkeypatch.setenv("PREDICT_BATCHING", "1")
+    monkeypatch.setenv("PROFILE_SAMPLE_EVERY", "1")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def test_batched_predict_runs_on_inference_executor(batching_client, holdout_records):
+    before = batching_client.get("/health").json()["inference"]["completed"]
+    response = batching_client.post("/predict", json=holdout_records[0])
+    assert response.status_code == 200
+    health = batching_client.get("/health").json()
+    assert health["inference"]["completed"] == before + 1
+    assert sum(stats["items"] for stats in health["batching"].values()) == 1
+    assert health["admission"]["service_time"]
+
+
+def test_batched_predict_is_profiled(batching_client, holdout_records, tmp_path):
+    assert batching_client.post("/predict", json=holdout_records[0]).status_code == 200
+    summaries = [f for f in os.listdir(tmp_path) if f.endswith(".json")]
+    assert summaries
+    with open(os.path.join(tmp_path, summaries[-1])) as f:
+        assert json.load(f)["endpoint"] == "/predict"
+
+
+def test_deadline_passing_in_batch_queue_withdraws_request(artifacts_dir, holdout_records, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+
+    monkeypatch.setenv("PREDICT_BATCHING", "1")
+    monkeypatch.setenv("PREDICT_BATCH_MAX_SIZE", "8")
+    monkeypatch.setenv("PREDICT_BATCH_MAX_WAIT_MS", "300")
+    with TestClient(create_app()) as client:
+        response = client.post("/predict", json=holdout_records[0], headers={"X-Request-Deadline-Ms": "20"})
+        assert response.status_code == 504
+        # Past the batch's flush: the withdrawn request was never scored
+        time.sleep(0.4)
+        health = client.get("/health").json()
+    assert sum(stats["items"] for stats in health["batching"].values()) == 0
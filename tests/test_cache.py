@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from src.serving import cache as cache_module
+from src.serving.cache import FeatureRowCache, PredictionCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_prediction_cache_expires_after_ttl(clock):
+    cache = PredictionCache(max_entries=10, ttl_seconds=5)
+    cache.put("a", 1)
+    clock.now += 5
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 1, 1, 0)
+
+
+def test_prediction_cache_without_ttl_never_expires(clock):
+    cache = PredictionCache(max_entries=10)
+    cache.put("a", 1)
+    clock.now += 10 ** 6
+    assert cache.get("a") == 1
+
+
+def test_prediction_cache_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_prediction_cache_rejects_empty_size():
+    with pytest.raises(ValueError):
+        PredictionCache(max_entries=0)
+
+
+def _row(n: int) -> tuple:
+    return np.arange(n, dtype=np.int32), np.ones(n)
+
+
+def test_feature_row_cache_evicts_by_bytes():
+    value = _row(4)
+    size = FeatureRowCache._size(("fp", "abc"), value)
+    cache = FeatureRowCache(max_bytes=2 * size)
+    cache.put(("fp", "abc"), value)
+    cache.put(("fp", "def"), value)
+    assert cache.get(("fp", "abc")) is not None
+    cache.put(("fp", "ghi"), value)
+    assert cache.get(("fp", "def")) is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 2 * size, 1)
+
+
+def test_feature_row_cache_replacing_a_key_keeps_byte_count():
+    cache = FeatureRowCache()
+    cache.put(("fp", "abc"), _row(4))
+    cache.put(("fp", "abc"), _row(8))
+    assert cache.stats()["bytes"] == FeatureRowCache._size(("fp", "abc"), _row(8))
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src.pipeline.cascade import CascadePipeline
+
+CLASSES = ["High", "Low", "Medium"]
+
+
+class _Stage:
+    """
+    Cascade member that answers a fixed probability row per description and
+    records which descriptions it scored. Preprocessors differ per stage, so
+    every stage featurizes for itself.
+    """
+
+    def __init__(self, name, proba, class_names=CLASSES):
+        self.model = type("Model", (), {"named_steps": {"preprocessor": name}})()
+        self.label_encoder = None
+        self.class_names = list(class_names)
+        self.artifact_version = name
+        self._featurizer = None
+        self.proba = proba
+        self.scored = []
+
+    def _predict_proba_rows(self, rows):
+        self.scored.extend(row[0] for row in rows)
+        return np.array([self.proba[row[0]] for row in rows], dtype=float)
+
+
+def _cascade(stages, threshold=0.5):
+    by_name = {stage.artifact_version: stage for stage in stages}
+    return CascadePipeline(by_name.__getitem__, list(by_name), threshold=threshold)
+
+
+def _records(descriptions):
+    return [{"short_description": d, "category": "Road", "location": "Downtown"} for d in descriptions]
+
+
+def test_only_rows_below_threshold_are_escalated():
+    cheap = _Stage("cheap", {"sure": [0.8, 0.1, 0.1], "edge": [0.5, 0.3, 0.2], "unsure": [0.4, 0.35, 0.25]})
+    heavy = _Stage("heavy", {"sure": [0.0, 0.0, 1.0], "edge": [0.0, 0.0, 1.0], "unsure": [0.1, 0.7, 0.2]})
+    cascade = _cascade([cheap, heavy], threshold=0.5)
+
+    proba = cascade.predict_proba_many(_records(["sure", "edge", "unsure"]))
+    assert cheap.scored == ["sure", "edge", "unsure"]
+    # A top-class probability equal to the threshold is confident enough
+    assert heavy.scored == ["unsure"]
+    np.testing.assert_array_equal(proba, [[0.8, 0.1, 0.1], [0.5, 0.3, 0.2], [0.1, 0.7, 0.2]])
+    stats = cascade.stats()
+    assert (stats["rows"], stats["escalated"], stats["escalation_rate"]) == (3, [1], pytest.approx(1 / 3))
+
+
+def test_escalated_rows_take_the_last_stage_in_cascade_class_order():
+    cheap = _Stage("cheap", {"a": [0.4, 0.3, 0.3], "b": [0.4, 0.3, 0.3], "c": [0.9, 0.05, 0.05]})
+    middle = _Stage("middle", {"a": [0.3, 0.3, 0.4], "b": [0.1, 0.1, 0.8]})
+    # Columns in a different class order than the first stage
+    heavy = _Stage("heavy", {"a": [0.6, 0.3, 0.1]}, class_names=["Medium", "High", "Low"])
+    cascade = _cascade([cheap, middle, heavy], threshold=0.5)
+
+    results = cascade.predict_many(_records(["a", "b", "c", "a"]))
+    assert [r["prediction"] for r in results] == ["Medium", "Medium", "High", "Medium"]
+    assert results[0]["class_probabilities"] == {"High": 0.3, "Low": 0.1, "Medium": 0.6}
+    assert results[1]["class_probabilities"] == {"High": 0.1, "Low": 0.1, "Medium": 0.8}
+    # Duplicate rows are scored once; only "a" reaches the last stage
+    assert (cheap.scored, middle.scored, heavy.scored) == (["a", "b", "c"], ["a", "b"], ["a"])
+    assert cascade.stats()["escalated"] == [2, 1]
+
+
+def test_threshold_zero_never_escalates():
+    cheap = _Stage("cheap", {"a": [0.34, 0.33, 0.33]})
+    heavy = _Stage("heavy", {"a": [1.0, 0.0, 0.0]})
+    cascade = _cascade([cheap, heavy], threshold=0.0)
+    assert cascade.predict_many(_records(["a"]))[0]["confidence"] == 0.34
+    assert heavy.scored == [] and cascade.stats()["escalation_rate"] == 0.0
+
+
+def test_cascade_needs_two_models():
+    with pytest.raises(ValueError):
+        _cascade([_Stage("only", {})])
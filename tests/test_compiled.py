@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.pipeline.compiled import (
+    CompiledForest,
+    CompiledLinear,
+    compile_classifier,
+    load_compiled,
+)
+from src.pipeline.predict_pipeline import REQUIRED_COLUMNS
+from src.utils.utils import load_object
+
+from tests.conftest import HOLDOUT_CSV
+
+
+def _holdout_case(artifacts_dir, name):
+    path = os.path.join(artifacts_dir, "models", f"{name}.pkl")
+    if not os.path.exists(path):
+        pytest.skip(f"{name} not trained")
+    model = load_object(path)
+    features = model.named_steps["preprocessor"].transform(pd.read_csv(HOLDOUT_CSV)[REQUIRED_COLUMNS])
+    classifier = model.steps[-1][1]
+    return classifier, features, classifier.predict_proba(features)
+
+
+def test_linear_matches_exactly(artifacts_dir):
+    classifier, features, expected = _holdout_case(artifacts_dir, "logistic_regression")
+    compiled = compile_classifier(classifier)
+    assert isinstance(compiled, CompiledLinear)
+    np.testing.assert_array_equal(compiled.predict_proba(features), expected)
+
+
+def test_xgboost_stays_on_the_wrapper(artifacts_dir):
+    classifier, _, _ = _holdout_case(artifacts_dir, "xgb_model")
+    assert compile_classifier(classifier) is None
+
+
+@pytest.mark.parametrize("dense", [True, False])
+def test_forest_matches_within_one_ulp(artifacts_dir, dense):
+    classifier, features, expected = _holdout_case(artifacts_dir, "random_forest")
+    compiled = compile_classifier(classifier)
+    assert isinstance(compiled, CompiledForest)
+    # Tree votes are summed in a different order; allow one ulp at the scale of a probability (1.0)
+    np.testing.assert_allclose(compiled.predict_proba(features, dense=dense), expected,
+                               rtol=0, atol=np.finfo(np.float64).eps)
+
+
+def test_exported_forest_matches(artifacts_dir):
+    compiled = load_compiled(os.path.join(artifacts_dir, "models"), "random_forest")
+    if compiled is None:
+        pytest.skip("no up-to-date random_forest.compiled.mmap")
+    classifier, features, expected = _holdout_case(artifacts_dir, "random_forest")
+    np.testing.assert_allclose(compiled.predict_proba(features), expected, rtol=0, atol=np.finfo(np.float64).eps)
@@ -0,0 +1,57 @@
+import time
+
+from src.serving.deadline import AdmissionController, Deadline, ServiceTimeModel
+from src.serving.executor import BoundedExecutor
+
+
+def test_single_batch_size_is_not_extrapolated():
+    model = ServiceTimeModel()
+    for _ in range(20):
+        model.observe("rf", 1, 0.0017)
+    # The per-call figure, not 1000 x 1.7ms
+    assert abs(model.estimate("rf", 1000) - 0.0017) < 1e-9
+
+
+def test_fit_after_two_batch_sizes():
+    model = ServiceTimeModel()
+    for _ in range(10):
+        model.observe("rf", 1, 0.002)
+        model.observe("rf", 101, 0.012)
+    assert abs(model.estimate("rf", 1) - 0.002) < 1e-6
+    assert abs(model.estimate("rf", 1001) - 0.102) < 1e-6
+
+
+def test_unseen_model_has_no_estimate():
+    assert ServiceTimeModel().estimate("rf", 10) is None
+
+
+def test_large_batch_fits_on_idle_executor():
+    executor = BoundedExecutor(max_workers=1, max_queue=4)
+    try:
+        admission = AdmissionController(executor)
+        for _ in range(20):
+            admission.service_times.observe("random_forest", 1, 0.0017)
+        assert admission.fits(Deadline(0.2), "random_forest", 1000)
+    finally:
+        executor.shutdown()
+
+
+def test_large_rank_on_idle_server_is_not_degraded(artifacts_dir, holdout_records, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+    from src.serving.deadline import DEGRADED_HEADER
+
+    monkeypatch.delenv("PREDICT_BATCHING", raising=False)
+    monkeypatch.delenv("REQUEST_DEADLINE_MS", raising=False)
+    with TestClient(create_app()) as client:
+        for _ in range(100):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.1)
+        for record in holdout_records[:20]:
+            assert client.post("/predict", json=record).status_code == 200
+        batch = (holdout_records * 11)[:1000]
+        response = client.post("/rank?k=10", json=batch, headers={"X-Request-Deadline-Ms": "200"})
+        assert response.status_code == 200
+        assert DEGRADED_HEADER not in response.headers
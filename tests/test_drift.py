@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+
+def _client(monkeypatch, enabled: bool):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+
+    if enabled:
+        monkeypatch.setenv("DRIFT_MONITORING", "1")
+    else:
+        monkeypatch.delenv("DRIFT_MONITORING", raising=False)
+    monkeypatch.delenv("PREDICT_BATCHING", raising=False)
+    return TestClient(create_app())
+
+
+def _wait_for_baseline(client, model, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        scored = client.get("/admin/drift").json()["current"]["predictions"].get(model, {})
+        if "confidence_psi" in scored:
+            return scored
+        assert scored.get("baseline_pending", True)
+        time.sleep(0.05)
+    pytest.fail(f"no drift baseline for {model} after {timeout}s")
+
+
+def test_drift_is_off_by_default(artifacts_dir, monkeypatch, holdout_records):
+    with _client(monkeypatch, enabled=False) as client:
+        assert client.post("/predict", json=holdout_records[0]).status_code == 200
+        assert client.get("/admin/drift").json() == {"enabled": False}
+        assert "civic_drift" not in client.get("/metrics").text
+
+
+def test_baseline_is_computed_in_background_without_caches(artifacts_dir, monkeypatch, holdout_records):
+    with _client(monkeypatch, enabled=True) as client:
+        health = client.get("/health").json()
+        entries, text_entries = health["cache"]["entries"], health["tfidf_cache"]["entries"]
+        assert client.post("/predict/batch", json=holdout_records[:5]).status_code == 200
+        scored = _wait_for_baseline(client, "random_forest")
+        assert scored["rows"] == 5
+        assert scored["baseline_class_mix"]
+        health = client.get("/health").json()
+        # Only the five scored rows were cached, not the holdout split
+        assert health["cache"]["entries"] == entries + 5
+        assert health["tfidf_cache"]["entries"] <= text_entries + 5
+        report = client.get("/admin/drift").json()
+        assert report["enabled"] and report["current"]["rows"] == 5
@@ -0,0 +1,63 @@
+import csv
+import threading
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.pipeline.ensemble import EnsemblePipeline, load_ensemble_weights
+from src.utils.utils import same_state, save_object
+
+MEMBERS = ["random_forest", "xgb_model", "logistic_regression"]
+
+
+def _artifacts(tmp_path, model_results, labels=None):
+    save_object(str(tmp_path / "training_metadata.pkl"), {"model_results": model_results})
+    if labels is not None:
+        with open(tmp_path / "priority_test.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["short_description", "category", "location", "admin_priority"])
+            writer.writerows([["x", "Road", "Downtown", label] for label in labels])
+    return str(tmp_path)
+
+
+def test_weights_use_margin_over_majority_rate(tmp_path):
+    # Majority class is 60% of the holdout: margins 0.3 / 0.1 / 0.2
+    artifacts_dir = _artifacts(tmp_path, {"Random Forest": 0.9, "XGBoost": 0.7, "Logistic Regression": 0.8},
+                               ["High"] * 6 + ["Low"] * 4)
+    weights = load_ensemble_weights(artifacts_dir)
+    assert weights == pytest.approx({"random_forest": 0.5, "xgb_model": 1 / 6, "logistic_regression": 1 / 3})
+
+
+def test_member_not_beating_baseline_gives_equal_weights(tmp_path):
+    artifacts_dir = _artifacts(tmp_path, {"Random Forest": 0.9, "XGBoost": 0.5, "Logistic Regression": 0.8},
+                               ["High"] * 6 + ["Low"] * 4)
+    assert load_ensemble_weights(artifacts_dir) == pytest.approx({name: 1 / 3 for name in MEMBERS})
+
+
+def test_without_holdout_weights_follow_accuracy(tmp_path):
+    artifacts_dir = _artifacts(tmp_path, {"Random Forest": 0.5, "XGBoost": 0.25, "Logistic Regression": 0.25})
+    assert load_ensemble_weights(artifacts_dir) == pytest.approx(
+        {"random_forest": 0.5, "xgb_model": 0.25, "logistic_regression": 0.25})
+
+
+def test_same_state_compares_fitted_objects():
+    corpus = ["pothole on main street", "broken streetlight"]
+    assert same_state(TfidfVectorizer().fit(corpus), TfidfVectorizer().fit(corpus))
+    assert not same_state(TfidfVectorizer().fit(corpus), TfidfVectorizer().fit(corpus[:1]))
+    assert not same_state(np.zeros(2, dtype=np.float32), np.zeros(2))
+
+
+def test_ensembles_share_one_member_pool(artifacts_dir, holdout_records):
+    from src.serving.registry import ModelRegistry
+
+    registry = ModelRegistry(artifacts_dir)
+    weights = load_ensemble_weights(artifacts_dir)
+    first = EnsemblePipeline(registry.get, weights)
+    # Each hot swap builds a new ensemble; none of them starts threads of its own
+    for _ in range(5):
+        ensemble = EnsemblePipeline(registry.get, weights)
+        assert ensemble._pool is first._pool
+        ensemble.predict_many(holdout_records[:4])
+    member_threads = [t for t in threading.enumerate() if t.name.startswith("ensemble")]
+    assert 0 < len(member_threads) <= first._pool._max_workers
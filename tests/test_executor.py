@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from src.serving.executor import BoundedExecutor, ExecutorSaturated
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor(max_workers=1, max_queue=1, retry_after=2.5)
+    yield executor
+    executor.shutdown()
+
+
+def test_rejects_beyond_workers_plus_queue(executor):
+    gate, started = threading.Event(), threading.Event()
+    running = executor.submit(lambda: started.set() or gate.wait(5))
+    assert started.wait(2)
+    queued = executor.submit(lambda: "queued")
+    with pytest.raises(ExecutorSaturated) as e:
+        executor.submit(lambda: "rejected")
+    assert e.value.retry_after == 2.5
+    stats = executor.stats()
+    assert (stats["running"], stats["queue_depth"], stats["rejected"]) == (1, 1, 1)
+    gate.set()
+    assert running.result(timeout=2) and queued.result(timeout=2) == "queued"
+
+
+def test_slots_are_released_after_failures(executor):
+    def _fail():
+        raise RuntimeError("boom")
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            executor.submit(_fail).result(timeout=2)
+    assert executor.submit(lambda: 1).result(timeout=2) == 1
+    assert executor.stats()["completed"] == 4
+
+
+def test_saturated_app_answers_503_with_retry_after(artifacts_dir, holdout_records, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+    from src.pipeline.predict_pipeline import PredictPipeline
+
+    monkeypatch.setenv("INFERENCE_WORKERS", "1")
+    monkeypatch.setenv("INFERENCE_QUEUE_DEPTH", "0")
+    monkeypatch.setenv("INFERENCE_RETRY_AFTER_S", "2.5")
+    monkeypatch.delenv("PREDICT_BATCHING", raising=False)
+    monkeypatch.delenv("REQUEST_DEADLINE_MS", raising=False)
+
+    with TestClient(create_app()) as client:
+        assert client.post("/predict", json=holdout_records[0]).status_code == 200
+        gate, started = threading.Event(), threading.Event()
+        predict = PredictPipeline.predict
+
+        def _held(self, record):
+            started.set()
+            gate.wait(5)
+            return predict(self, record)
+
+        monkeypatch.setattr(PredictPipeline, "predict", _held)
+        held = {}
+        thread = threading.Thread(target=lambda: held.update(
+            response=client.post("/predict", json=holdout_records[1])))
+        thread.start()
+        try:
+            assert started.wait(5)
+            response = client.post("/predict", json=holdout_records[2])
+        finally:
+            gate.set()
+            thread.join(5)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        assert held["response"].status_code == 200
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.pipeline.featurizer import vectorizer_fingerprint
+from src.serving.cache import FeatureRowCache
+
+
+def test_fingerprint_changes_when_vectorizer_is_refitted():
+    first = TfidfVectorizer().fit(["pothole on main street", "broken streetlight"])
+    same = TfidfVectorizer().fit(["pothole on main street", "broken streetlight"])
+    refitted = TfidfVectorizer().fit(["pothole on main street", "graffiti on the wall"])
+    reweighted = TfidfVectorizer().fit(["pothole on main street", "broken streetlight", "pothole again"])
+    assert vectorizer_fingerprint(first) == vectorizer_fingerprint(same)
+    assert vectorizer_fingerprint(first) != vectorizer_fingerprint(refitted)
+    assert vectorizer_fingerprint(first) != vectorizer_fingerprint(reweighted)
+
+
+def test_fingerprint_covers_vectorizer_settings():
+    corpus = ["pothole on main street", "broken streetlight"]
+    assert (vectorizer_fingerprint(TfidfVectorizer().fit(corpus))
+            != vectorizer_fingerprint(TfidfVectorizer(sublinear_tf=True).fit(corpus)))
+
+
+def _fitted_pipeline(descriptions):
+    import pandas as pd
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    df = pd.DataFrame({"short_description": descriptions, "category": ["Road", "Lighting"] * 2,
+                       "location": ["Downtown"] * 4})
+    preprocessor = ColumnTransformer([("text", TfidfVectorizer(), "short_description"),
+                                      ("cat", OneHotEncoder(handle_unknown="ignore"), ["category", "location"])])
+    return Pipeline([("preprocessor", preprocessor), ("classifier", LogisticRegression())]).fit(
+        df, ["High", "Low", "High", "Low"]), df
+
+
+def _dense(X):
+    return X.toarray() if hasattr(X, "toarray") else X
+
+
+def test_refitted_vectorizer_does_not_read_old_rows():
+    from src.pipeline.featurizer import SparseFeaturizer
+
+    columns = ["short_description", "category", "location"]
+    text_cache = FeatureRowCache()
+    old, df = _fitted_pipeline(["pothole on main", "dark street", "pothole again", "street light out"])
+    rows = list(df.itertuples(index=False, name=None))
+    SparseFeaturizer.from_pipeline(old, columns, text_cache=text_cache).transform(rows)
+    entries = text_cache.stats()["entries"]
+
+    new, _ = _fitted_pipeline(["pothole on main", "graffiti on wall", "pothole again", "broken bench"])
+    X = SparseFeaturizer.from_pipeline(new, columns, text_cache=text_cache).transform(rows)
+    expected = new.named_steps["preprocessor"].transform(df)
+    np.testing.assert_array_equal(_dense(X), _dense(expected))
+    assert text_cache.stats()["hits"] == 0
+    assert text_cache.stats()["entries"] == 2 * entries
+
+
+def _variant_records(holdout_records):
+    """
+    Holdout rows plus unseen categories/locations and descriptions that differ
+    only in case and whitespace, repeated so cached rows are read back.
+    """
+    base = holdout_records[:40]
+    variants = [
+        dict(base[0], category="Not a category"),
+        dict(base[1], location="Not a location"),
+        dict(base[2], category="Not a category", location="Not a location"),
+        dict(base[3], short_description="  " + base[3]["short_description"].upper() + "\t"),
+        dict(base[4], short_description=" ".join(base[4]["short_description"].split()).title()),
+        dict(base[5], short_description="zzz unseen words only"),
+        dict(base[6], short_description=""),
+    ]
+    return base + variants + base[:5] + variants
+
+
+@pytest.mark.parametrize("model_name", ["random_forest", "xgb_model", "logistic_regression"])
+@pytest.mark.parametrize("cached", [False, True])
+def test_featurizer_matches_column_transformer(artifacts_dir, holdout_records, model_name, cached):
+    import pandas as pd
+
+    from src.pipeline.predict_pipeline import REQUIRED_COLUMNS, PredictPipeline
+
+    pipeline = PredictPipeline(artifacts_dir, model_name, text_cache=FeatureRowCache() if cached else None)
+    featurizer, model = pipeline._featurizer, pipeline.model
+    assert featurizer is not None
+    records = _variant_records(holdout_records)
+    df = pd.DataFrame(records)[REQUIRED_COLUMNS]
+    rows = list(df.itertuples(index=False, name=None))
+
+    expected = model[:-1].transform(df)
+    for _ in range(2 if cached else 1):
+        X = featurizer.transform(rows)
+        assert type(X) is type(expected) and X.dtype == expected.dtype
+        np.testing.assert_array_equal(_dense(X), _dense(expected))
+        # Bit-identical probabilities from the classifier on either feature matrix
+        np.testing.assert_array_equal(model.steps[-1][1].predict_proba(X), model.predict_proba(df))
+    if cached:
+        assert featurizer.text_cache.stats()["hits"] > 0
@@ -0,0 +1,39 @@
+import argparse
+import json
+import os
+
+from src.serving.config import ServingConfig
+from src.serving.loadtest import PayloadFactory, _hit_rates, run_meta
+
+
+def test_env_names_cover_every_setting(monkeypatch):
+    read = []
+    getenv = os.getenv
+    monkeypatch.setattr(os, "getenv", lambda name, *default: read.append(name) or getenv(name, *default))
+    ServingConfig()
+    assert read and set(read) <= set(ServingConfig.ENV_NAMES)
+    assert len(ServingConfig.ENV_NAMES) == len(set(ServingConfig.ENV_NAMES))
+
+
+def test_run_meta_records_config_env(monkeypatch):
+    monkeypatch.setenv("TFIDF_CACHE_MB", "16")
+    monkeypatch.setenv("OMP_NUM_THREADS", "1")
+    monkeypatch.setenv("UNRELATED_SETTING", "x")
+    env = run_meta(argparse.Namespace(app="fastapi", url=None), "http://127.0.0.1:1")["env"]
+    assert env["TFIDF_CACHE_MB"] == "16" and env["OMP_NUM_THREADS"] == "1"
+    assert "UNRELATED_SETTING" not in env
+
+
+def test_payloads_are_cache_busted_by_default():
+    issues = [{"short_description": "pothole", "category": "Road", "location": "Downtown"}]
+    payloads = PayloadFactory(issues, batch_size=2)
+    first, second = json.loads(payloads.body()), json.loads(payloads.body())
+    descriptions = [issue["short_description"] for issue in first + second]
+    assert len(set(descriptions)) == 4
+    assert json.loads(PayloadFactory(issues, None, cache_bust=False).body()) == issues[0]
+
+
+def test_hit_rates_over_scenario():
+    before = {"cache": (10, 10), "tfidf_cache": (0, 5)}
+    after = {"cache": (13, 11), "tfidf_cache": (0, 5)}
+    assert _hit_rates(before, after) == {"cache": 0.75, "tfidf_cache": None}
@@ -0,0 +1,135 @@
+import re
+
+import pytest
+
+from src.serving.metrics import Counter, Histogram, ServingMetrics, stats_gauges
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(,|$)')
+
+
+def _labels(text):
+    labels, pos = {}, 0
+    while pos < len(text):
+        match = LABEL.match(text, pos)
+        assert match, f"bad label set {text!r}"
+        labels[match.group(1)] = re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), match.group(2))
+        pos = match.end()
+    return labels
+
+
+def _parse(text):
+    """
+    Families of a text exposition: name -> {"help", "type", "samples": [(name, labels, value)]}.
+    Samples without a preceding HELP/TYPE are untyped families of their own.
+    """
+    assert text.endswith("\n")
+    families, current = {}, None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            current, _, doc = line[len("# HELP "):].partition(" ")
+            assert current not in families, f"{current} declared twice"
+            families[current] = {"help": doc, "type": None, "samples": []}
+        elif line.startswith("# TYPE "):
+            name, _, kind = line[len("# TYPE "):].partition(" ")
+            assert name == current and families[name]["type"] is None and not families[name]["samples"]
+            families[name]["type"] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"bad sample line {line!r}"
+            name, labels, value = match.group(1), _labels(match.group(3) or ""), float(match.group(4))
+            if current is None or name not in (current, current + "_bucket", current + "_sum", current + "_count"):
+                current = None
+                families.setdefault(name, {"help": None, "type": "untyped", "samples": []})
+            families[current or name]["samples"].append((name, labels, value))
+    return families
+
+
+def _metrics():
+    metrics = ServingMetrics()
+    for seconds in (0.0003, 0.002, 0.002, 0.7, 30.0):
+        metrics.request_seconds.observe(seconds, endpoint="/predict", model="random_forest")
+    metrics.observe_stages("/predict", "random_forest", {"classifier": 0.001, "decode": 0.0001})
+    metrics.observe_batch("/predict/batch", "xgb_model", 100)
+    metrics.requests.inc(endpoint="/predict", model='we"ird\\name\nx', status="200")
+    return metrics
+
+
+def test_families_have_help_and_type_before_samples():
+    families = _parse(_metrics().render())
+    for name in ("civic_request_seconds", "civic_inference_stage_seconds", "civic_batch_size",
+                 "civic_requests_in_flight", "civic_requests_total", "civic_request_errors_total"):
+        assert families[name]["help"] and families[name]["type"] in ("counter", "gauge", "histogram")
+    assert families["civic_request_seconds"]["type"] == "histogram"
+    assert families["civic_requests_total"]["type"] == "counter"
+    assert families["civic_requests_in_flight"]["type"] == "gauge"
+
+
+def test_histogram_buckets_are_cumulative_and_end_in_count():
+    families = _parse(_metrics().render())
+    samples = families["civic_request_seconds"]["samples"]
+    buckets = [(labels["le"], value) for name, labels, value in samples if name.endswith("_bucket")]
+    bounds = [float(le) for le, _ in buckets]
+    assert bounds == sorted(bounds) and buckets[-1][0] == "+Inf"
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts)
+    (count,) = [value for name, _, value in samples if name == "civic_request_seconds_count"]
+    (total,) = [value for name, _, value in samples if name == "civic_request_seconds_sum"]
+    assert counts[-1] == count == 5
+    assert total == pytest.approx(0.0003 + 0.002 + 0.002 + 0.7 + 30.0)
+    # Bucket bounds are inclusive (le)
+    assert dict(buckets)["0.0025"] == 3 and dict(buckets)["10.0"] == 4
+
+
+def test_label_values_are_escaped():
+    text = _metrics().render()
+    assert 'model="we\\"ird\\\\name\\nx"' in text
+    (sample,) = _parse(text)["civic_requests_total"]["samples"]
+    assert sample[1] == {"endpoint": "/predict", "model": 'we"ird\\name\nx', "status": "200"}
+
+
+def test_golden_counter_and_histogram():
+    counter = Counter("c_total", "A counter.", ("a",))
+    counter.inc(a="x")
+    counter.inc(2, a="x")
+    assert counter.render() == ["# HELP c_total A counter.", "# TYPE c_total counter", 'c_total{a="x"} 3.0']
+
+    histogram = Histogram("h", "A histogram.", buckets=(1, 0.5))
+    histogram.observe(0.5)
+    histogram.observe(3)
+    assert histogram.render() == [
+        "# HELP h A histogram.",
+        "# TYPE h histogram",
+        'h_bucket{le="0.5"} 1',
+        'h_bucket{le="1.0"} 1',
+        'h_bucket{le="+Inf"} 2',
+        "h_sum 3.5",
+        "h_count 2",
+    ]
+
+
+def test_stats_gauges_keep_numbers_only():
+    lines = stats_gauges("civic_cache", {"hits": 3, "hit_rate": 0.5, "enabled": True, "name": "x"}, {"cache": "p"})
+    assert lines == ['civic_cache_hits{cache="p"} 3', 'civic_cache_hit_rate{cache="p"} 0.5']
+
+
+def test_prometheus_client_parses_output():
+    parser = pytest.importorskip("prometheus_client.parser")
+    families = {f.name: f for f in parser.text_string_to_metric_families(_metrics().render())}
+    assert families["civic_request_seconds"].type == "histogram"
+    assert families["civic_requests"].type == "counter"
+
+
+def test_app_metrics_endpoint_parses(artifacts_dir, holdout_records):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+
+    with TestClient(create_app()) as client:
+        assert client.post("/predict/batch", json=holdout_records[:4]).status_code == 200
+        response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    families = _parse(response.text)
+    samples = families["civic_batch_size"]["samples"]
+    assert any(name == "civic_batch_size_count" and labels["endpoint"] == "/predict/batch" and value == 1
+               for name, labels, value in samples)
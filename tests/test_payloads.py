@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from src.serving.payloads import ARROW, PayloadError, UnsupportedMediaType, decode_issues
+
+ISSUES = [
+    {"short_description": "pothole on main street", "category": "Road", "location": "Downtown"},
+    {"short_description": "broken streetlight", "category": "Lighting", "location": "Uptown"},
+]
+COLUMNS = {column: [issue[column] for issue in ISSUES] for column in ISSUES[0]}
+
+
+def _as_rows(batch):
+    return list(zip(batch.short_description, batch.category, batch.location))
+
+
+EXPECTED = [tuple(issue.values()) for issue in ISSUES]
+
+
+def test_json_rows():
+    assert _as_rows(decode_issues(json.dumps(ISSUES).encode(), "application/json")) == EXPECTED
+
+
+def test_json_columns():
+    assert _as_rows(decode_issues(json.dumps(COLUMNS).encode(), "application/json; charset=utf-8")) == EXPECTED
+
+
+def test_missing_content_type_reads_json():
+    assert _as_rows(decode_issues(json.dumps(ISSUES).encode(), None)) == EXPECTED
+
+
+def test_json_columns_length_mismatch():
+    columns = dict(COLUMNS, location=["Downtown"])
+    with pytest.raises(PayloadError, match="same length"):
+        decode_issues(json.dumps(columns).encode(), "application/json")
+
+
+def test_json_column_not_an_array():
+    columns = dict(COLUMNS, category="Road")
+    with pytest.raises(PayloadError) as e:
+        decode_issues(json.dumps(columns).encode(), "application/json")
+    assert e.value.loc == ("category",)
+
+
+@pytest.mark.parametrize("payload, loc", [
+    ([ISSUES[0], dict(ISSUES[1], category="")], (1, "category")),
+    ([ISSUES[0], {"short_description": "x", "category": "Road"}], (1, "location")),
+    ([ISSUES[0], "not an object"], (1,)),
+    (dict(COLUMNS, location=["Downtown", 3]), ("location", 1)),
+])
+def test_invalid_values_point_at_offender(payload, loc):
+    with pytest.raises(PayloadError) as e:
+        decode_issues(json.dumps(payload).encode(), "application/json")
+    assert e.value.loc == loc
+
+
+def test_invalid_json():
+    with pytest.raises(PayloadError):
+        decode_issues(b"[{", "application/json")
+
+
+def _arrow_stream(columns):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_arrow():
+    assert _as_rows(decode_issues(_arrow_stream(COLUMNS), ARROW)) == EXPECTED
+
+
+def test_arrow_missing_column():
+    columns = {column: values for column, values in COLUMNS.items() if column != "location"}
+    with pytest.raises(PayloadError, match="location"):
+        decode_issues(_arrow_stream(columns), ARROW)
+
+
+def test_arrow_null_value():
+    body = _arrow_stream(dict(COLUMNS, category=["Road", None]))
+    with pytest.raises(PayloadError) as e:
+        decode_issues(body, ARROW)
+    assert e.value.loc == ("category", 1)
+
+
+def test_arrow_invalid_stream():
+    pytest.importorskip("pyarrow")
+    with pytest.raises(PayloadError):
+        decode_issues(b"not arrow", ARROW)
+
+
+def test_arrow_without_pyarrow_is_unsupported(monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def _import(name, *args, **kwargs):
+        if name == "pyarrow" or name.startswith("pyarrow."):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", _import)
+    with pytest.raises(UnsupportedMediaType):
+        decode_issues(b"", ARROW)
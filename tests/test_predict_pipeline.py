@@ -0,0 +1,35 @@
+import pytest
+
+from src.pipeline.predict_pipeline import PredictPipeline
+from src.serving.cache import PredictionCache
+
+
+@pytest.mark.parametrize("model_name", ["random_forest", "xgb_model", "logistic_regression"])
+@pytest.mark.parametrize("cached", [False, True])
+def test_batch_matches_per_row_predict(artifacts_dir, holdout_records, model_name, cached):
+    pipeline = PredictPipeline(artifacts_dir, model_name, cache=PredictionCache(1000) if cached else None)
+    records = holdout_records[:30]
+    # Duplicates, adjacent and not, and a row differing only in case and whitespace
+    batch = records + records[:10] + [records[3]] * 3 + [
+        dict(records[0], short_description="  " + records[0]["short_description"].upper())]
+
+    per_row = [pipeline.predict(record) for record in batch]
+    assert pipeline.predict_many(batch) == per_row
+    assert pipeline.predict_many(batch[::-1]) == per_row[::-1]
+
+
+def test_batch_results_do_not_share_dicts(artifacts_dir, holdout_records):
+    pipeline = PredictPipeline(artifacts_dir, "logistic_regression")
+    first, second = pipeline.predict_many([holdout_records[0], holdout_records[0]])
+    assert first == second
+    first["class_probabilities"]["High"] = -1.0
+    assert second["class_probabilities"]["High"] != -1.0
+
+
+def test_large_xgboost_batches_use_a_multithreaded_copy(artifacts_dir, holdout_records):
+    pipeline = PredictPipeline(artifacts_dir, "xgb_model")
+    expected = pipeline.predict_proba_many(holdout_records)
+    pipeline.set_thread_budget(2, parallel_min_rows=8)
+    assert pipeline._parallel_classifier.get_params()["n_jobs"] == 2
+    assert pipeline.model.steps[-1][1].get_params()["n_jobs"] == 1
+    assert (pipeline.predict_proba_many(holdout_records) == expected).all()
@@ -0,0 +1,30 @@
+import importlib
+import sys
+
+import pytest
+
+from src.pipeline import compiled as compiled_module
+from src.serving.registry import ModelRegistry
+
+
+def test_importing_fastapi_app_module_builds_no_app(monkeypatch):
+    monkeypatch.delitem(sys.modules, "backend.api", raising=False)
+    module = importlib.import_module("backend.api")
+    assert "app" not in vars(module)
+    assert callable(module.create_app)
+
+
+def test_parent_preload_defers_parity_check_to_warmup(artifacts_dir, monkeypatch):
+    checked = []
+    verify = compiled_module.verify
+    monkeypatch.setattr(compiled_module, "verify", lambda compiled, classifier, **kwargs: (
+        checked.append(type(classifier).__name__), verify(compiled, classifier, **kwargs))[1])
+
+    registry = ModelRegistry(artifacts_dir)
+    registry.preload(["random_forest"], warmup=False)
+    pipeline = registry.get("random_forest")
+    assert checked == [] and pipeline._compiled is None
+
+    registry.warmup()
+    assert checked == ["RandomForestClassifier"]
+    assert pipeline._compiled is not None
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from src.serving.ranking import InvalidCursor, decode_cursor, encode_cursor, rank_by_high_probability, select_ranked
+
+
+class _Pipeline:
+    """
+    Scores each issue with the "High" probability given for its description.
+    """
+    class_names = ["High", "Low", "Medium"]
+
+    def __init__(self, high):
+        self.high = high
+
+    def predict_proba_many(self, batch):
+        high = np.array([self.high[text] for text in batch.short_description])
+        return np.column_stack([high, 1 - high, np.zeros_like(high)])
+
+    def build_results(self, proba):
+        return [{"confidence": float(row.max())} for row in proba]
+
+
+def test_ties_keep_input_order():
+    scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1, 0.5])
+    selected, has_more = select_ranked(scores)
+    assert selected.tolist() == [1, 3, 0, 2, 5, 4]
+    assert not has_more
+
+
+def test_top_k_cuts_ties_by_position():
+    scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1, 0.5])
+    selected, has_more = select_ranked(scores, k=4)
+    assert selected.tolist() == [1, 3, 0, 2]
+    assert has_more
+
+
+def test_min_score_filters():
+    scores = np.array([0.5, 0.9, 0.2])
+    selected, has_more = select_ranked(scores, min_score=0.5)
+    assert selected.tolist() == [1, 0]
+    assert not has_more
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(0.25, 7)) == (0.25, 7)
+    probability = 0.1 + 0.2
+    assert decode_cursor(encode_cursor(probability, 0))[0] == probability
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGpzb24=", "eyJwIjogMC41fQ=="])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_ranking_once_with_ties():
+    high = {f"issue {i}": score for i, score in enumerate([0.5, 0.9, 0.5, 0.9, 0.1, 0.5, 0.5])}
+    records = [{"short_description": text, "category": "Road", "location": "Downtown"} for text in high]
+    pipeline = _Pipeline(high)
+
+    full, cursor = rank_by_high_probability(pipeline, records)
+    assert cursor is None
+    pages, cursor = [], None
+    while True:
+        page, cursor = rank_by_high_probability(pipeline, records, k=2, cursor=cursor)
+        pages.extend(page)
+        if cursor is None:
+            break
+    assert [row["input"]["short_description"] for row in pages] == \
+        [row["input"]["short_description"] for row in full]
+    assert [row["input"]["short_description"] for row in full][:4] == ["issue 1", "issue 3", "issue 0", "issue 2"]
+
+
+def test_invalid_cursor_rejected_by_rank():
+    pipeline = _Pipeline({"a": 0.5})
+    with pytest.raises(InvalidCursor):
+        rank_by_high_probability(pipeline, [{"short_description": "a", "category": "c", "location": "l"}],
+                                 cursor="garbage")
+
+
+@pytest.mark.parametrize("value, status", [("-0.1", 400), ("1.5", 400), ("nan", 400), ("0", 200), ("1", 200)])
+def test_flask_rank_checks_min_high_probability(artifacts_dir, holdout_records, value, status):
+    from backend.flask_api import create_app
+
+    client = create_app().test_client()
+    response = client.post("/rank", json=holdout_records[:3], query_string={"min_high_probability": value})
+    assert response.status_code == status
@@ -0,0 +1,22 @@
+import pytest
+
+from src.serving.cache import FeatureRowCache, PredictionCache
+from src.serving.registry import ModelRegistry
+
+
+@pytest.mark.parametrize("model", ["random_forest", "cascade", "ensemble"])
+def test_warmup_leaves_caches_empty(artifacts_dir, model):
+    cache = PredictionCache(100)
+    text_cache = FeatureRowCache(1 << 20)
+    registry = ModelRegistry(artifacts_dir, cache=cache, text_cache=text_cache)
+    registry.get(model)
+    registry.warmup()
+    assert cache.stats()["entries"] == 0
+    assert text_cache.stats()["entries"] == 0
+
+
+def test_describe_reports_process_rss_delta(artifacts_dir):
+    registry = ModelRegistry(artifacts_dir)
+    registry.get("logistic_regression")
+    info = registry.describe()["models"]["logistic_regression"]
+    assert "process_rss_delta_bytes" in info and "rss_delta_bytes" not in info
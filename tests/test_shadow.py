@@ -0,0 +1,137 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.pipeline.predict_pipeline import IssueBatch, PredictPipeline, caches_bypassed
+from src.serving.shadow import ShadowScorer
+
+CLASSES = ["High", "Low", "Medium"]
+
+
+class _Stub:
+    """
+    Pipeline answering a fixed probability row; records whether the caches
+    were bypassed while it scored, and can be made to fail.
+    """
+
+    def __init__(self, row, fail=False):
+        self.class_names = CLASSES
+        self.row = row
+        self.fail = fail
+        self.bypassed = []
+
+    def predict_proba_many(self, batch):
+        self.bypassed.append(caches_bypassed())
+        if self.fail:
+            raise RuntimeError("candidate broke")
+        return np.tile(self.row, (len(batch), 1))
+
+
+def _batch(n=2):
+    return IssueBatch.from_records([{"short_description": f"issue {i}", "category": "Road", "location": "Downtown"}
+                                    for i in range(n)])
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def scorer_factory():
+    scorers = []
+
+    def _make(pipelines, **kwargs):
+        scorer = ShadowScorer(pipelines.__getitem__, "candidate", sample_rate=1.0, seed=0, **kwargs)
+        scorers.append(scorer)
+        return scorer
+
+    yield _make
+    for scorer in scorers:
+        scorer.close()
+
+
+def test_compares_candidate_with_live_without_caches(scorer_factory):
+    live, candidate = _Stub([0.6, 0.3, 0.1]), _Stub([0.2, 0.7, 0.1])
+    scorer = scorer_factory({"live": live, "candidate": candidate})
+    assert scorer.offer("live", _batch(2))
+    _wait_for(lambda: scorer.stats()["by_live_model"])
+    comparison = scorer.stats()["by_live_model"]["live"]
+    assert comparison["rows"] == 2 and comparison["agreement_rate"] == 0.0
+    assert comparison["label_flips"] == {"High->Low": 2}
+    # The live re-score and the candidate both ran with the caches bypassed
+    assert live.bypassed == [True] and candidate.bypassed == [True]
+
+
+def test_candidate_failure_is_counted_not_raised(scorer_factory):
+    scorer = scorer_factory({"live": _Stub([0.6, 0.3, 0.1]), "candidate": _Stub(None, fail=True)})
+    assert scorer.offer("live", _batch(), np.array([[0.6, 0.3, 0.1]] * 2), CLASSES)
+    _wait_for(lambda: scorer.stats()["errors"] == 1)
+    assert scorer.stats()["by_live_model"] == {}
+
+
+def test_full_queue_drops_instead_of_blocking(scorer_factory):
+    class _Slow(_Stub):
+        def predict_proba_many(self, batch):
+            time.sleep(0.5)
+            return super().predict_proba_many(batch)
+
+    scorer = scorer_factory({"live": _Stub([0.6, 0.3, 0.1]), "candidate": _Slow([0.6, 0.3, 0.1])}, max_queue=1)
+    proba = np.array([[0.6, 0.3, 0.1]] * 2)
+    start = time.perf_counter()
+    offered = [scorer.offer("live", _batch(), proba, CLASSES) for _ in range(5)]
+    assert time.perf_counter() - start < 0.1
+    assert offered[0] and not all(offered)
+    assert scorer.stats()["dropped"] >= 3
+
+
+def test_shadow_scoring_leaves_live_caches_alone(artifacts_dir, holdout_records):
+    from src.serving.cache import FeatureRowCache, PredictionCache
+    from src.serving.registry import ModelRegistry
+
+    cache, text_cache = PredictionCache(1000), FeatureRowCache(1 << 20)
+    registry = ModelRegistry(artifacts_dir, cache=cache, text_cache=text_cache)
+    registry.get("random_forest")
+    registry.get("logistic_regression")
+    scorer = ShadowScorer(registry.get, "logistic_regression", sample_rate=1.0)
+    try:
+        assert scorer.offer("random_forest", IssueBatch.from_records(holdout_records[:20]))
+        _wait_for(lambda: scorer.stats()["by_live_model"])
+    finally:
+        scorer.close()
+    for stats in (cache.stats(), text_cache.stats()):
+        assert (stats["entries"], stats["hits"], stats["misses"]) == (0, 0, 0)
+
+
+def test_slow_failing_candidate_never_reaches_live_response(artifacts_dir, holdout_records, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+
+    monkeypatch.setenv("SHADOW_MODEL", "logistic_regression")
+    monkeypatch.setenv("SHADOW_SAMPLE_RATE", "1")
+    monkeypatch.delenv("PREDICT_BATCHING", raising=False)
+    monkeypatch.delenv("REQUEST_DEADLINE_MS", raising=False)
+    predict_proba_many = PredictPipeline.predict_proba_many
+
+    def _candidate_breaks(self, batch):
+        if self.model_name == "logistic_regression":
+            time.sleep(0.3)
+            raise RuntimeError("candidate broke")
+        return predict_proba_many(self, batch)
+
+    with TestClient(create_app()) as client:
+        expected = [client.post("/predict", json=record, params={"model": "random_forest"}).json()
+                    for record in holdout_records[:3]]
+        monkeypatch.setattr(PredictPipeline, "predict_proba_many", _candidate_breaks)
+        for record, body in zip(holdout_records[:3], expected):
+            start = time.perf_counter()
+            response = client.post("/predict", json=record, params={"model": "random_forest"})
+            assert response.status_code == 200 and response.json() == body
+            # Well under the candidate's 0.3s
+            assert time.perf_counter() - start < 0.25
+        _wait_for(lambda: client.get("/admin/shadow").json()["errors"] >= 3)
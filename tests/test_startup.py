@@ -0,0 +1,123 @@
+import threading
+import time
+from contextlib import ExitStack
+
+import pytest
+
+from src.serving.startup import Readiness
+
+
+class _StubRegistry:
+    """
+    Registry whose preload blocks until ``gate`` is set, then loads or fails.
+    """
+    cache = None
+    text_cache = None
+    thread_budget = None
+
+    def __init__(self, error=None):
+        self.gate = threading.Event()
+        self.error = error
+        self.preloaded = None
+
+    def available(self):
+        return ["random_forest"]
+
+    def resolve(self, name=None):
+        return name or "random_forest"
+
+    def preload(self, names, warmup=True, parallel=False):
+        assert self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        self.preloaded = list(names)
+        return self.preloaded
+
+    def describe(self):
+        return {"models": {name: {"load_seconds": 0.25, "warmup_seconds": 0.01} for name in self.preloaded or []}}
+
+    def start_watcher(self, interval_s):
+        pass
+
+    def stop(self):
+        pass
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_readiness_reports_starting_then_ready():
+    registry = _StubRegistry()
+    readiness = Readiness(registry, ["random_forest"])
+    readiness.start()
+    assert readiness.status()["status"] == "starting" and not readiness.ready
+    registry.gate.set()
+    assert readiness.wait(5)
+    status = readiness.status()
+    assert status["status"] == "ready"
+    assert status["startup"]["models"]["random_forest"] == {"load_s": 0.25, "warmup_s": 0.01}
+    assert "random_forest" in readiness.report()
+
+
+def test_readiness_reports_failed_load():
+    registry = _StubRegistry(error=FileNotFoundError("Model artifact not found: random_forest.pkl"))
+    registry.gate.set()
+    readiness = Readiness(registry, ["random_forest"])
+    readiness.start(background=False)
+    assert not readiness.ready
+    assert readiness.status() == {"status": "failed", "models": ["random_forest"],
+                                  "error": "Model artifact not found: random_forest.pkl"}
+
+
+def _fastapi_get(registry, stack):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+
+    client = stack.enter_context(TestClient(create_app(registry=registry)))
+    return lambda path: (lambda r: (r.status_code, r.json()))(client.get(path))
+
+
+def _flask_get(registry, stack):
+    from backend.flask_api import create_app
+
+    client = create_app(registry=registry).test_client()
+    return lambda path: (lambda r: (r.status_code, r.get_json()))(client.get(path))
+
+
+@pytest.fixture(params=[_fastapi_get, _flask_get], ids=["fastapi", "flask"])
+def app_factory(request, monkeypatch):
+    """
+    Builds an app around a registry; returns GET -> (status code, JSON body).
+    """
+    monkeypatch.setenv("DEGRADED_FALLBACKS", "")
+    monkeypatch.setenv("PRELOAD_MODELS", "random_forest")
+    with ExitStack() as stack:
+        yield lambda registry: request.param(registry, stack)
+
+
+def test_ready_is_503_while_loading_then_200(app_factory):
+    registry = _StubRegistry()
+    get = app_factory(registry)
+    status, body = get("/ready")
+    assert status == 503 and body["status"] == "starting"
+    # Liveness does not wait for the models
+    assert get("/health")[0] == 200
+    registry.gate.set()
+    _wait_for(lambda: get("/ready")[0] == 200)
+    assert get("/ready")[1]["status"] == "ready"
+    assert registry.preloaded == ["random_forest"]
+
+
+def test_ready_reports_failed_load(app_factory):
+    registry = _StubRegistry(error=RuntimeError("corrupt artifact"))
+    get = app_factory(registry)
+    registry.gate.set()
+    _wait_for(lambda: get("/ready")[1]["status"] != "starting")
+    status, body = get("/ready")
+    assert status == 503
+    assert body["status"] == "failed" and body["error"] == "corrupt artifact"
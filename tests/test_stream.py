@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def stream_client(artifacts_dir, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.api import create_app
+
+    monkeypatch.setenv("STREAM_CHUNK_SIZE", "2")
+    monkeypatch.setenv("STREAM_MAX_LINE_BYTES", "200")
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def _line(description: str) -> bytes:
+    return json.dumps({"short_description": description, "category": "Road", "location": "Downtown"}).encode()
+
+
+def _post(client, parts):
+    response = client.post("/predict/stream", content=iter(parts))
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_lines_split_across_parts(stream_client):
+    body = _line("pothole on main street") + b"\n" + _line("broken streetlight")
+    results = _post(stream_client, [body[:10], body[10:50], body[50:]])
+    assert [set(r) >= {"prediction", "confidence"} for r in results] == [True, True]
+
+
+def test_oversized_line_answers_with_error_and_stream_continues(stream_client):
+    parts = [_line("pothole") + b"\n", b'{"short_description": "' + b"x" * 150, b"y" * 150 + b'"}\n',
+             _line("graffiti on wall") + b"\n"]
+    results = _post(stream_client, parts)
+    assert len(results) == 3
+    assert "prediction" in results[0]
+    assert results[1] == {"line": 2, "error": "Line exceeds 200 bytes"}
+    assert "prediction" in results[2]
+
+
+def test_oversized_last_line_without_newline(stream_client):
+    results = _post(stream_client, [_line("pothole") + b"\n", b"z" * 500])
+    assert results[1] == {"line": 2, "error": "Line exceeds 200 bytes"}
+
+
+def test_failed_chunk_answers_each_row_with_error(stream_client, monkeypatch):
+    from src.pipeline.predict_pipeline import PredictPipeline
+
+    predict_many = PredictPipeline.predict_many
+
+    def _failing(self, batch):
+        if "boom" in getattr(batch, "short_description", []):
+            raise RuntimeError("scoring failed")
+        return predict_many(self, batch)
+
+    monkeypatch.setattr(PredictPipeline, "predict_many", _failing)
+    lines = [_line("boom"), b'{"category": "Road"}', _line("pothole"), _line("graffiti")]
+    results = _post(stream_client, [b"\n".join(lines) + b"\n"])
+    assert results[0] == {"line": 1, "error": "scoring failed"}
+    assert results[1]["line"] == 2 and results[1]["error"] != "scoring failed"
+    assert "prediction" in results[2] and "prediction" in results[3]
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from src.serving.threads import ThreadBudget, parse_cpu_list
+
+
+class _Pipeline:
+    def set_thread_budget(self, threads, parallel_min_rows):
+        self.budget = (threads, parallel_min_rows)
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8") == [0, 1, 2, 3, 8]
+    with pytest.raises(ValueError):
+        parse_cpu_list(",")
+
+
+def test_limits_leave_environment_alone(monkeypatch):
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    ThreadBudget(threads=2).limit_native_pools()
+    assert "OMP_NUM_THREADS" not in os.environ
+
+
+def test_describe_serves_pools_captured_at_limit_time(monkeypatch):
+    threadpoolctl = pytest.importorskip("threadpoolctl")
+    budget = ThreadBudget(threads=2)
+    assert "native_pools" not in budget.describe()
+    budget.limit_native_pools()
+    calls = []
+    monkeypatch.setattr(threadpoolctl, "threadpool_info", lambda: calls.append(True) or [])
+    assert budget.describe()["native_pools"] == budget.describe()["native_pools"]
+    assert calls == []
+
+
+def test_apply_limits_pools_loaded_with_the_model(monkeypatch):
+    pytest.importorskip("threadpoolctl")
+    budget = ThreadBudget(threads=2, parallel_min_rows=64)
+    calls = []
+    monkeypatch.setattr(budget, "limit_native_pools", lambda: calls.append(True))
+    pipeline = _Pipeline()
+    budget.apply(pipeline)
+    assert pipeline.budget == (2, 64)
+    assert calls == [True]
+
+
+def test_loaded_models_run_single_threaded_native_pools(artifacts_dir, monkeypatch):
+    threadpoolctl = pytest.importorskip("threadpoolctl")
+    from src.serving.registry import ModelRegistry
+
+    budget = ThreadBudget()
+    budget.limit_native_pools()
+    registry = ModelRegistry(artifacts_dir, thread_budget=budget)
+    for model in ("random_forest", "xgb_model"):
+        registry.get(model)
+    pools = threadpoolctl.threadpool_info()
+    assert {pool["user_api"] for pool in pools} >= {"blas", "openmp"}
+    assert all(pool["num_threads"] == 1 for pool in pools)
+    assert budget.describe()["native_pools_limited"]